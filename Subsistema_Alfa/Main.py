@@ -1,9 +1,11 @@
 from time import sleep
 from sensors import Sensors
-from actuators import Actuators
+from actuators import Actuators, LedEffects
 from TFTDisplay import TFTDisplay
 import config
 from communications import Communication
+from iaq import IAQEstimator
+from scheduler import Scheduler
 
 def main() -> None:
     """
@@ -11,29 +13,48 @@ def main() -> None:
     """
     sensor = Sensors()
     actuator = Actuators()
-    display = TFTDisplay()
+    display = TFTDisplay(history=config.history_chart)
     com = Communication(config)
-    actuator.initialize_rgbleds()
-    actuator.initialize_buzzer()
+    iaq_estimator = IAQEstimator(**config.iaq)
+    scheduler = Scheduler()
+    actuator.initialize_rgbleds(scheduler)
+    actuator.initialize_buzzer(config.buzzer["patterns"], config.buzzer["tick_ms"])
     actuator.set_freq_buzzer(800)
     actuator.set_volume_buzzer(300)
     sensor.initialize_apds9960()
-    sensor.initialize_bme680()
+    # The gesture engine pauses proximity sensing, so gestures start only above the alarm threshold
+    sensor.initialize_gesture(entry=config.proximity["on_threshold"])
+    sensor.initialize_proximity_filter(scheduler, **config.proximity)
+    sensor.initialize_bme680(config.bme680_profiles[config.bme680_profile])
     display.initialize_display()
+    # Alarm signaling runs from the main loop, the only user of the LED and TFT buses
+    scheduler.add("alarm_leds", actuator.alarm_step, Actuators.ALARM_PERIOD_MS)
+    scheduler.add("alarm_tft", display.alarm_step, TFTDisplay.ALARM_PERIOD_MS)
     
     if com.initialize_wifi():
         com.connect_mqtt()
         sleep(1)
         com.config_bme680_sensor()
+        com.config_gestures()
         com.config_actuators()
+        bme680_profile = None
+        rgb_effect = None
+        alarm_tone_status = None
         while True:
             try:
+                scheduler.run_pending()
+                sensor.service_bus()
                 sensor_data_bme680 = sensor.read_bme680_sensor()
+                scheduler.run_pending()
                 sensor_data_apds9960 = sensor.read_apds9960_sensor()
+                gesture = sensor.read_gesture()
+                if gesture is not None:
+                    com.send_gesture(gesture)
                 
                 if sensor_data_bme680 is not None and sensor_data_apds9960 != -1:
                     temperature_c, temperature_f, humidity, pressure, gas_k_ohms = sensor_data_bme680
-                    proximity = sensor_data_apds9960
+                    proximity = sensor.read_proximity_filtered()
+                    detected = sensor.proximity_detected()
                     
                     print_sensor_data(temperature_c, temperature_f, humidity, pressure, gas_k_ohms, proximity)
                     
@@ -41,27 +62,38 @@ def main() -> None:
                     display.show_humidity(hum=humidity)
                     display.show_gas(gas=gas_k_ohms)
                     display.show_pressure(pressure=pressure)
+                    display.show_history(temperature_c, humidity, pressure, gas_k_ohms)
                     
-                    com.send_bme680_data(temperature_c, humidity, gas_k_ohms, pressure)
+                    iaq = iaq_estimator.update(gas_k_ohms * 1000, humidity)
+                    com.send_bme680_data(temperature_c, humidity, gas_k_ohms, pressure, iaq)
+                    scheduler.run_pending()
                     com.check_new_message()
                     com.check_new_message()
                     com.check_new_message()
                     
+                    bme680_profile = handle_bme680_profile(bme680_profile, sensor, com)
+                    
                     alarm_status = com.alarm_status()
                     color, rgb_state = com.rgb_state()
                     
-                    handle_alarm_status(alarm_status, proximity, actuator, display, com)
-                    handle_rgb_state(alarm_status, rgb_state, color, actuator, com)
+                    handle_alarm_status(alarm_status, detected, actuator, display, com)
+                    display.refresh()
+                    alarm_tone_status = handle_alarm_tone(alarm_tone_status, com.alarm_status(), actuator)
+                    rgb_effect = handle_rgb_state(alarm_status, rgb_state, color, rgb_effect, actuator, com)
                             
                 #sleep(1)
             except KeyboardInterrupt:
                 print("Exiting program")
+                print("Alarm task jitter:", scheduler.stats())
+                sensor.stop_proximity_sampling()
+                iaq_estimator.save_baseline()
                 actuator.deinit()
                 display.deinitialize_display()
                 com.disconnect_mqtt()
                 break
     else:
         print("Error connecting")
+        sensor.stop_proximity_sampling()
         actuator.deinit()
         display.deinitialize_display()
         com.disconnect_mqtt()
@@ -77,22 +109,23 @@ def print_sensor_data(temperature_c, temperature_f, humidity, pressure, gas_k_oh
     print(f'Proximity: {proximity}')
     print('-------')
 
-def handle_alarm_status(alarm_status, proximity, actuator, display, com) -> None:
+def handle_alarm_status(alarm_status, detected, actuator, display, com) -> None:
     """
-    Handle alarm status and proximity.
+    Handle alarm status and the filtered proximity detection.
     """
     if alarm_status == Communication.ARMED:
         display.show_status_alarm(True)
     else:
         display.show_status_alarm(False)
     
-    if proximity > 150 and alarm_status == Communication.ARMED:
-        actuator.activate_alarm()
+    alarm_tone = config.buzzer["alarm_patterns"]["triggered"]
+    if detected and alarm_status == Communication.ARMED:
+        actuator.activate_alarm(tone=alarm_tone)
         display.activate_tft_alarm()
         com.set_alarm_status(Communication.TRIGGERED)
     elif alarm_status == Communication.TRIGGERED:
-        if proximity > 150:
-            actuator.activate_alarm()
+        if detected:
+            actuator.activate_alarm(tone=alarm_tone)
             display.activate_tft_alarm()
             com.set_alarm_status(Communication.TRIGGERED)
         else:
@@ -107,13 +140,52 @@ def handle_alarm_status(alarm_status, proximity, actuator, display, com) -> None
         else:
             com.set_alarm_status(Communication.ARMED)
 
-def handle_rgb_state(alarm_status, rgb_state, color, actuator, com) -> None:
+def handle_alarm_tone(previous, alarm_status, actuator) -> int:
+    """
+    Play the arm or disarm confirmation chime when the alarm is armed or disarmed.
+    The triggered pattern is played by the alarm itself, and leaving it needs no chime.
+    Returns the alarm status to pass on the next call.
+    """
+    if previous is not None and alarm_status != previous and previous != Communication.TRIGGERED:
+        if alarm_status == Communication.ARMED:
+            actuator.play_tone(config.buzzer["alarm_patterns"]["armed"])
+        elif alarm_status == Communication.DISARMED:
+            actuator.play_tone(config.buzzer["alarm_patterns"]["disarmed"])
+    return alarm_status
+
+def handle_bme680_profile(profile, sensor, com) -> str:
+    """
+    Apply the BME680 sampling profile requested over MQTT and report its cost.
+    Returns the name of the applied profile.
+    """
+    requested = com.bme680_profile()
+    if requested == profile:
+        return profile
+    if requested not in config.bme680_profiles:
+        print("Unknown BME680 profile " + str(requested))
+        com.set_bme680_profile(profile or config.bme680_profile)
+        return profile
+    sensor.set_bme680_profile(config.bme680_profiles[requested])
+    # one conversion with the new settings to measure it
+    sensor.read_bme680_sensor()
+    conversion_ms, current_ua = sensor.bme680_profile_report()
+    com.set_bme680_profile(requested, conversion_ms, current_ua)
+    return requested
+
+def handle_rgb_state(alarm_status, rgb_state, color, rgb_effect, actuator, com) -> str:
     """
-    Handle RGB state.
+    Handle RGB state and effect.
+    Returns the name of the last published effect.
     """
+    requested = com.rgb_effect()
+    if requested != rgb_effect:
+        com.set_rgb_effect(requested)
     if alarm_status != Communication.TRIGGERED:
         if rgb_state == com.RGB_ON:
-            actuator.turn_on_all_rgbleds(color)
+            if requested != LedEffects.NONE:
+                actuator.start_rgb_effect(requested, color)
+            else:
+                actuator.turn_on_all_rgbleds(color)
             com.set_rgb_state(com.RGB_ON, color)
         else:
             actuator.turn_off_all_rgbleds()
@@ -121,6 +193,7 @@ def handle_rgb_state(alarm_status, rgb_state, color, actuator, com) -> None:
     else:
         actuator.turn_off_all_rgbleds()
         com.set_rgb_state(com.RGB_OFF, color)
+    return requested
         
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,8 +1,12 @@
 
-from machine import Pin, SPI, Timer
+from machine import Pin, SPI
 import st7789py as st7789
-import vga2_bold_16x32 as font
-import vga1_bold_16x16 as fontA
+from binfont import load_font
+from historychart import HistoryChart
+
+# binary fonts on flash when converted with binfont.py, else the font modules
+font = load_font("vga2_bold_16x32")
+fontA = load_font("vga1_bold_16x16")
 
 class TFTDisplay:
     """
@@ -11,9 +15,12 @@ class TFTDisplay:
     activate and deactivate the alarm, and deinitialize the display.
     """
 
+    ALARM_PERIOD_MS = 505
+
     def __init__(self, spi_id: int=1, sck_pin: int=10, mosi_pin: int=11,
                  reset_pin: int=16, cs_pin: int=13, dc_pin: int=12,
-                 bl_pin: int=14, rotation: int=0, height: int=240, width: int=240):
+                 bl_pin: int=14, rotation: int=0, height: int=240, width: int=240,
+                 framebuffer: bool=False, history: dict=None):
         """
         Initializes the TFTDisplay object.
 
@@ -28,6 +35,9 @@ class TFTDisplay:
         - rotation (int): The rotation value.
         - height (int): The display height.
         - width (int): The display width.
+        - framebuffer (bool): Whether to compose the screen off-screen and send only the changed areas on refresh.
+        - history (dict): The history chart settings, "period_ms" and "series", or None for no chart.
+          The readouts move up to make room for it below them. Needs rotation 0.
         """
         
         self.__spi = SPI(spi_id, baudrate=60000000, sck=Pin(sck_pin), mosi=Pin(mosi_pin), miso=None)
@@ -38,9 +48,15 @@ class TFTDisplay:
         self.__rotation = rotation
         self.__height = height
         self.__width = width
+        self.__framebuffer = framebuffer
         self.__tft_alarm_activated = False
-        self.__tft_timer = None
-        self.__change_tft = False
+        self.__alarm_screens = None
+        self.__alarm_step = 0
+        self.__fields = {}
+        self.__glyphs_drawn = 0
+        self.__glyphs_skipped = 0
+        self.__history = history
+        self.__chart = None
         
     def initialize_display(self)-> None:
         """
@@ -49,10 +65,117 @@ class TFTDisplay:
         
         self.__display = st7789.ST7789(self.__spi, self.__height, self.__width,
                                      reset=self.__reset, cs=self.__cs, dc=self.__dc,
-                                     backlight=self.__bl, rotation=self.__rotation)
+                                     backlight=self.__bl, rotation=self.__rotation,
+                                     framebuffer=self.__framebuffer)
+        
+        self.__fill(st7789.BLACK)
         
-        self.__display.fill(st7789.BLACK)
+        display = self.__display
+        if self.__history is None:
+            self.__rows = {
+                "alarm_status": display.height // 5 - fontA.HEIGHT //5,
+                "temperature": display.height // 3 - font.HEIGHT //3,
+                "humidity": display.height // 2 - font.HEIGHT //2,
+                "gas": 140,
+                "pressure": 180}
+        else:
+            # Readouts stacked at the top, the chart scrolls in the rows left below them
+            self.__rows = {
+                "alarm_status": 4,
+                "temperature": 24,
+                "humidity": 24 + font.HEIGHT,
+                "gas": 24 + 2 * font.HEIGHT,
+                "pressure": 24 + 3 * font.HEIGHT}
+            top = self.__rows["pressure"] + font.HEIGHT + 4
+            self.__chart = HistoryChart(display, top, display.height - top, self.__history["series"],
+                                        self.__history["period_ms"], st7789.BLACK)
+            self.__chart.start()
+        
+        # The alarm screens as (background, foreground, ((text, x, y), ...)), laid out once
+        self.__alarm_screens = (
+            (st7789.YELLOW, st7789.BLACK, (
+                ("MOTION", display.width // 2 - len("MOTION") // 2 * font.WIDTH,
+                 display.height // 3 - font.HEIGHT //3),
+                ("DETECTED", display.width // 2 - len("DETECTED") // 2 * font.WIDTH,
+                 display.height // 2 - font.HEIGHT //2))),
+            (st7789.RED, st7789.WHITE, (
+                ("WARNING!!", display.width // 2 - len("WARNING!!") // 2 * font.WIDTH,
+                 display.height // 2 - font.HEIGHT //2),)))
         
+    def __fill(self, color: int, flush: bool=True)-> None:
+        """
+        Fills the whole display, which also clears every cached field.
+
+        Parameters:
+        - color (int): The 565 encoded color.
+        - flush (bool): Whether to send the frame buffer right away.
+        """
+        self.__display.fill(color)
+        self.__fields.clear()
+        if flush:
+            self.__display.flush()
+        
+    def __draw_field(self, name: str, field_font, text: str, x: int, y: int, fg: int, bg: int)-> None:
+        """
+        Draws a text field, redrawing only the characters that changed since it was last drawn.
+
+        Parameters:
+        - name (str): The field name, the key of its cache entry.
+        - field_font (module): The font module.
+        - text (str): The text to show.
+        - x (int): The column of the first character.
+        - y (int): The row of the first character.
+        - fg (int): The 565 encoded text color.
+        - bg (int): The 565 encoded background color.
+        """
+        width = field_font.WIDTH
+        last = self.__fields.get(name)
+        if last is None or last[1:] != (field_font, x, y, fg, bg):
+            if last is not None:
+                # The field moved or changed style: clear what it covered before drawing it again
+                last_text, last_font, last_x, last_y, last_fg, last_bg = last
+                self.__display.fill_rect(last_x, last_y, len(last_text) * last_font.WIDTH,
+                                         last_font.HEIGHT, last_bg)
+            self.__display.text(field_font, text, x, y, fg, bg)
+            self.__glyphs_drawn += len(text)
+        else:
+            last_text = last[0]
+            if len(text) < len(last_text):
+                # Blank the characters left over from the longer text
+                text_to_draw = text + " " * (len(last_text) - len(text))
+            else:
+                text_to_draw = text
+            drawn = 0
+            start = -1
+            for i in range(len(text_to_draw) + 1):
+                if i < len(text_to_draw) and (i >= len(last_text) or text_to_draw[i] != last_text[i]):
+                    if start < 0:
+                        start = i
+                elif start >= 0:
+                    # One call for each run of changed characters
+                    self.__display.text(field_font, text_to_draw[start:i], x + start * width, y, fg, bg)
+                    drawn += i - start
+                    start = -1
+            self.__glyphs_drawn += drawn
+            self.__glyphs_skipped += len(text_to_draw) - drawn
+            text = text_to_draw
+        self.__fields[name] = (text, field_font, x, y, fg, bg)
+        
+    def refresh(self)-> None:
+        """
+        Sends the areas drawn since the last refresh to the panel. Only needed in framebuffer mode,
+        where the value fields are composed off-screen and appear together.
+        """
+        self.__display.flush()
+        
+    def render_stats(self)-> tuple:
+        """
+        Returns the number of characters drawn and skipped as unchanged in the value fields.
+
+        Returns:
+        - tuple: (drawn, skipped)
+        """
+        return self.__glyphs_drawn, self.__glyphs_skipped
         
     def show_temperature(self, show: bool=True, temp: float=0.00)-> None:
         """
@@ -65,11 +188,12 @@ class TFTDisplay:
         if not self.__tft_alarm_activated:
             show_temp = str(f'{temp:.2f} C') if show else str('       ')
             length = len(show_temp)
-            self.__display.text(
+            self.__draw_field(
+                        "temperature",
                         font,
                         show_temp,
                         self.__display.width // 2 - length // 2 * font.WIDTH,
-                        self.__display.height // 3 - font.HEIGHT //3,
+                        self.__rows["temperature"],
                         st7789.WHITE,
                         st7789.BLACK)
         
@@ -84,11 +208,12 @@ class TFTDisplay:
         if not self.__tft_alarm_activated:
             show_hum = str(f'{hum:.2f} %') if show else str('       ')
             length = len(show_hum)
-            self.__display.text(
+            self.__draw_field(
+                        "humidity",
                         font,
                         show_hum,
                         self.__display.width // 2 - length // 2 * font.WIDTH,
-                        self.__display.height // 2 - font.HEIGHT //2,
+                        self.__rows["humidity"],
                         st7789.WHITE,
                         st7789.BLACK)
         
@@ -103,11 +228,12 @@ class TFTDisplay:
         if not self.__tft_alarm_activated:
             show_gas_r = str(f'{gas:.2f} kOhm') if show else str('          ')
             length = len(show_gas_r)
-            self.__display.text(
+            self.__draw_field(
+                        "gas",
                         font,
                         show_gas_r,
                         self.__display.width // 2 - length // 2 * font.WIDTH,
-                        140,
+                        self.__rows["gas"],
                         st7789.WHITE,
                         st7789.BLACK)
             
@@ -122,11 +248,12 @@ class TFTDisplay:
         if not self.__tft_alarm_activated:
             show_press = str(f'{pressure:.2f} hPa') if show else str('          ')
             length = len(show_press)
-            self.__display.text(
+            self.__draw_field(
+                        "pressure",
                         font,
                         show_press,
                         self.__display.width // 2 - length // 2 * font.WIDTH,
-                        180,
+                        self.__rows["pressure"],
                         st7789.WHITE,
                         st7789.BLACK)
             
@@ -140,22 +267,48 @@ class TFTDisplay:
         if not self.__tft_alarm_activated:
             alarm_status = "ALARM ON " if engage else "ALARM OFF"
             length = len(alarm_status)
-            self.__display.text(
+            self.__draw_field(
+                        "alarm_status",
                         fontA,
                         alarm_status,
                         self.__display.width // 2 - length // 2 * font.WIDTH,
-                        self.__display.height // 5 - fontA.HEIGHT //5,
+                        self.__rows["alarm_status"],
                         st7789.GREEN if engage else st7789.RED,
                         st7789.BLACK)
     
+    def show_history(self, temp: float, hum: float, pressure: float, gas: float)-> None:
+        """
+        Adds a sample to the history chart, which draws it as one new row and scrolls.
+        While the TFT alarm is shown the sample is only recorded. Does nothing without a chart.
+
+        Parameters:
+        - temp (float): The temperature value.
+        - hum (float): The humidity value.
+        - pressure (float): The pressure value.
+        - gas (float): The gas value.
+        """
+        if self.__chart is not None:
+            self.__chart.add((temp, hum, pressure, gas), not self.__tft_alarm_activated)
+            
+    def history_stats(self)-> tuple:
+        """
+        Returns the rows drawn and the whole redraws of the history chart.
+
+        Returns:
+        - tuple: (rows drawn, redraws), (0, 0) without a chart
+        """
+        if self.__chart is None:
+            return 0, 0
+        return self.__chart.stats()
+    
     def activate_tft_alarm(self):
         """
         Activates the TFT alarm.
         """
         if not self.__tft_alarm_activated:
             self.__tft_alarm_activated = True
-            self.__display.fill(st7789.BLACK)
-            self.__tft_timer = Timer(period=505, mode=Timer.PERIODIC, callback=self._show_alarm)
+            self.__alarm_step = 0
+            self.__fill(st7789.BLACK)
             
     
     def deactivate_tft_alarm(self):
@@ -163,61 +316,34 @@ class TFTDisplay:
         Deactivates the TFT alarm.
         """
         if self.__tft_alarm_activated:
-            self.__display.fill(st7789.BLACK)
+            self.__fill(st7789.BLACK)
             self.__tft_alarm_activated = False
-            self.__tft_timer.deinit()
+            if self.__chart is not None:
+                self.__chart.redraw()
             
-    def _show_alarm(self, t: Timer):
+    def alarm_step(self):
         """
-        Shows the alarm on the TFT display.
-        This method is called periodically by the timer.
-
-        Parameters:
-        - t (Timer): The timer object.
+        Shows the next alarm screen on the TFT display.
+        Meant to be scheduled every ALARM_PERIOD_MS from the main loop; does nothing while
+        the TFT alarm is not activated.
         """
-        if self.__change_tft:
-            self.__display.fill(st7789.RED)
-            warning = str("WARNING!!")
-            length = len(warning)
-            self.__display.text(
-                        font,
-                        warning,
-                        self.__display.width // 2 - length // 2 * font.WIDTH,
-                        self.__display.height // 2 - font.HEIGHT //2,
-                        st7789.WHITE,
-                        st7789.RED)
-        else:
-            self.__display.fill(st7789.YELLOW)
-            motion = str("MOTION")
-            detected = str("DETECTED")
-            length_m = len(motion)
-            length_d = len(detected)
-            self.__display.text(
-                        font,
-                        motion,
-                        self.__display.width // 2 - length_m // 2 * font.WIDTH,
-                        self.__display.height // 3 - font.HEIGHT //3,
-                        st7789.BLACK,
-                        st7789.YELLOW)
-            self.__display.text(
-                        font,
-                        detected,
-                        self.__display.width // 2 - length_d // 2 * font.WIDTH,
-                        self.__display.height // 2 - font.HEIGHT //2,
-                        st7789.BLACK,
-                        st7789.YELLOW)
-            
-        self.__change_tft = not self.__change_tft
+        if not self.__tft_alarm_activated:
+            return
+        background, foreground, lines = self.__alarm_screens[self.__alarm_step]
+        self.__fill(background, False)
+        for text, x, y in lines:
+            self.__display.text(font, text, x, y, foreground, background)
+        self.__display.flush()
+        self.__alarm_step = (self.__alarm_step + 1) % len(self.__alarm_screens)
             
         
     def deinitialize_display(self):
         """
         Deinitializes the TFT display.
         """
-        self.__display.fill(st7789.BLACK)
+        self.__tft_alarm_activated = False
+        self.__fill(st7789.BLACK)
         self.__spi.deinit()
-        if self.__tft_timer is not None:
-            self.__tft_timer.deinit()
         
         
         
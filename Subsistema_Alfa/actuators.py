@@ -4,8 +4,17 @@ Author: Fabio Antonio Valente
 Description: This file contains the implementation of the Actuators class, which represents a set of actuators including RGB LEDs and a buzzer.
 """
 
-from machine import Pin, SoftSPI, PWM, Timer
-from generic_dotstar import SpiDotStar as SPIDotStar
+from machine import Pin, SPI, SoftSPI, PWM, Timer
+from math import cos, pi
+from array import array
+from time import ticks_us, ticks_diff
+from generic_dotstar import SpiDotStar as SPIDotStar, Rp2DmaSpiWriter
+
+# RP2040 pins that can carry SCK, MOSI and MISO of each hardware SPI bus
+HW_SPI_PINS = {
+    0: ((2, 6, 18, 22), (3, 7, 19), (0, 4, 16, 20)),
+    1: ((10, 14, 26), (11, 15, 27), (8, 12, 28)),
+}
 
 class Color:
     def __init__(self, red:int, green:int, blue:int):
@@ -19,6 +28,181 @@ class Color:
         """
         self._color = (blue, green, red)
 
+# Frames in one cycle of an effect
+EFFECT_STEPS = 32
+# Brightness levels of one breath, 0 to 255 and back, following a raised sine
+_BREATH = bytes(int(127.5 - 127.5 * cos(2 * pi * i / EFFECT_STEPS)) for i in range(EFFECT_STEPS))
+
+class LedEffects:
+    """
+    Animation engine for the RGB LEDs, driven by a task of the main loop scheduler, so the
+    frames never interleave with the other writes of the main loop to the strip, which has
+    a single owner. The frame rate is kept as long as the main loop runs the scheduler often.
+
+    Every effect is reduced to a table of colors when it starts, so a frame only looks
+    colors up and writes them to the strip: no math, and no allocation where the strip fills
+    and scales with the viper emitter. Without it, fill copies through slices of a memoryview
+    made once by the strip, each slice being a small allocation. A frame costs one
+    pixel write for fade, breathe and strobe, two for chase and one per LED for rainbow,
+    sent as a single SPI frame.
+
+    Attributes:
+        __table (list): The precomputed colors of the running effect.
+        __step (int): The index of the next frame.
+        frames (int): The number of frames rendered.
+        frame_us (int): The time of the last frame in microseconds.
+        max_frame_us (int): The slowest frame in microseconds.
+    """
+
+    NONE = "none"
+    FADE = "fade"
+    BREATHE = "breathe"
+    CHASE = "chase"
+    RAINBOW = "rainbow"
+    STROBE = "strobe"
+    EFFECTS = (NONE, FADE, BREATHE, CHASE, RAINBOW, STROBE)
+
+    STEPS = EFFECT_STEPS
+    BREATH = _BREATH
+
+    def __init__(self, pixels, num_leds: int, scheduler, frame_ms: int = 40):
+        """
+        Initialize the LedEffects object.
+
+        Args:
+            pixels (SpiDotStar): The LED strip.
+            num_leds (int): The number of LEDs.
+            scheduler (Scheduler): The main loop scheduler that runs the frames.
+            frame_ms (int, optional): The time between frames in milliseconds. Defaults to 40.
+        """
+        self.__pixels = pixels
+        self.__num_leds = num_leds
+        self.__scheduler = scheduler
+        self.__frame_ms = frame_ms
+        self.__task = None
+        self.__effect = self.NONE
+        self.__color = None
+        self.__table = None
+        self.__step = 0
+        self.__render = None
+        self.frames = 0
+        self.frame_us = 0
+        self.max_frame_us = 0
+
+    def effect(self) -> str:
+        """
+        Get the running effect.
+
+        Returns:
+            str: The effect name, NONE if no effect is running.
+        """
+        return self.__effect
+
+    def start(self, effect: str, color: tuple, background: tuple = (0, 0, 0)) -> None:
+        """
+        Start an effect. Starting the running effect again with the same color does nothing.
+
+        Args:
+            effect (str): One of EFFECTS.
+            color (tuple): The effect color in the pixel order of the strip.
+            background (tuple, optional): The second color of fade, chase and strobe. Defaults to off.
+        """
+        if effect not in self.EFFECTS:
+            raise ValueError("Unknown effect " + str(effect))
+        if effect == self.__effect and color == self.__color:
+            return
+        self.stop()
+        if effect == self.NONE:
+            return
+        steps = self.STEPS
+        if effect == self.FADE:
+            self.__table = [self.__mix(background, color, i, steps - 1) for i in range(steps)]
+            self.__render = self.__render_fill
+        elif effect == self.BREATHE:
+            self.__table = [self.__mix((0, 0, 0), color, level, 255) for level in self.BREATH]
+            self.__render = self.__render_fill
+        elif effect == self.CHASE:
+            self.__table = [color, background]
+            self.__render = self.__render_chase
+        elif effect == self.RAINBOW:
+            self.__table = [self.__wheel(i * 768 // steps) for i in range(steps)]
+            self.__render = self.__render_rainbow
+        else:
+            self.__table = [color, background]
+            self.__render = self.__render_fill
+        self.__effect = effect
+        self.__color = color
+        self.__step = 0
+        if effect == self.CHASE:
+            self.__pixels.fill(background)
+        self.__task = self.__scheduler.add("rgb_effect", self._frame, self.__frame_ms)
+
+    def stop(self) -> None:
+        """
+        Stop the running effect. The LEDs keep the last frame.
+        """
+        if self.__task is not None:
+            self.__scheduler.remove(self.__task)
+            self.__task = None
+        self.__effect = self.NONE
+        self.__color = None
+        self.__table = None
+
+    def _frame(self) -> None:
+        """
+        Scheduler task that renders the next frame of the running effect.
+        """
+        table = self.__table
+        if table is None:
+            return
+        start = ticks_us()
+        pixels = self.__pixels
+        pixels.begin()
+        self.__render(pixels, table, self.__step)
+        pixels.commit()
+        self.__step += 1
+        if self.__effect == self.FADE and self.__step >= len(table):
+            # A fade ends on its last color instead of starting over
+            self.__scheduler.remove(self.__task)
+            self.__task = None
+            self.__table = None
+        elapsed = ticks_diff(ticks_us(), start)
+        self.frames += 1
+        self.frame_us = elapsed
+        if elapsed > self.max_frame_us:
+            self.max_frame_us = elapsed
+
+    def __render_fill(self, pixels, table, step: int) -> None:
+        pixels.fill(table[step % len(table)])
+
+    def __render_chase(self, pixels, table, step: int) -> None:
+        num_leds = self.__num_leds
+        pixels[(step - 1) % num_leds] = table[1]
+        pixels[step % num_leds] = table[0]
+
+    def __render_rainbow(self, pixels, table, step: int) -> None:
+        steps = len(table)
+        spread = steps // self.__num_leds or 1
+        for led in range(self.__num_leds):
+            pixels[led] = table[(step + led * spread) % steps]
+
+    @staticmethod
+    def __mix(start: tuple, end: tuple, num: int, den: int) -> tuple:
+        return tuple(a + (b - a) * num // den for a, b in zip(start, end))
+
+    @staticmethod
+    def __wheel(pos: int) -> tuple:
+        """
+        Color of a hue wheel with 768 positions. Red, green and blue take turns, so the
+        result is the same in any pixel order.
+        """
+        segment, level = divmod(pos % 768, 256)
+        if segment == 0:
+            return (255 - level, level, 0)
+        if segment == 1:
+            return (0, 255 - level, level)
+        return (level, 0, 255 - level)
+
 class Actuators:
     """
     Class representing a set of actuators including RGB LEDs and a buzzer.
@@ -29,46 +213,99 @@ class Actuators:
     BLUE = Color(255, 0, 0)
     WHITE = Color(255, 255, 255)
 
-    __change_on_off: bool
+    ALARM_PERIOD_MS = 500
+
     __alarm_activated: bool
     __num_led_alarm: int
-    __alarm_color: Color
+    __alarm_pattern: tuple
+    __alarm_step: int
+    __alarm_tone: str
+    __tones: dict
     __rgb_led_on: bool
+    __strip_color: tuple
+    __spi_backend: str
 
-    def __init__(self, sck_pin: int=2, mosi_pin: int=3, id_spi: int=0, pwm_pin: int=15):
+    def __init__(self, sck_pin: int=2, mosi_pin: int=3, id_spi: int=0, pwm_pin: int=15,
+                 miso_pin: int=4, baudrate: int=1000000, use_dma: bool=False):
         """
         Initialize the Actuators object.
 
+        The RGB LEDs are driven by the hardware SPI bus id_spi when the pins belong to it,
+        and by SoftSPI otherwise.
+
         Args:
             sck_pin (int, optional): The pin number for the SPI clock. Defaults to 2.
             mosi_pin (int, optional): The pin number for the SPI MOSI. Defaults to 3.
             id_spi (int, optional): The SPI ID. Defaults to 0.
             pwm_pin (int, optional): The pin number for the PWM output. Defaults to 15.
+            miso_pin (int, optional): The pin number for the SPI MISO, unused by the LEDs. Defaults to 4.
+            baudrate (int, optional): The SPI clock in Hz. Defaults to 1000000.
+            use_dma (bool, optional): Send the LED frames by DMA without blocking, hardware SPI only. Defaults to False.
         """
-        self.__spi = SoftSPI(sck=Pin(sck_pin), mosi=Pin(mosi_pin), baudrate=1000000, miso=Pin(4))
+        self.__spi = self.__open_spi(id_spi, sck_pin, mosi_pin, miso_pin, baudrate, use_dma)
         self.__pwm_pin = pwm_pin
-        self.__alarm_timer = None
         self.__alarm_activated = False
-        self.__change_on_off = True
+        self.__alarm_pattern = None
+        self.__alarm_step = 0
+        self.__alarm_tone = None
+        self.__tones = {}
+        self.__tone = None
+        self.__tone_timer = None
+
+    def __open_spi(self, id_spi: int, sck_pin: int, mosi_pin: int, miso_pin: int, baudrate: int, use_dma: bool):
+        """
+        Open the SPI backend for the RGB LEDs: DMA, hardware SPI or SoftSPI, in that order.
+
+        Returns:
+            The SPI object to give to the DotStar driver.
+        """
+        pins = HW_SPI_PINS.get(id_spi)
+        if pins is not None and sck_pin in pins[0] and mosi_pin in pins[1] and miso_pin in pins[2]:
+            try:
+                spi = SPI(id_spi, baudrate=baudrate, sck=Pin(sck_pin), mosi=Pin(mosi_pin), miso=Pin(miso_pin))
+            except (ValueError, OSError):
+                spi = None
+            if spi is not None:
+                if use_dma:
+                    try:
+                        writer = Rp2DmaSpiWriter(spi, id_spi)
+                        self.__spi_backend = "dma"
+                        return writer
+                    except (NotImplementedError, OSError, ValueError):
+                        pass
+                self.__spi_backend = "spi"
+                return spi
+        self.__spi_backend = "softspi"
+        return SoftSPI(sck=Pin(sck_pin), mosi=Pin(mosi_pin), baudrate=baudrate, miso=Pin(miso_pin))
+
+    def spi_backend(self) -> str:
+        """
+        Get the SPI backend driving the RGB LEDs.
 
-    def initialize_rgbleds(self, num_rgb_leds: int= 5) -> None:
+        Returns:
+            str: "dma", "spi" or "softspi".
         """
-        Initialize the RGB LEDs.
+        return self.__spi_backend
+
+    def initialize_rgbleds(self, scheduler, num_rgb_leds: int= 5) -> None:
+        """
+        Initialize the RGB LEDs and their effect engine.
 
         Args:
+            scheduler (Scheduler): The main loop scheduler that runs the effect frames.
             num_rgb_leds (int, optional): The number of RGB LEDs. Defaults to 5.
         """
         self.__num_rgb_leds = num_rgb_leds
         self.__pixelp = SPIDotStar(self.__spi, num_rgb_leds)
         self.__rgb_led_on = False
+        self.__strip_color = None
+        self.__effects = LedEffects(self.__pixelp, num_rgb_leds, scheduler)
 
     def turn_off_all_rgbleds(self) -> None:
         """
         Turn off all RGB LEDs.
         """
-        for pixel in range(self.__num_rgb_leds):
-            self.__pixelp[pixel] = (0, 0, 0)
-        self.__pixelp.show()
+        self.__fill_rgbleds((0, 0, 0))
         self.__rgb_led_on = False
 
     def turn_on_all_rgbleds(self, color: Color) -> None:
@@ -78,11 +315,73 @@ class Actuators:
         Args:
             color (Color): The color to set the LEDs to.
         """
-        for pixel in range(self.__num_rgb_leds):
-            self.__pixelp[pixel] = color._color
-        self.__pixelp.show()
+        self.__fill_rgbleds(color._color)
+        self.__rgb_led_on = True
+
+    def start_rgb_effect(self, effect: str, color: Color) -> None:
+        """
+        Start an animation on the RGB LEDs. Starting the running effect again with the same
+        color does nothing, so it can be called on every loop. Does nothing while the alarm is
+        active, the alarm pattern owns the strip.
+
+        Args:
+            effect (str): One of LedEffects.EFFECTS. LedEffects.NONE stops the running effect.
+            color (Color): The color of the effect.
+        """
+        if self.__alarm_activated:
+            return
+        self.__effects.start(effect, color._color)
+        self.__strip_color = None
         self.__rgb_led_on = True
 
+    def stop_rgb_effect(self) -> None:
+        """
+        Stop the animation on the RGB LEDs. The LEDs keep the last frame.
+        """
+        if self.__effects.effect() != LedEffects.NONE:
+            self.__effects.stop()
+            self.__strip_color = None
+
+    def rgb_effect(self) -> str:
+        """
+        Get the animation running on the RGB LEDs.
+
+        Returns:
+            str: The effect name, LedEffects.NONE if no effect is running.
+        """
+        return self.__effects.effect()
+
+    def rgb_effect_stats(self) -> tuple:
+        """
+        Get the cost of the animation frames.
+
+        Returns:
+            tuple: The number of frames rendered, the time of the last frame and of the slowest
+                frame in microseconds.
+        """
+        effects = self.__effects
+        return effects.frames, effects.frame_us, effects.max_frame_us
+
+    def __fill_rgbleds(self, color: tuple) -> None:
+        """
+        Set every RGB LED to the same color, unless the strip already shows it.
+
+        Args:
+            color (tuple): The color in the pixel order of the strip.
+        """
+        self.stop_rgb_effect()
+        if self.__alarm_activated:
+            # The alarm pattern owns the strip until the alarm is deactivated
+            return
+        if color == self.__strip_color:
+            # Same state as the last call: show() finds nothing to send and only counts the skip.
+            self.__pixelp.show()
+            return
+        self.__pixelp.begin()
+        self.__pixelp.fill(color)
+        self.__pixelp.commit()
+        self.__strip_color = color
+
     def turn_off_rgbled(self, num_led: int) -> None:
         """
         Turn off a specific RGB LED.
@@ -91,8 +390,10 @@ class Actuators:
             num_led (int): The index of the LED to turn off.
         """
         if num_led in range(self.__num_rgb_leds):
+            self.__pixelp.begin()
             self.__pixelp[num_led] = (0, 0, 0)
-            self.__pixelp.show()
+            self.__pixelp.commit()
+            self.__strip_color = None
             self.__rgb_led_on = False
         else:
             print("Index out of bound")
@@ -106,8 +407,10 @@ class Actuators:
             color (Color): The color to set the LED to.
         """
         if num_led in range(self.__num_rgb_leds):
+            self.__pixelp.begin()
             self.__pixelp[num_led] = color._color
-            self.__pixelp.show()
+            self.__pixelp.commit()
+            self.__strip_color = None
             self.__rgb_led_on = True
         else:
             print("Index out of bound")
@@ -115,59 +418,183 @@ class Actuators:
     def is_rgb_led_on(self) -> bool:
         return self.__rgb_led_on
 
-    def _turn_alarm(self, t) -> None:
+    def rgbled_traffic(self) -> tuple:
         """
-        Internal method for toggling the RGB LEDs and Buzzeron/off based on the alarm state.
+        Get the SPI traffic sent to the RGB LEDs since they were initialized.
+
+        Returns:
+            tuple: The number of frames sent and skipped as unchanged, the bytes written, and
+                the time in microseconds the last frame blocked the CPU on the current backend.
         """
-        if self.__change_on_off:
-            self.sound_buzzer()
-            if self.__num_led_alarm in range(self.__num_rgb_leds):
-                self.turn_on_rgbled(self.__num_led_alarm, self.__alarm_color)
-            else:
-                self.turn_on_all_rgbleds(self.__alarm_color)
+        pixelp = self.__pixelp
+        return pixelp.frames_sent, pixelp.frames_skipped, pixelp.bytes_sent, pixelp.frame_us
+
+    def alarm_step(self) -> None:
+        """
+        Play the next step of the alarm pattern on the RGB LEDs and the buzzer.
+        Meant to be scheduled every ALARM_PERIOD_MS from the main loop; does nothing while the
+        alarm is not activated.
+        """
+        if not self.__alarm_activated:
+            return
+        color, duty = self.__alarm_pattern[self.__alarm_step]
+        if duty is not None:
+            self.__pwm.duty_u16(duty)
+        pixelp = self.__pixelp
+        pixelp.begin()
+        if self.__num_led_alarm in range(self.__num_rgb_leds):
+            pixelp[self.__num_led_alarm] = color
         else:
-            self.silence_buzzer()
-            if self.__num_led_alarm in range(self.__num_rgb_leds):
-                self.turn_off_rgbled(self.__num_led_alarm)
-            else:
-                self.turn_off_all_rgbleds()
-        self.__change_on_off = not self.__change_on_off
+            pixelp.fill(color)
+        pixelp.commit()
+        self.__strip_color = None
+        self.__alarm_step += 1
+        if self.__alarm_step == len(self.__alarm_pattern):
+            self.__alarm_step = 0
 
-    def activate_alarm(self, num_led_alarm: int= -1, alarm_color: Color= RED) -> None:
+    def activate_alarm(self, num_led_alarm: int= -1, alarm_color: Color= RED, tone: str= None) -> None:
         """
         Activate the alarm.
 
         Args:
             num_led_alarm (int, optional): The index of the LED to use for the alarm. Defaults to -1.
             alarm_color (Color, optional): The color to set the LED(s) to during the alarm. Defaults to RED.
+            tone (str, optional): The tone pattern played by the buzzer during the alarm. Defaults to None,
+                a beep in time with the LEDs.
         """
         if not self.__alarm_activated:
             self.__num_led_alarm = num_led_alarm
-            self.__alarm_color = alarm_color
+            self.__alarm_step = 0
+            self.stop_rgb_effect()
             self.turn_off_all_rgbleds()
-            self.silence_buzzer()
-            self.__alarm_timer = Timer(period=500, mode=Timer.PERIODIC, callback=self._turn_alarm)
+            self.stop_tone()
+            if tone is not None and tone in self.__tones:
+                # Every step is reduced to a color, the buzzer belongs to the tone sequencer
+                self.__alarm_pattern = ((alarm_color._color, None), ((0, 0, 0), None))
+                self.__alarm_tone = tone
+                self.play_tone(tone)
+            else:
+                # Every step is reduced to a color and a buzzer duty, so a step is one frame and one duty write
+                self.__alarm_pattern = ((alarm_color._color, self.__duty_u16), ((0, 0, 0), 0))
+                self.__alarm_tone = None
+                self.__pwm.freq(self.__pwm_freq)
             self.__alarm_activated = True
-            self.__change_on_off = True
 
     def deactivate_alarm(self) -> None:
         """
         Deactivate the alarm.
         """
         if self.__alarm_activated:
-            self.__alarm_timer.deinit()
             self.__alarm_activated = False
             self.turn_off_all_rgbleds()
+            if self.__alarm_tone is not None:
+                self.stop_tone()
             self.silence_buzzer()
-            self.__change_on_off = True
 
-    def initialize_buzzer(self) -> None:
+    def initialize_buzzer(self, patterns: dict= None, tick_ms: int= 10) -> None:
         """
-        Initialize the buzzer.
+        Initialize the buzzer and its tone sequencer.
+
+        A pattern is either {"sweep": (low_hz, high_hz, period_ms)}, a siren going from low to high
+        and back, or {"notes": ((freq_hz, duration_ms), ...)}, where a frequency of 0 is a rest.
+        "loop" (bool) repeats the pattern until stop_tone() is called.
+
+        Args:
+            patterns (dict, optional): Pattern name to definition. Defaults to None, no patterns.
+            tick_ms (int, optional): The time step of the sequencer in milliseconds. Defaults to 10.
         """
         self.__pwm = PWM(Pin(self.__pwm_pin))
         self.__pwm_freq = 1000
         self.__duty_u16 = 0
+        self.__tone_tick_ms = tick_ms
+        self.__tones = {}
+        if patterns:
+            for name, pattern in patterns.items():
+                self.__tones[name] = self.__compile_tone(pattern)
+
+    def __compile_tone(self, pattern: dict) -> list:
+        """
+        Turn a pattern definition into frequency, duty and length tables.
+
+        Args:
+            pattern (dict): The pattern definition.
+
+        Returns:
+            list: [frequencies (array), duties (array), lengths in ticks (array), loop (bool)].
+        """
+        tick_ms = self.__tone_tick_ms
+        if "sweep" in pattern:
+            low, high, period_ms = pattern["sweep"]
+            half = max(period_ms // tick_ms // 2, 1)
+            up = [low + (high - low) * i // half for i in range(half)]
+            notes = [(freq, tick_ms) for freq in up + [high - (high - low) * i // half for i in range(half)]]
+        else:
+            notes = pattern["notes"]
+        freqs = array('H', (freq for freq, duration in notes))
+        duties = array('H', (self.__duty_u16 if freq else 0 for freq, duration in notes))
+        ticks = array('H', (max(duration // tick_ms, 1) for freq, duration in notes))
+        return [freqs, duties, ticks, pattern.get("loop", False)]
+
+    def play_tone(self, name: str) -> None:
+        """
+        Play a tone pattern on the buzzer, replacing the one playing.
+
+        Args:
+            name (str): The pattern name given to initialize_buzzer.
+        """
+        tone = self.__tones.get(name)
+        if tone is None:
+            print("Unknown tone pattern " + str(name))
+            return
+        self.stop_tone()
+        self.__tone = tone
+        self.__tone_index = 0
+        self.__tone_left = 0
+        self.__tone_timer = Timer(period=self.__tone_tick_ms, mode=Timer.PERIODIC, callback=self._tone_step)
+
+    def stop_tone(self) -> None:
+        """
+        Stop the tone pattern playing and silence the buzzer.
+        """
+        if self.__tone_timer is not None:
+            self.__tone_timer.deinit()
+            self.__tone_timer = None
+            self.__tone = None
+            self.silence_buzzer()
+
+    def is_tone_playing(self) -> bool:
+        """
+        Check if a tone pattern is playing.
+
+        Returns:
+            bool: True if a pattern is playing, False otherwise.
+        """
+        return self.__tone_timer is not None
+
+    def _tone_step(self, t) -> None:
+        """
+        Timer callback that steps the tone pattern. It only indexes the tables and writes the
+        PWM registers, so it allocates nothing.
+        """
+        if self.__tone_left > 0:
+            self.__tone_left -= 1
+            return
+        tone = self.__tone
+        if tone is None:
+            return
+        freqs, duties, ticks, loop = tone
+        index = self.__tone_index
+        if index == len(freqs):
+            if not loop:
+                self.stop_tone()
+                return
+            index = 0
+        freq = freqs[index]
+        if freq:
+            self.__pwm.freq(freq)
+        self.__pwm.duty_u16(duties[index])
+        self.__tone_left = ticks[index] - 1
+        self.__tone_index = index + 1
 
     def set_freq_buzzer(self, freq: int) -> None:
         """
@@ -192,6 +619,9 @@ class Actuators:
             print("It is not possible to set the volume to " + str(volume))
         else:
             self.__duty_u16 = volume
+            for freqs, duties, ticks, loop in self.__tones.values():
+                for i in range(len(freqs)):
+                    duties[i] = volume if freqs[i] else 0
 
     def sound_buzzer(self) -> None:
         """
@@ -210,10 +640,11 @@ class Actuators:
         """
         Deinitialize the Actuators object.
         """
+        self.stop_tone()
         self.silence_buzzer()
+        self.__alarm_activated = False
+        self.stop_rgb_effect()
         self.turn_off_all_rgbleds()
-        if self.__alarm_timer is not None:
-            self.__alarm_timer.deinit()
         self.__pwm.deinit()
         self.__pixelp.deinit()
         
\ No newline at end of file
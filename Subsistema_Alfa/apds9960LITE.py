@@ -15,6 +15,10 @@ from micropython import const
 class I2CEX:
     """micropython i2c adds functions for reading / writing byte to a register 
 
+    Keeps a shadow copy of the configuration registers (0x80 - 0x92, 0x9D - 0xAA) so
+    read-modify-write operations only cost the write. Status, data, FIFO and
+    interrupt clear registers are never cached.
+
     :param i2c: The I2C driver
     :type i2C: machine.i2c
     """
@@ -24,8 +28,50 @@ class I2CEX:
                  address):
         self.__i2c=i2c
         self.__address=address
-        
-    def __regWriteBit(self,reg,bitPos,bitVal):
+        self.__buf=bytearray(1)
+        self.__shadow=bytearray(0x80)  # register 0x80 + i
+        self.__known=bytearray(0x80)   # 1 = shadow holds the register value
+        self.__dirty=bytearray(0x80)   # 1 = changed in a batch, not written yet
+        self.__batch=False
+
+    @staticmethod
+    def _cacheable(reg):
+        """True for the configuration registers kept in the register cache"""
+        return 0x80<=reg<=0x92 or 0x9D<=reg<=0xAA
+
+    def invalidateCache(self):
+        """Forgets the cached register values (e.g. after a device reset)"""
+        for i in range(0x80):
+            self.__known[i]=0
+
+    def beginBatch(self):
+        """Starts collecting register writes in the cache instead of sending them.
+        Non cacheable registers are still written immediately.
+        """
+        self.__batch=True
+
+    def commitBatch(self):
+        """Writes the registers changed since :meth:`beginBatch`. Each run of
+        consecutive registers is sent as one block write, ENABLE (0x80) last.
+        """
+        self.__batch=False
+        dirty=self.__dirty
+        i=1
+        while i<0x80:
+            if dirty[i]:
+                j=i
+                while j<0x80 and dirty[j]:
+                    dirty[j]=0
+                    j+=1
+                self.__i2c.writeto_mem(self.__address,0x80+i,self.__shadow[i:j])
+                i=j
+            else:
+                i+=1
+        if dirty[0]:
+            dirty[0]=0
+            self.__i2c.writeto_mem(self.__address,0x80,self.__shadow[0:1])
+
+    def _regWriteBit(self,reg,bitPos,bitVal):
         """Reads a I2C register byte changes a bit and writes the new value
 
             :param reg: The I2C register that is writen to
@@ -37,16 +83,16 @@ class I2CEX:
             :param value: True = set-bit / False =clear bit
             :type value: bool        
         """
-        val=self.__readByte(reg)   # read reg 
+        val=self._readByte(reg)   # read reg (cached)
         if bitVal == True:
             val=val | (1<<bitPos)  # set bit
         else:
             val=val & ~(1<<bitPos) # clear bit
         
-        self.__writeByte(reg,val) #write reg
+        self._writeByte(reg,val) #write reg
   
     
-    def __writeByte(self,reg,val):
+    def _writeByte(self,reg,val):
         """Writes a I2C byte to the address APDS9960_ADDR (0x39)
 
             :param reg: The I2C register that is writen to
@@ -54,9 +100,18 @@ class I2CEX:
             :param val: The I2C value to write in the range (0- 255)
             :type val: int        
         """
-        self.__i2c.writeto_mem(self.__address,reg,bytes((val,)))
-
-    def __readByte(self,reg):
+        val&=0xff
+        if self._cacheable(reg):
+            i=reg-0x80
+            self.__shadow[i]=val
+            self.__known[i]=1
+            if self.__batch:
+                self.__dirty[i]=1
+                return
+        self.__buf[0]=val
+        self.__i2c.writeto_mem(self.__address,reg,self.__buf)
+
+    def _readByte(self,reg):
         """Reads a I2C byte from the address APDS9960_ADDR (0x39)
 
         :param reg: The I2C register to read
@@ -65,24 +120,49 @@ class I2CEX:
         :returns: a value in the range (0- 255)
         :rtype: int      
         """
+        cacheable=self._cacheable(reg)
+        if cacheable and self.__known[reg-0x80]:
+            return self.__shadow[reg-0x80]
+        self.__i2c.readfrom_mem_into(self.__address,reg,self.__buf)
+        val=self.__buf[0]
+        if cacheable:
+            self.__shadow[reg-0x80]=val
+            self.__known[reg-0x80]=1
+        return val
 
-        val =self.__i2c.readfrom_mem(self.__address,reg, 1)
-        return int.from_bytes(val, 'big', True)
+    def _readInto(self,reg,buf):
+        """Reads len(buf) consecutive I2C registers in a single transaction
 
-    def __write2Byte(self,reg,val):
+        :param reg: The first I2C register to read
+        :type reg: int
+
+        :param buf: Preallocated buffer that receives the register values
+        :type buf: bytearray
+        """
+        self.__i2c.readfrom_mem_into(self.__address,reg,buf)
+
+    def _write2Byte(self,reg,val):
         """Writes a I2C byte to the address APDS9960_ADDR (0x39)
 
             :param reg: The I2C register that is writen to
             :type reg: int
-            :param val: The I2C value to write in the range (0- 255)
+            :param val: The I2C value to write in the range (0- 65535)
             :type val: int        
         """
+        if self.__batch and self._cacheable(reg):
+            self._writeByte(reg,val)
+            self._writeByte(reg+1,val>>8)
+            return
         b = bytearray(2)
         b[0]=val & 0xff
         b[1]=(val>>8) & 0xff
         self.__i2c.writeto_mem(self.__address,reg,b)
+        if self._cacheable(reg):
+            for i in range(2):
+                self.__shadow[reg-0x80+i]=b[i]
+                self.__known[reg-0x80+i]=1
 
-    def __read2Byte(self,reg):
+    def _read2Byte(self,reg):
         """Reads a I2C byte from the address APDS9960_ADDR (0x39)
 
         :param reg: The I2C register to read
@@ -96,15 +176,26 @@ class I2CEX:
    
   
     
-class ALS(I2CEX):
+class ALS:
     """APDS9960 Digital Ambient Light Sense (ALS) and Color Sense (RGBC) functionalities 
     
-    :param i2c: The I2C driver
-    :type i2C: machine.i2c
+    :param i2c: The I2C driver, or the :class:`I2CEX` register interface to share
+    :type i2C: machine.i2c or I2CEX
+
+    After :meth:`readRGBC` the attributes ``clear``, ``red``, ``green``, ``blue``,
+    ``lux`` and ``colorTemperature`` hold the values of the last valid sample.
     """    
     def __init__(self,
                  i2c):
-        super().__init__(i2c,0x39) # initiate I2CEX with APDS9960_ADDR
+        self.__dev=i2c if isinstance(i2c,I2CEX) else I2CEX(i2c,0x39) # APDS9960_ADDR
+        self.__rgbc=bytearray(8)   # CDATAL .. BDATAH
+        self.__luxDiv=0            # ALS integration time * gain / DF, 0 = not read yet
+        self.clear=0
+        self.red=0
+        self.green=0
+        self.blue=0
+        self.lux=0
+        self.colorTemperature=0
 
     def enableSensor(self,on=True):
         """Enable/Disable the Light sensor
@@ -114,7 +205,7 @@ class ALS(I2CEX):
         :type on: bool
         """
         AEN=1  #ALS enable bit 1 (AEN) in reg APDS9960_REG_ENABLE
-        super().__regWriteBit(reg=0x80,bitPos=AEN,bitVal=on)
+        self.__dev._regWriteBit(reg=0x80,bitPos=AEN,bitVal=on)
 
     @property
     def eLightGain(self):
@@ -133,20 +224,65 @@ class ALS(I2CEX):
               3       64x
         """
         #APDS9960_REG_CONTROL = const(0x8f)
-        val=super().__readByte(0x8f)
+        val=self.__dev._readByte(0x8f)
         val= val  & 0b00000011 
         return val
 
     @eLightGain.setter
     def eLightGain(self, eGain):
         #APDS9960_REG_CONTROL = const(0x8f)
-        val=super().__readByte(0x8f)
+        val=self.__dev._readByte(0x8f)
         # set bits in register to given value
         eGain &= 0b00000011
         val &= 0b11111100
         val |= eGain
 
-        super().__writeByte(0x8f,val)
+        self.__dev._writeByte(0x8f,val)
+        self.__luxDiv=0
+
+
+    def readRGBC(self):
+        """Reads the clear, red, green and blue channels (0x94 - 0x9B) with one 8 byte
+        burst so all four come from the same integration cycle, and derives the lux
+        and correlated color temperature with integer math (no allocation).
+        The read is skipped when AVALID in the status register is not set.
+
+        :returns: True if a new sample was read, False if no valid ALS data
+        :rtype: bool
+        """
+        if not self.__dev._readByte(0x93) & 0x01: # STATUS<AVALID>
+            return False
+        b=self.__rgbc
+        self.__dev._readInto(0x94,b)
+        c=b[0] | (b[1]<<8)
+        r=b[2] | (b[3]<<8)
+        g=b[4] | (b[5]<<8)
+        bl=b[6] | (b[7]<<8)
+        self.clear=c
+        self.red=r
+        self.green=g
+        self.blue=bl
+
+        # IR rejection (AMS DN40)
+        ir=(r+g+bl-c)>>1
+        if ir<0:
+            ir=0
+        r-=ir
+        g-=ir
+        bl-=ir
+        if self.__luxDiv==0:
+            self.__updateLuxDiv()
+        lux=(136*r+1000*g-444*bl)//self.__luxDiv
+        self.lux=lux if lux>0 else 0
+        self.colorTemperature=(3810*bl)//r+1391 if r>0 else 0
+        return True
+
+    def __updateLuxDiv(self):
+        """Caches the counts per lux divider from ATIME (0x81) and AGAIN (0x8F<1:0>)"""
+        atime=self.__dev._readByte(0x81)
+        gain=(1,4,16,64)[self.__dev._readByte(0x8f) & 0b00000011]
+        # (integration time in us * gain) / device factor (DF = 412)
+        self.__luxDiv=max(1,((256-atime)*2780*gain)//412)
 
 
     @property
@@ -156,7 +292,7 @@ class ALS(I2CEX):
             :getter: Returns the ambient light level (0 - 1025 ) 
             :type: int     
         """
-        return super().__read2Byte(0x94) #returns CDATAL and CDATAH
+        return self.__dev._read2Byte(0x94) #returns CDATAL and CDATAH
 
     @property
     def redLightLevel(self):
@@ -165,7 +301,7 @@ class ALS(I2CEX):
             :getter: Returns the red light level (0 - 1025 ) 
             :type: int     
         """ 
-        return super().__read2Byte(0x96) #returns RDATAL and RDATAH
+        return self.__dev._read2Byte(0x96) #returns RDATAL and RDATAH
     
     @property
     def greenLightLevel(self):
@@ -174,7 +310,7 @@ class ALS(I2CEX):
             :getter: Returns the green light level (0 - 1025 ) 
             :type: int     
         """       
-        return super().__read2Byte(0x98) #returns GDATAL and GDATAH
+        return self.__dev._read2Byte(0x98) #returns GDATAL and GDATAH
     
     @property
     def blueLightLevel(self):
@@ -183,7 +319,7 @@ class ALS(I2CEX):
             :getter: Returns the blue light level (0 - 1025 ) 
             :type: int     
         """       
-        return super().__read2Byte(0x9A) #returns BDATAL and BDATAH
+        return self.__dev._read2Byte(0x9A) #returns BDATAL and BDATAH
 
     def setInterruptThreshold(self,high=0,low=20,persistance=4):
         """Enable/Disable the proimity sensor
@@ -199,23 +335,23 @@ class ALS(I2CEX):
 
         """
         #ALS low threshold, lower byte
-        super().__write2Byte(0x84, low);  #set ALS low threshold
-        super().__write2Byte(0x86, high); #set ALS low threshold 
+        self.__dev._write2Byte(0x84, low);  #set ALS low threshold
+        self.__dev._write2Byte(0x86, high); #set ALS low threshold 
  
  
         if (persistance>7) :
             persistance=7
 
-        val=super().__readByte(0x8C) #APDS9960_PERS 0x8C<3:0>  Proximity Interrupt Persistence 
+        val=self.__dev._readByte(0x8C) #APDS9960_PERS 0x8C<3:0>  Proximity Interrupt Persistence 
         val=val & 0b11111000          # Clear APERS
         val=val | persistance         # Set   APERS
-        super().__writeByte(0x8C,val) # Update APDS9960_PERS
+        self.__dev._writeByte(0x8C,val) # Update APDS9960_PERS
 
     def clearInterrupt(self):
         """Crears the proimity interrupt
         IRQ HW output goes low (enables triggering of new IRQ)
         """
-        super().__readByte(0xe6)    #All Non-Gesture Interrupt Clear
+        self.__dev._readByte(0xe6)    #All Non-Gesture Interrupt Clear
 
     def enableInterrupt(self,on=True):
         """Enables/Disables IRQ dependent on limits given by setLightInterruptThreshold()
@@ -225,19 +361,19 @@ class ALS(I2CEX):
         """
         #ENABLE<AIEN> 0x80<4> ALS Interrupt Enable
         AIEN=4    #ALS Interrupt Enable bit 4 (AIEN) in reg APDS9960_REG_ENABLE
-        super().__regWriteBit(reg=0x80,bitPos=AIEN,bitVal=on)
+        self.__dev._regWriteBit(reg=0x80,bitPos=AIEN,bitVal=on)
         self.clearInterrupt(); 
 
 
-class PROX(I2CEX):
+class PROX:
     """APDS9960 proximity functons
 
-    :param i2c: The I2C driver
-    :type i2C: machine.i2c
+    :param i2c: The I2C driver, or the :class:`I2CEX` register interface to share
+    :type i2C: machine.i2c or I2CEX
     """    
     def __init__(self,
                  i2c):
-        super().__init__(i2c,0x39) # initiate I2CEX with APDS9960_ADDR
+        self.__dev=i2c if isinstance(i2c,I2CEX) else I2CEX(i2c,0x39) # APDS9960_ADDR
         
     def enableSensor(self,on=True):
         """Enable/Disable the proimity sensor
@@ -248,7 +384,7 @@ class PROX(I2CEX):
         """
          # PEN - bit 2
         PEN=2  #Proximity enable bit 2 (PEN) in reg APDS9960_REG_ENABLE
-        super().__regWriteBit(reg=0x80,bitPos=PEN,bitVal=on)
+        self.__dev._regWriteBit(reg=0x80,bitPos=PEN,bitVal=on)
 
     def setInterruptThreshold(self,high=0,low=20,persistance=4):
         """Enable/Disable the proimity sensor
@@ -263,23 +399,23 @@ class PROX(I2CEX):
         :type persistance: int 
 
         """   
-        super().__writeByte(0x89, low);   #set low proximity threshold APDS9960_PILT
-        super().__writeByte(0x8B, high);  #set high proximity threshold APDS9960_PIHT
+        self.__dev._writeByte(0x89, low);   #set low proximity threshold APDS9960_PILT
+        self.__dev._writeByte(0x8B, high);  #set high proximity threshold APDS9960_PIHT
         
         if (persistance>7) :
             persistance=7
 
-        val=super().__readByte(0x8C) #APDS9960_PERS 0x8C<7:4>  Proximity Interrupt Persistence 
+        val=self.__dev._readByte(0x8C) #APDS9960_PERS 0x8C<7:4>  Proximity Interrupt Persistence 
         val=val & 0b00011111          # Clear PERS
         val=val | (persistance << 4)  # Set   PERS
-        super().__writeByte(0x8C,val) # Update APDS9960_PERS
+        self.__dev._writeByte(0x8C,val) # Update APDS9960_PERS
         
     def clearInterrupt(self):
         """Crears the proimity interrupt
         IRQ HW output goes low (enables triggering of new IRQ)
         """
-        super().__writeByte(0xE7,0) #  APDS9960_AICLEAR clear all interrupts
-        super().__readByte(0xE5)#(APDS9960_PICLEAR)
+        self.__dev._writeByte(0xE7,0) #  APDS9960_AICLEAR clear all interrupts
+        self.__dev._readByte(0xE5)#(APDS9960_PICLEAR)
      
     def enableInterrupt(self,on=True):
         """Enables/Disables IRQ dependent on limits given by setProximityInterruptThreshold()
@@ -288,7 +424,7 @@ class PROX(I2CEX):
         :type on: bool 
         """
         PIEN=5    #Proximity interrupt enable bit 5 (PIEN) in reg APDS9960_REG_ENABLE
-        super().__regWriteBit(reg=0x80,bitPos=PIEN,bitVal=on)
+        self.__dev._regWriteBit(reg=0x80,bitPos=PIEN,bitVal=on)
         self.clearInterrupt(); 
 
     @property
@@ -308,14 +444,14 @@ class PROX(I2CEX):
                   3       8x
         """
         #APDS9960_REG_CONTROL = const(0x8f)
-        val=super().__readByte(0x8f)
+        val=self.__dev._readByte(0x8f)
         val=((val >>2) & 0b00000011) 
         return val
  
     @eProximityGain.setter
     def eProximityGain(self, eGain):
         #APDS9960_REG_CONTROL = const(0x8f)
-        val=super().__readByte(0x8f)
+        val=self.__dev._readByte(0x8f)
         # set bits in register to given value
         eGain &= 0b00000011
         eGain = eGain << 2
@@ -323,7 +459,7 @@ class PROX(I2CEX):
         val |= eGain
 
         #i2c.writeto_mem(APDS9960_ADDR,APDS9960_REG_CONTROL,bytes((val,)))
-        super().__writeByte(0x8f,val)
+        self.__dev._writeByte(0x8f,val)
 
     @property
     def eLEDCurrent(self):
@@ -343,7 +479,7 @@ class PROX(I2CEX):
                 3         12.5 mA
         """
         #APDS9960_REG_CONTROL = const(0x8f)
-        val=super().__readByte(0x8f)
+        val=self.__dev._readByte(0x8f)
         val=val >>6
         return val
   
@@ -351,7 +487,7 @@ class PROX(I2CEX):
     @eLEDCurrent.setter
     def eLEDCurrent(self, eCurent):
         #APDS9960_REG_CONTROL = const(0x8f)
-        val=super().__readByte(0x8f)        
+        val=self.__dev._readByte(0x8f)        
         
         # set bits in register to given value
         eCurent &= 0b00000011
@@ -359,7 +495,7 @@ class PROX(I2CEX):
         val &= 0b00111111
         val |= eCurent
 
-        super().__writeByte(0x8f,val)
+        self.__dev._writeByte(0x8f,val)
 
     @property
     def proximityLevel(self):
@@ -368,9 +504,142 @@ class PROX(I2CEX):
             :getter: Returns the proximity level (0 - 255 ) 
             :type: int     
         """        
-        return super().__readByte(0x9c)
+        return self.__dev._readByte(0x9c)
     
 
+class GESTURE:
+    """APDS9960 gesture engine. The gesture FIFO is drained with block reads and the
+    swipe direction is classified by a constant memory state machine.
+
+    :param i2c: The I2C driver, or the :class:`I2CEX` register interface to share
+    :type i2C: machine.i2c or I2CEX
+    """
+    NONE=0
+    UP=1
+    DOWN=2
+    LEFT=3
+    RIGHT=4
+
+    def __init__(self,
+                 i2c):
+        self.__dev=i2c if isinstance(i2c,I2CEX) else I2CEX(i2c,0x39) # APDS9960_ADDR
+        self.__fifo=bytearray(128)          # 32 datasets x (U, D, L, R)
+        self.__fifoView=memoryview(self.__fifo)
+        self.__threshold=10                 # minimum count of a valid dataset
+        self.__sensitivity=50               # minimum ratio change of a swipe (%)
+        self.__active=False
+        self.__firstUD=0
+        self.__firstLR=0
+        self.__lastUD=0
+        self.__lastLR=0
+
+    def enableSensor(self,on=True):
+        """Enable/Disable the gesture engine. The proximity sensor must be enabled as
+        well, the engine starts when the proximity exceeds the entry threshold.
+
+        :param on: Enables / Disables the gesture engine
+                (Default True)
+        :type on: bool
+        """
+        GEN=6  #Gesture enable bit 6 (GEN) in reg APDS9960_REG_ENABLE
+        self.__dev._regWriteBit(reg=0x80,bitPos=GEN,bitVal=on)
+
+    def setThresholds(self,entry=40,exit=30,fifoLevel=1,exitPersistance=0,threshold=10,sensitivity=50):
+        """Configures when the gesture engine starts / stops and how swipes are classified
+
+        :param entry: proximity level that starts the gesture engine (Range 0 - 255)
+        :type entry: int
+
+        :param exit: level of all photodiodes that stops the gesture engine (Range 0 - 255)
+        :type exit: int
+
+        :param fifoLevel: FIFO datasets before GVALID is set: 0=1, 1=4, 2=8, 3=16
+        :type fifoLevel: int
+
+        :param exitPersistance: consecutive exit datasets before stopping: 0=1, 1=2, 2=4, 3=7
+        :type exitPersistance: int
+
+        :param threshold: minimum count of U, D, L and R for a dataset to be used
+        :type threshold: int
+
+        :param sensitivity: minimum change of the U/D or L/R ratio (%) to report a swipe
+        :type sensitivity: int
+        """
+        self.__dev._writeByte(0xA0,entry)   # GPENTH
+        self.__dev._writeByte(0xA1,exit)    # GEXTH
+        val=self.__dev._readByte(0xA2)      # GCONF1
+        val&=0b00111100                     # keep GEXMSK
+        val|=(fifoLevel & 0b11)<<6          # GFIFOTH
+        val|=exitPersistance & 0b11         # GEXPERS
+        self.__dev._writeByte(0xA2,val)
+        self.__threshold=threshold
+        self.__sensitivity=sensitivity
+
+    def clearFifo(self):
+        """Clears the gesture FIFO and the classifier state"""
+        val=self.__dev._readByte(0xAB)      # GCONF4
+        self.__dev._writeByte(0xAB,val | 0b00000100) # GFIFO_CLR
+        self.__active=False
+
+    def readGesture(self):
+        """Drains the gesture FIFO and feeds the classifier. Does not block, call it
+        periodically or from the gesture interrupt.
+
+        :returns: the swipe detected when a gesture ended (UP, DOWN, LEFT, RIGHT),
+                  otherwise NONE
+        :rtype: int
+        """
+        dev=self.__dev
+        if dev._readByte(0xAF) & 0x01:      # GSTATUS<GVALID>
+            level=dev._readByte(0xAE)       # GFLVL
+            if level>32:
+                level=32
+            if level:
+                n=level*4
+                dev._readInto(0xFC,self.__fifoView[:n]) # GFIFO_U .. GFIFO_R, auto increment
+                self.__feed(n)
+        if self.__active and not dev._readByte(0xAB) & 0x01: # GCONF4<GMODE> exited
+            return self.__classify()
+        return self.NONE
+
+    def __feed(self,n):
+        """Updates the entry / exit ratios with the first n bytes of the FIFO buffer"""
+        f=self.__fifo
+        th=self.__threshold
+        for i in range(0,n,4):
+            u=f[i]
+            d=f[i+1]
+            l=f[i+2]
+            r=f[i+3]
+            if u>th and d>th and l>th and r>th:
+                ud=((u-d)*100)//(u+d)
+                lr=((l-r)*100)//(l+r)
+                if not self.__active:
+                    self.__active=True
+                    self.__firstUD=ud
+                    self.__firstLR=lr
+                self.__lastUD=ud
+                self.__lastLR=lr
+
+    def __classify(self):
+        """Turns the entry / exit ratio change into a direction and resets the state"""
+        self.__active=False
+        deltaUD=self.__lastUD-self.__firstUD
+        deltaLR=self.__lastLR-self.__firstLR
+        sens=self.__sensitivity
+        if abs(deltaUD)>=abs(deltaLR):
+            if deltaUD>=sens:
+                return self.DOWN
+            if deltaUD<=-sens:
+                return self.UP
+        else:
+            if deltaLR>=sens:
+                return self.RIGHT
+            if deltaLR<=-sens:
+                return self.LEFT
+        return self.NONE
+
+
 class APDS9960LITE(I2CEX) :
     """APDS9960LITE low memory driver for ASDS9960  
 
@@ -398,8 +667,10 @@ class APDS9960LITE(I2CEX) :
         self.powerOn(False) # APDS9960_ENABLE PON=0
         sleep(.05)
         self.powerOn(True) # APDS9960_ENABLE PON=1
-        self.prox=PROX(i2c)
-        self.als=ALS(i2c)
+        # prox and als share this register interface and its register cache
+        self.prox=PROX(self)
+        self.als=ALS(self)
+        self.gesture=GESTURE(self)
         
     prox = None
     """Prvides APDS9960 Proximity functions.See class: :class:`.PROX`  
@@ -418,6 +689,57 @@ class APDS9960LITE(I2CEX) :
 
     :type PROX: 
     """
+    gesture = None
+    """Prvides APDS9960 gesture functions.See class: :class:`.GESTURE`  
+
+    :type GESTURE: 
+    """
+    def configure(self,proximity=None,light=None,proxGain=None,lightGain=None,ledCurrent=None,gesture=None):
+        """Applies several settings at once. The register changes are collected in the
+        register cache and written with one block write per run of consecutive
+        registers, ENABLE (0x80) last. Arguments left as None are not changed.
+
+        :param proximity: Enables / Disables the proximity sensor
+        :type proximity: bool
+
+        :param light: Enables / Disables the light sensor
+        :type light: bool
+
+        :param proxGain: Proximity gain (0 - 3), see :attr:`PROX.eProximityGain`
+        :type proxGain: int
+
+        :param lightGain: Light gain (0 - 3), see :attr:`ALS.eLightGain`
+        :type lightGain: int
+
+        :param ledCurrent: LED current (0 - 3), see :attr:`PROX.eLEDCurrent`
+        :type ledCurrent: int
+
+        :param gesture: Enables / Disables the gesture engine
+        :type gesture: bool
+
+        :example:
+          .. code:: python
+
+            apds9960=APDS9960LITE(i2c)
+            apds9960.configure(proximity=True,proxGain=3,ledCurrent=0)
+        """
+        self.beginBatch()
+        try:
+            if ledCurrent is not None:
+                self.prox.eLEDCurrent=ledCurrent
+            if proxGain is not None:
+                self.prox.eProximityGain=proxGain
+            if lightGain is not None:
+                self.als.eLightGain=lightGain
+            if proximity is not None:
+                self.prox.enableSensor(proximity)
+            if light is not None:
+                self.als.enableSensor(light)
+            if gesture is not None:
+                self.gesture.enableSensor(gesture)
+        finally:
+            self.commitBatch()
+
     def powerOn(self,on=True):
         """Enable/Disable the apds9960 sensor
 
@@ -427,7 +749,7 @@ class APDS9960LITE(I2CEX) :
         """
 
         PON=0
-        super().__regWriteBit(reg=0x80,bitPos=PON,bitVal=on)
+        self._regWriteBit(reg=0x80,bitPos=PON,bitVal=on)
 
 
     @property
@@ -454,4 +776,4 @@ class APDS9960LITE(I2CEX) :
  
             :rtype: int      
             """
-            return super().__readByte(0x93)
\ No newline at end of file
+            return self._readByte(0x93)
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""
+Author: Fabio Antonio Valente
+Version: 1.0
+Summary: Helpers shared by the benchmark scripts in this folder.
+
+On a PC the scripts run against the host stand-ins of tests/host.py, so byte and transaction
+counts are exact but times are those of the PC. On the board copy this file next to the firmware
+modules and run a script with mpremote (mpremote cp benchmarks/bench.py : + mpremote run
+benchmarks/bench_dotstar.py) to get the real times.
+"""
+
+import sys
+
+def setup() -> None:
+    """
+    Makes the firmware modules importable. Must be called before importing any of them.
+    """
+    if sys.implementation.name == "micropython":
+        return
+    import os
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path[:0] = [root, os.path.join(root, "tests")]
+    import host
+    host.install()
+
+def time_us(func, repeat: int=20) -> int:
+    """
+    Returns the mean time of a call.
+
+    Args:
+        func (function): The function to time, called without arguments.
+        repeat (int): The number of calls.
+
+    Returns:
+        int: The mean time in microseconds.
+    """
+    from time import ticks_us, ticks_diff
+    start = ticks_us()
+    for _ in range(repeat):
+        func()
+    return ticks_diff(ticks_us(), start) // repeat
+
+def table(title: str, header: tuple, rows: list) -> None:
+    """
+    Prints the results as a table with right aligned columns.
+
+    Args:
+        title (str): The line printed above the table.
+        header (tuple): The column names.
+        rows (list): One tuple of values per row.
+    """
+    widths = [len(str(name)) for name in header]
+    for row in rows:
+        for i, value in enumerate(row):
+            widths[i] = max(widths[i], len(str(value)))
+    print(title)
+    for row in [header] + rows:
+        print("  ".join(" " * (widths[i] - len(str(value))) + str(value) for i, value in enumerate(row)))
+    print()
+
+class CountingSPI:
+    """
+    Wraps an SPI bus and counts the writes, the bytes and the ST7789 windows set through it.
+
+    Attributes:
+        writes (int): The number of write calls.
+        bytes (int): The number of bytes written.
+        windows (int): The number of RAMWR commands, one per window of pixels sent.
+    """
+
+    RAMWR = 0x2C
+
+    def __init__(self, spi, dc=None):
+        """
+        Args:
+            spi (SPI): The bus to forward the writes to, None to only count them.
+            dc (Pin): The data/command pin of the display, None if there is none.
+        """
+        self.__spi = spi
+        self.__dc = dc
+        self.reset()
+
+    def reset(self) -> None:
+        self.writes = 0
+        self.bytes = 0
+        self.windows = 0
+
+    def write(self, buf) -> None:
+        self.writes += 1
+        self.bytes += len(buf)
+        if self.__dc is not None and not self.__dc.value() and buf[0] == self.RAMWR:
+            self.windows += 1
+        if self.__spi is not None:
+            self.__spi.write(buf)
+
+    def deinit(self) -> None:
+        if self.__spi is not None:
+            self.__spi.deinit()
+
+def open_tft(**kwargs):
+    """
+    Creates and initializes a TFTDisplay whose SPI bus is wrapped in a CountingSPI.
+
+    Args:
+        kwargs: The TFTDisplay arguments.
+
+    Returns:
+        tuple: (TFTDisplay, CountingSPI)
+    """
+    from TFTDisplay import TFTDisplay
+    tft = TFTDisplay(**kwargs)
+    spi = CountingSPI(tft._TFTDisplay__spi, tft._TFTDisplay__dc)
+    tft._TFTDisplay__spi = spi
+    tft.initialize_display()
+    spi.reset()
+    return tft, spi
@@ -0,0 +1,76 @@
+"""
+Author: Fabio Antonio Valente
+Version: 1.0
+Summary: Benchmark of the DotStar updates: the SPI frames and bytes of lighting a whole strip
+pixel by pixel with auto_write, inside a begin()/commit() batch and with fill(), and the time
+of fill() and show(), for 5, 60 and 300 pixel strips.
+
+Run with python3 benchmarks/bench_dotstar.py, see bench.py for the board.
+"""
+
+import bench
+bench.setup()
+
+from generic_dotstar import SpiDotStar
+
+SIZES = (5, 60, 300)
+COLOR = (0, 0, 255)
+
+class CountingSPI:
+    """
+    A bus that only counts the frames and bytes written to it, so the driver is timed alone.
+    """
+
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+
+    def write(self, buf):
+        self.frames += 1
+        self.bytes += len(buf)
+
+    def deinit(self):
+        pass
+
+def per_pixel(n: int) -> tuple:
+    spi = CountingSPI()
+    pixels = SpiDotStar(spi, n)
+    spi.frames = spi.bytes = 0
+    for i in range(n):
+        pixels[i] = COLOR
+    return spi.frames, spi.bytes
+
+def batched(n: int) -> tuple:
+    spi = CountingSPI()
+    pixels = SpiDotStar(spi, n)
+    spi.frames = spi.bytes = 0
+    pixels.begin()
+    for i in range(n):
+        pixels[i] = COLOR
+    pixels.commit()
+    return spi.frames, spi.bytes
+
+def filled(n: int) -> tuple:
+    spi = CountingSPI()
+    pixels = SpiDotStar(spi, n)
+    spi.frames = spi.bytes = 0
+    pixels.fill(COLOR)
+    return spi.frames, spi.bytes
+
+def timings(n: int) -> tuple:
+    pixels = SpiDotStar(CountingSPI(), n, auto_write=False)
+    fill_us = bench.time_us(lambda: pixels.fill(COLOR))
+    show_us = bench.time_us(lambda: pixels.show(force=True))
+    pixels.brightness = 0.5
+    scaled_us = bench.time_us(lambda: pixels.show(force=True))
+    return fill_us, show_us, scaled_us
+
+def main() -> None:
+    rows = []
+    for n in SIZES:
+        rows.append((n,) + per_pixel(n) + batched(n) + filled(n) + timings(n))
+    bench.table("DotStar frames and bytes sent to light a strip, and driver times",
+                ("pixels", "per-pixel frames", "bytes", "batch frames", "bytes",
+                 "fill frames", "bytes", "fill us", "show us", "show 50% us"), rows)
+
+main()
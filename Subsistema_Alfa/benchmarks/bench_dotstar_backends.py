@@ -0,0 +1,67 @@
+"""
+Author: Fabio Antonio Valente
+Version: 1.0
+Summary: Benchmark of the DotStar SPI backends: how long show() keeps the CPU busy and how long
+the frame takes to reach the strip with SoftSPI, hardware SPI and hardware SPI with the DMA
+writer, for 5, 60 and 300 pixel strips.
+
+Run on the board, see bench.py. On a PC the buses are stand-ins and the DMA writer is not
+available, so only the driver time is measured.
+"""
+
+import bench
+bench.setup()
+
+from machine import Pin, SPI, SoftSPI
+from time import ticks_us, ticks_diff
+from generic_dotstar import SpiDotStar, Rp2DmaSpiWriter
+
+SIZES = (5, 60, 300)
+# Pins and bus of Actuators
+SCK_PIN, MOSI_PIN, MISO_PIN, SPI_ID = 2, 3, 4, 0
+BAUDRATE = 1000000
+
+def open_bus(backend: str):
+    if backend == "softspi":
+        return SoftSPI(sck=Pin(SCK_PIN), mosi=Pin(MOSI_PIN), miso=Pin(MISO_PIN), baudrate=BAUDRATE)
+    spi = SPI(SPI_ID, baudrate=BAUDRATE, sck=Pin(SCK_PIN), mosi=Pin(MOSI_PIN), miso=Pin(MISO_PIN))
+    if backend == "dma":
+        try:
+            return Rp2DmaSpiWriter(spi, SPI_ID)
+        except NotImplementedError:
+            spi.deinit()
+            return None
+    return spi
+
+def measure(backend: str, n: int) -> tuple:
+    """
+    Returns the CPU time of show() and the time until the frame is sent, in microseconds.
+    """
+    bus = open_bus(backend)
+    if bus is None:
+        return "n/a", "n/a"
+    pixels = SpiDotStar(bus, n, auto_write=False)
+    pixels.fill((0, 0, 0))
+    cpu_us = bench.time_us(lambda: pixels.show(force=True))
+    wait = getattr(bus, "wait", None)
+
+    def frame():
+        pixels.show(force=True)
+        if wait is not None:
+            wait()
+
+    if wait is not None:
+        wait()
+    frame_us = bench.time_us(frame)
+    bus.deinit()
+    return cpu_us, frame_us
+
+def main() -> None:
+    rows = []
+    for n in SIZES:
+        for backend in ("softspi", "spi", "dma"):
+            rows.append((n, backend) + measure(backend, n))
+    bench.table("DotStar show() per SPI backend at " + str(BAUDRATE // 1000) + " kHz",
+                ("pixels", "backend", "show us", "frame sent us"), rows)
+
+main()
@@ -0,0 +1,92 @@
+"""
+Author: Fabio Antonio Valente
+Version: 1.0
+Summary: Benchmark of the I2C bus manager: the time of a register read through the manager
+against a direct machine.I2C read, and how many BME680 transactions a proximity read queued
+from a timer waits for while a BME680 conversion is polled.
+
+Run with python3 benchmarks/bench_i2c.py, see bench.py for the board. On the board it talks to
+the APDS9960 and BME680 on the pins Sensors uses by default.
+"""
+
+import sys
+import bench
+bench.setup()
+
+from machine import I2C, Pin, Timer
+from time import ticks_us, ticks_diff
+from sensors import I2CBusManager, I2C_PRIORITY_HIGH, I2C_PRIORITY_LOW
+
+APDS9960_ADDRESS = 0x39
+APDS9960_PDATA = 0x9C
+BME680_ADDRESS = 0x76
+BME680_STATUS = 0x1D
+# SDA, SCL and bus id of Sensors
+SDA_PIN, SCL_PIN, I2C_ID = 0, 1, 0
+SAMPLES = 20
+
+class Registers:
+    """
+    A device answering every register with zeros, for the host run. The BME680 one stands in
+    for the sampling timer too: it fires in the middle of every fourth status read.
+    """
+
+    def __init__(self, timer=None):
+        self.timer = timer
+        self.reads = 0
+
+    def read(self, register, length):
+        self.reads += 1
+        if self.timer is not None and self.reads % 4 == 0:
+            self.timer(None)
+        return bytes(length)
+
+    def write(self, register, data):
+        pass
+
+def main() -> None:
+    buf = bytearray(1)
+    on_board = sys.implementation.name == "micropython"
+    if not on_board:
+        I2C.devices[APDS9960_ADDRESS] = Registers()
+    i2c = I2C(I2C_ID, scl=Pin(SCL_PIN), sda=Pin(SDA_PIN), freq=400000)
+    direct_us = bench.time_us(lambda: i2c.readfrom_mem_into(APDS9960_ADDRESS, APDS9960_PDATA, buf), 100)
+    del i2c
+
+    bus = I2CBusManager(I2C_ID, SCL_PIN, SDA_PIN)
+    apds = bus.device("apds9960", I2C_PRIORITY_HIGH)
+    bme = bus.device("bme680", I2C_PRIORITY_LOW)
+    managed_us = bench.time_us(lambda: apds.readfrom_mem_into(APDS9960_ADDRESS, APDS9960_PDATA, buf), 100)
+    bench.table("APDS9960 register read", ("direct us", "through the manager us"), [(direct_us, managed_us)])
+
+    # Proximity samples queued by a timer while the main loop polls a BME680 conversion
+    submitted = []
+    waits = []
+
+    def proximity_job():
+        apds.readfrom_mem_into(APDS9960_ADDRESS, APDS9960_PDATA, buf)
+        queued_us, queued_transactions = submitted.pop(0)
+        waits.append((ticks_diff(ticks_us(), queued_us), bme.transactions - queued_transactions))
+
+    def timer(t):
+        submitted.append((ticks_us(), bme.transactions))
+        bus.submit(apds, proximity_job)
+
+    if on_board:
+        sampler = Timer(period=50, mode=Timer.PERIODIC, callback=timer)
+    else:
+        I2C.devices[BME680_ADDRESS] = Registers(timer)
+    start = ticks_us()
+    while len(waits) < SAMPLES:
+        bme.readfrom_mem_into(BME680_ADDRESS, BME680_STATUS, buf)
+        if ticks_diff(ticks_us(), start) > 10000000:
+            break
+    if on_board:
+        sampler.deinit()
+    if waits:
+        rows = [(len(waits), max(w[1] for w in waits), sum(w[0] for w in waits) // len(waits),
+                 max(w[0] for w in waits))]
+        bench.table("Proximity reads queued during a BME680 poll",
+                    ("samples", "max BME680 transactions waited", "mean wait us", "max wait us"), rows)
+
+main()
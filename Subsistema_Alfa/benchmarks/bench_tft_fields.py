@@ -0,0 +1,55 @@
+"""
+Author: Fabio Antonio Valente
+Version: 1.0
+Summary: Benchmark of the TFT value fields: the SPI traffic and time of one main loop refresh of
+the readouts when only the changed characters are redrawn, against redrawing every field.
+
+Run with python3 benchmarks/bench_tft_fields.py, see bench.py for the board.
+"""
+
+import bench
+bench.setup()
+
+from time import ticks_us, ticks_diff
+
+LOOPS = 50
+
+def readings(loop: int) -> tuple:
+    """
+    Slowly drifting readings, as the BME680 gives them from one loop to the next.
+    """
+    return (21.5 + (loop // 5) * 0.01, 45.2 + (loop % 7) * 0.02, 120.3 + (loop % 3) * 0.05, 1013.2)
+
+def run(redraw_all: bool) -> tuple:
+    """
+    Returns the mean writes, bytes, windows and microseconds of a loop.
+    """
+    tft, spi = bench.open_tft()
+    totals = [0, 0, 0, 0]
+    for loop in range(LOOPS + 1):
+        if redraw_all:
+            # forget what the fields show, so every loop draws them whole
+            tft._TFTDisplay__fields.clear()
+        temperature, humidity, gas, pressure = readings(loop)
+        spi.reset()
+        start = ticks_us()
+        tft.show_temperature(temp=temperature)
+        tft.show_humidity(hum=humidity)
+        tft.show_gas(gas=gas)
+        tft.show_pressure(pressure=pressure)
+        tft.show_status_alarm(True)
+        elapsed = ticks_diff(ticks_us(), start)
+        if loop:
+            # the first loop draws everything in both cases
+            totals[0] += spi.writes
+            totals[1] += spi.bytes
+            totals[2] += spi.windows
+            totals[3] += elapsed
+    return tuple(total // LOOPS for total in totals)
+
+def main() -> None:
+    rows = [("whole fields",) + run(True), ("changed characters",) + run(False)]
+    bench.table("TFT readouts, mean per main loop over " + str(LOOPS) + " loops",
+                ("redraw", "writes", "bytes", "windows", "us"), rows)
+
+main()
@@ -0,0 +1,72 @@
+"""
+Author: Fabio Antonio Valente
+Version: 1.0
+Summary: Benchmark of ST7789.line and the polygons: the SPI pixel windows, writes and time of a
+line drawn as runs against the same Bresenham line drawn pixel by pixel, for several lengths
+and slopes, and of an outlined and a filled polygon.
+
+Run with python3 benchmarks/bench_tft_lines.py, see bench.py for the board.
+"""
+
+import bench
+bench.setup()
+
+from time import ticks_us, ticks_diff
+import st7789py as st7789
+
+LENGTHS = (10, 50, 100, 200)
+# (name, dx, dy) per unit of length
+SLOPES = (("horizontal", 1, 0), ("shallow 1/4", 1, 0.25), ("diagonal", 1, 1), ("steep 4", 0.25, 1))
+HEXAGON = ((0, -100), (87, -50), (87, 50), (0, 100), (-87, 50), (-87, -50), (0, -100))
+
+def pixel_line(display, x0, y0, x1, y1, color):
+    """
+    The line as Bresenham drew it before, one pixel() per point.
+    """
+    dx = abs(x1 - x0)
+    dy = -abs(y1 - y0)
+    sx = 1 if x0 < x1 else -1
+    sy = 1 if y0 < y1 else -1
+    error = dx + dy
+    while True:
+        display.pixel(x0, y0, color)
+        if x0 == x1 and y0 == y1:
+            return
+        double = 2 * error
+        if double >= dy:
+            error += dy
+            x0 += sx
+        if double <= dx:
+            error += dx
+            y0 += sy
+
+def measure(spi, draw) -> tuple:
+    spi.reset()
+    start = ticks_us()
+    draw()
+    elapsed = ticks_diff(ticks_us(), start)
+    return spi.windows, spi.writes, elapsed
+
+def main() -> None:
+    tft, spi = bench.open_tft()
+    display = tft._TFTDisplay__display
+    rows = []
+    for length in LENGTHS:
+        for name, dx, dy in SLOPES:
+            x1 = 10 + int(length * dx) - 1 if dx else 10
+            y1 = 10 + int(length * dy) - 1 if dy else 10
+            x1 = min(x1, display.width - 1)
+            y1 = min(y1, display.height - 1)
+            runs = measure(spi, lambda: display.line(10, 10, x1, y1, st7789.WHITE))
+            pixels = measure(spi, lambda: pixel_line(display, 10, 10, x1, y1, st7789.WHITE))
+            rows.append((length, name) + runs + pixels)
+    bench.table("Lines, drawn as runs and pixel by pixel",
+                ("length", "slope", "runs windows", "writes", "us",
+                 "pixels windows", "writes", "us"), rows)
+
+    outline = measure(spi, lambda: display.polygon(HEXAGON, 120, 120, st7789.WHITE))
+    filled = measure(spi, lambda: display.fill_polygon(HEXAGON, 120, 120, st7789.WHITE))
+    bench.table("Hexagon of radius 100", ("drawn as", "windows", "writes", "us"),
+                [("outline",) + outline, ("filled",) + filled])
+
+main()
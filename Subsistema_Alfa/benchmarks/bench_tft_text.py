@@ -0,0 +1,51 @@
+"""
+Author: Fabio Antonio Valente
+Version: 1.0
+Summary: Benchmark of ST7789.text: the SPI writes, pixel windows, bytes and time of drawing the
+TFTDisplay strings as one string, sent through a single window, against drawing them one
+character at a time.
+
+Run with python3 benchmarks/bench_tft_text.py, see bench.py for the board.
+"""
+
+import bench
+bench.setup()
+
+from time import ticks_us, ticks_diff
+import st7789py as st7789
+import TFTDisplay
+
+STRINGS = (
+    (TFTDisplay.font, "23.45 C"),
+    (TFTDisplay.font, "45.20 %"),
+    (TFTDisplay.font, "120.30 kOhm"),
+    (TFTDisplay.font, "1013.20 hPa"),
+    (TFTDisplay.fontA, "ALARM OFF"),
+)
+
+def whole(display, font, text):
+    display.text(font, text, 0, 0, st7789.WHITE, st7789.BLACK)
+
+def per_character(display, font, text):
+    for i, char in enumerate(text):
+        display.text(font, char, i * font.WIDTH, 0, st7789.WHITE, st7789.BLACK)
+
+def measure(display, spi, draw, font, text) -> tuple:
+    spi.reset()
+    start = ticks_us()
+    draw(display, font, text)
+    elapsed = ticks_diff(ticks_us(), start)
+    return spi.writes, spi.windows, spi.bytes, elapsed
+
+def main() -> None:
+    tft, spi = bench.open_tft()
+    display = tft._TFTDisplay__display
+    rows = []
+    for font, text in STRINGS:
+        size = str(font.WIDTH) + "x" + str(font.HEIGHT)
+        rows.append((repr(text), size, "string") + measure(display, spi, whole, font, text))
+        rows.append(("", "", "per character") + measure(display, spi, per_character, font, text))
+    bench.table("ST7789.text of the TFTDisplay strings",
+                ("text", "font", "drawn as", "writes", "windows", "bytes", "us"), rows)
+
+main()
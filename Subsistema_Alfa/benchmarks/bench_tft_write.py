@@ -0,0 +1,67 @@
+"""
+Author: Fabio Antonio Valente
+Version: 1.0
+Summary: Benchmark of the glyph lookup of ST7789.write and write_width with a full Latin-1
+converted true-type font: the one-off cost of indexing the font, write_width through the index
+against the font.MAP.index() scan it replaced, and write.
+
+Run with python3 benchmarks/bench_tft_write.py, see bench.py for the board.
+"""
+
+import bench
+bench.setup()
+
+import st7789py as st7789
+
+STRINGS = ("23.45 C", "Pressao 1013 hPa", "Humidade relativa 45 %", "àéíóúç ÀÉÍÓÚÇ ÿ")
+
+class Latin1Font:
+    """
+    A font laid out like the modules of the true-type font converter, with every printable
+    Latin-1 character, in the MAP order the converter writes them.
+    """
+
+    HEIGHT = 24
+    MAX_WIDTH = 16
+    OFFSET_WIDTH = 3
+
+    def __init__(self):
+        self.MAP = "".join(chr(ch) for ch in range(0x20, 0x7F)) + "".join(chr(ch) for ch in range(0xA0, 0x100))
+        self.WIDTHS = bytes(8 + ch % 9 for ch in range(len(self.MAP)))
+        offsets = bytearray()
+        bit = 0
+        for width in self.WIDTHS:
+            offsets += bytes(((bit >> 16) & 0xFF, (bit >> 8) & 0xFF, bit & 0xFF))
+            bit += width * self.HEIGHT
+        self.OFFSETS = bytes(offsets)
+        self.BITMAPS = bytes((i * 37) & 0xFF for i in range((bit + 7) // 8))
+
+def map_index_width(font, string) -> int:
+    """
+    write_width as it was, scanning font.MAP for every character.
+    """
+    width = 0
+    for character in string:
+        try:
+            width += font.WIDTHS[font.MAP.index(character)]
+        except ValueError:
+            pass
+    return width
+
+def main() -> None:
+    tft, spi = bench.open_tft()
+    display = tft._TFTDisplay__display
+    font = Latin1Font()
+    index_us = bench.time_us(lambda: display._font_index(font), 1)
+    rows = []
+    for text in STRINGS:
+        assert display.write_width(font, text) == map_index_width(font, text)
+        rows.append((repr(text), len(text),
+                     bench.time_us(lambda: display.write_width(font, text), 100),
+                     bench.time_us(lambda: map_index_width(font, text), 100),
+                     bench.time_us(lambda: display.write(font, text, 0, 0, st7789.WHITE, st7789.BLACK), 5)))
+    bench.table("Latin-1 font of " + str(len(font.MAP)) + " characters, indexed once in "
+                + str(index_us) + " us",
+                ("text", "chars", "write_width us", "MAP.index us", "write us"), rows)
+
+main()
@@ -0,0 +1,217 @@
+"""
+Author: Fabio Antonio Valente
+Version: 1.0
+Summary: This file contains the BinaryFont class, a bitmap font read from a binary file on
+flash one page of glyphs at a time, and the converter from the font modules used by st7789py.
+
+File layout, little endian:
+    header   magic b"BFNT", version, width, height, reserved, first, last, glyph count,
+             glyph size in bytes ("<4sBBBBHHHH", 16 bytes)
+    offsets  one uint32 file offset per glyph slot, 0xFFFFFFFF for a glyph left out
+    glyphs   the glyph bitmaps in slot order, laid out like the FONT bytes of the modules
+"""
+
+import struct
+
+try:
+    import mmap
+except ImportError:
+    mmap = None
+
+MAGIC = b"BFNT"
+VERSION = 1
+MISSING = 0xFFFFFFFF
+
+_HEADER = "<4sBBBBHHHH"
+_HEADER_SIZE = 16
+_OFFSET = "<I"
+
+class BinaryFont:
+    """
+    A bitmap font stored in a binary font file. It has the WIDTH, HEIGHT, FIRST and LAST
+    attributes of the font modules, so ST7789.text accepts either.
+
+    Glyphs are read on demand through a small cache of pages of consecutive glyphs, or from
+    a memory map of the file where the port has mmap.
+    """
+
+    def __init__(self, path: str, page_glyphs: int=16, pages: int=4):
+        """
+        Opens a binary font file and reads its header and offset table.
+
+        Args:
+            path (str): The font file.
+            page_glyphs (int): The number of consecutive glyphs read at a time.
+            pages (int): The number of pages kept in RAM.
+
+        Raises:
+            OSError: If the file cannot be opened.
+            ValueError: If the file is not a binary font.
+        """
+        self.__file = open(path, "rb")
+        header = self.__file.read(_HEADER_SIZE)
+        if len(header) != _HEADER_SIZE:
+            self.__file.close()
+            raise ValueError("Not a binary font: " + path)
+        magic, version, width, height, _, first, last, count, glyph_size = struct.unpack(_HEADER, header)
+        if magic != MAGIC or version != VERSION:
+            self.__file.close()
+            raise ValueError("Not a binary font: " + path)
+        self.WIDTH = width
+        self.HEIGHT = height
+        self.FIRST = first
+        self.LAST = last
+        self.__count = count
+        self.__glyph_size = glyph_size
+        self.__offsets = self.__file.read(count * 4)
+        self.__page_glyphs = page_glyphs
+        self.__max_pages = pages
+        # [page number, glyph buffer, file offset of the buffer], least recently used first
+        self.__pages = []
+        self.__map = None
+        if mmap is not None:
+            self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.page_hits = 0
+        self.page_misses = 0
+
+    def __offset(self, slot: int) -> int:
+        """
+        Returns the file offset of a glyph slot, MISSING for a glyph left out.
+        """
+        return struct.unpack_from(_OFFSET, self.__offsets, slot * 4)[0]
+
+    def __load_page(self, page: int) -> list:
+        """
+        Reads a page of glyphs into the cache, reusing the buffer of the least recently used
+        page when the cache is full.
+        """
+        first = page * self.__page_glyphs
+        last = min(first + self.__page_glyphs, self.__count)
+        start = MISSING
+        end = 0
+        for slot in range(first, last):
+            offset = self.__offset(slot)
+            if offset != MISSING:
+                start = min(start, offset)
+                end = max(end, offset + self.__glyph_size)
+        if len(self.__pages) >= self.__max_pages:
+            entry = self.__pages.pop(0)
+        else:
+            entry = [0, bytearray(self.__page_glyphs * self.__glyph_size), 0]
+        entry[0] = page
+        entry[2] = start
+        if start != MISSING:
+            # glyphs of a page are stored one after another
+            self.__file.seek(start)
+            self.__file.readinto(memoryview(entry[1])[:end - start])
+        self.__pages.append(entry)
+        return entry
+
+    def glyph(self, ch: int):
+        """
+        Returns the bitmap of a character.
+
+        The view may point into the page cache, so it is only valid until the next call.
+
+        Args:
+            ch (int): The character code.
+
+        Returns:
+            memoryview: The glyph bitmap, or None if the font does not have the character.
+        """
+        slot = ch - self.FIRST
+        if slot < 0 or slot >= self.__count:
+            return None
+        offset = self.__offset(slot)
+        if offset == MISSING:
+            return None
+        if self.__map is not None:
+            return memoryview(self.__map)[offset:offset + self.__glyph_size]
+        page = slot // self.__page_glyphs
+        entry = None
+        for cached in self.__pages:
+            if cached[0] == page:
+                entry = cached
+                break
+        if entry is None:
+            self.page_misses += 1
+            entry = self.__load_page(page)
+        else:
+            self.page_hits += 1
+            if entry is not self.__pages[-1]:
+                self.__pages.remove(entry)
+                self.__pages.append(entry)
+        start = offset - entry[2]
+        return memoryview(entry[1])[start:start + self.__glyph_size]
+
+    def page_stats(self) -> tuple:
+        """
+        Returns the page cache statistics.
+
+        Returns:
+            tuple: (hits, misses, pages in RAM, bytes of page buffers)
+        """
+        return (self.page_hits, self.page_misses, len(self.__pages),
+                len(self.__pages) * self.__page_glyphs * self.__glyph_size)
+
+    def close(self) -> None:
+        """
+        Closes the font file.
+        """
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
+        self.__file.close()
+
+def convert(font, path: str, chars=None) -> int:
+    """
+    Writes a font module of st7789py as a binary font file.
+
+    Args:
+        font (module): The font module, with WIDTH, HEIGHT, FIRST, LAST and FONT.
+        path (str): The file to write.
+        chars (str): The characters to keep, all of them if None.
+
+    Returns:
+        int: The size of the file in bytes.
+    """
+    glyph_size = font.WIDTH // 8 * font.HEIGHT
+    count = len(font.FONT) // glyph_size
+    keep = None if chars is None else set(ord(char) for char in chars)
+    slots = [keep is None or font.FIRST + slot in keep for slot in range(count)]
+    offset = _HEADER_SIZE + count * 4
+    with open(path, "wb") as f:
+        f.write(struct.pack(_HEADER, MAGIC, VERSION, font.WIDTH, font.HEIGHT, 0,
+                            font.FIRST, font.LAST, count, glyph_size))
+        for kept in slots:
+            f.write(struct.pack(_OFFSET, offset if kept else MISSING))
+            if kept:
+                offset += glyph_size
+        for slot in range(count):
+            if slots[slot]:
+                f.write(font.FONT[slot * glyph_size:(slot + 1) * glyph_size])
+    return offset
+
+def load_font(name: str, page_glyphs: int=16, pages: int=4):
+    """
+    Loads a font from name + ".fnt" if that binary font exists, else imports the font module.
+
+    Args:
+        name (str): The font module name.
+        page_glyphs (int): The number of consecutive glyphs read at a time.
+        pages (int): The number of pages kept in RAM.
+
+    Returns:
+        The BinaryFont or the font module.
+    """
+    try:
+        return BinaryFont(name + ".fnt", page_glyphs, pages)
+    except OSError:
+        return __import__(name)
+
+if __name__ == "__main__":
+    # python3 binfont.py vga2_bold_16x32 [characters to keep]
+    import sys
+    module = __import__(sys.argv[1])
+    size = convert(module, sys.argv[1] + ".fnt", sys.argv[2] if len(sys.argv) > 2 else None)
+    print("Wrote " + sys.argv[1] + ".fnt, " + str(size) + " bytes")
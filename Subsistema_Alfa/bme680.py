@@ -34,6 +34,7 @@ MicroPython driver from BME680 air quality sensor, based on Adafruit_bme680
 
 import time
 import math
+from array import array
 from micropython import const
 from ubinascii import hexlify as hex
 try:
@@ -50,6 +51,7 @@ _BME68X_ENABLE_GAS_MEAS_L = const(0x01)
 _BME68X_ENABLE_GAS_MEAS_H = const(0x02)
 _BME68X_SLEEP_MODE = const(0)
 _BME68X_FORCED_MODE = const(1)
+_BME68X_PARALLEL_MODE = const(2)
 _BME68X_VARIANT_GAS_LOW = const(0x00)
 _BME68X_VARIANT_GAS_HIGH = const(0x01)
 _BME68X_HCTRL_MSK = const(0x08)
@@ -61,6 +63,14 @@ _BME68X_MODE_MSK = const(0x03)
 _BME68X_PERIOD_POLL = const(10000)
 _BME68X_REG_CTRL_GAS_0 = const(0x70)
 _BME68X_REG_CTRL_GAS_1 = const(0x71)
+_BME68X_REG_SHD_HEATR_DUR = const(0x6E)
+_BME68X_MAX_HEATER_STEPS = const(10)
+_BME68X_NEW_DATA_MSK = const(0x80)
+_BME68X_GAS_INDEX_MSK = const(0x0F)
+_BME68X_GASM_VALID_MSK = const(0x20)
+_BME68X_HEAT_STAB_MSK = const(0x10)
+_BME68X_FIELD_LENGTH = const(17)
+_BME68X_N_FIELDS = const(3)
 
 #    I2C ADDRESS/BITS/SETTINGS
 #    -----------------------------------------------------------------------
@@ -172,8 +182,11 @@ class Adafruit_BME680:
 
         self._last_reading = time.ticks_ms()
         self._min_refresh_time = 1000 // refresh_rate
+        self._conversion_time = 0
         
         self._amb_temp = 25  # Copy required parameters from reference bme68x_dev struct
+        self._op_mode = _BME68X_FORCED_MODE
+        self._heater_steps = 1
         self.set_gas_heater(320, 150)  # heater 320 deg C for 150 msec
 
     @property
@@ -185,6 +198,7 @@ class Adafruit_BME680:
     def pressure_oversample(self, sample_rate):
         if sample_rate in _BME680_SAMPLERATES:
             self._pressure_oversample = _BME680_SAMPLERATES.index(sample_rate)
+            self._invalidate_reading()
         else:
             raise RuntimeError("Invalid oversample")
 
@@ -197,6 +211,7 @@ class Adafruit_BME680:
     def humidity_oversample(self, sample_rate):
         if sample_rate in _BME680_SAMPLERATES:
             self._humidity_oversample = _BME680_SAMPLERATES.index(sample_rate)
+            self._invalidate_reading()
         else:
             raise RuntimeError("Invalid oversample")
 
@@ -209,6 +224,7 @@ class Adafruit_BME680:
     def temperature_oversample(self, sample_rate):
         if sample_rate in _BME680_SAMPLERATES:
             self._temp_oversample = _BME680_SAMPLERATES.index(sample_rate)
+            self._invalidate_reading()
         else:
             raise RuntimeError("Invalid oversample")
 
@@ -220,10 +236,28 @@ class Adafruit_BME680:
     @filter_size.setter
     def filter_size(self, size):
         if size in _BME680_FILTERSIZES:
-            self._filter = _BME680_FILTERSIZES[size]
+            self._filter = _BME680_FILTERSIZES.index(size)
+            self._invalidate_reading()
         else:
             raise RuntimeError("Invalid size")
 
+    @property
+    def refresh_rate(self):
+        """Maximum number of readings per second"""
+        return 1000 // self._min_refresh_time
+
+    @refresh_rate.setter
+    def refresh_rate(self, refresh_rate):
+        if refresh_rate > 0:
+            self._min_refresh_time = int(1000 // refresh_rate)
+        else:
+            raise RuntimeError("Invalid refresh rate")
+
+    @property
+    def conversion_time(self):
+        """Duration in milliseconds of the last single-shot conversion, heater included"""
+        return self._conversion_time
+
     @property
     def temperature(self):
         """The compensated temperature in degrees celsius."""
@@ -290,28 +324,38 @@ class Adafruit_BME680:
     def gas(self):
         """The gas resistance in ohms"""
         self._perform_reading()
+        return self._calc_gas_res(self._adc_gas, self._gas_range)
+
+    def _calc_gas_res(self, adc_gas, gas_range):
+        """Convert a raw gas ADC value and range into a resistance in ohms"""
         if self._chip_variant == 0x01:
             # taken from https://github.com/BoschSensortec/BME68x-Sensor-API
-            var1 = 262144 >> self._gas_range
-            var2 = self._adc_gas - 512
+            var1 = 262144 >> gas_range
+            var2 = adc_gas - 512
             var2 *= 3
             var2 = 4096 + var2
             calc_gas_res = (10000 * var1) / var2
             calc_gas_res = calc_gas_res * 100
         else:
-            var1 = ((1340 + (5 * self._sw_err)) * (_LOOKUP_TABLE_1[self._gas_range])) / 65536
-            var2 = ((self._adc_gas * 32768) - 16777216) + var1
-            var3 = (_LOOKUP_TABLE_2[self._gas_range] * var1) / 512
+            var1 = ((1340 + (5 * self._sw_err)) * (_LOOKUP_TABLE_1[gas_range])) / 65536
+            var2 = ((adc_gas * 32768) - 16777216) + var1
+            var3 = (_LOOKUP_TABLE_2[gas_range] * var1) / 512
             calc_gas_res = (var3 + (var2 / 2)) / var2
         return int(calc_gas_res)
     
 
+    def _invalidate_reading(self):
+        """Drop the cached reading, so the next property read runs a conversion with the
+           current oversampling, filter and heater settings"""
+        self._t_fine = None
+
     def _perform_reading(self):
         """Perform a single-shot reading from the sensor and fill internal data structure for
            calculations"""
         expired = time.ticks_diff(self._last_reading, time.ticks_ms()) * time.ticks_diff(0, 1)
-        if 0 <= expired < self._min_refresh_time:
-            time.sleep_ms(self._min_refresh_time - expired)
+        if self._t_fine is not None and 0 <= expired < self._min_refresh_time:
+            # reuse the previous reading
+            return
 
         # set filter
         self._write(_BME680_REG_CONFIG, [self._filter << 2])
@@ -328,6 +372,7 @@ class Adafruit_BME680:
 
         ctrl = self._read_byte(_BME680_REG_CTRL_MEAS)
         ctrl = (ctrl & 0xFC) | 0x01  # enable single shot!
+        start = time.ticks_ms()
         self._write(_BME680_REG_CTRL_MEAS, [ctrl])
         new_data = False
         while not new_data:
@@ -336,6 +381,7 @@ class Adafruit_BME680:
             new_data = data[0] & 0x80 != 0
             time.sleep(0.005)
         self._last_reading = time.ticks_ms()
+        self._conversion_time = time.ticks_diff(self._last_reading, start)
 
         self._adc_pres = _read24(data[2:5]) / 16
         self._adc_temp = _read24(data[5:8]) / 16
@@ -403,21 +449,49 @@ class Adafruit_BME680:
         except OSError:
             return False
         return True
-    
-    
+
+    def set_heater_profile(self, heater_temps, heater_times, shared_time=None) -> bool:
+        """
+        Configure a multi-step heater profile over the 10 heater set-points
+        :param  heater_temps: Sequence of heater temperatures in degrees Centigrade
+        :param  heater_times: Sequence of heater durations. Milliseconds in forced mode,
+                multiples of the shared duration in parallel mode
+        :param  shared_time: Shared heater duration in milliseconds. When given the
+                sensor runs in parallel mode (BME688 only)
+        :return: True on success, False on failure
+        """
+        steps = len(heater_temps)
+        if steps == 0 or steps > _BME68X_MAX_HEATER_STEPS or steps != len(heater_times):
+            raise RuntimeError("Invalid heater profile")
+        op_mode = _BME68X_FORCED_MODE
+        if shared_time is not None:
+            if self._chip_variant != _BME68X_VARIANT_GAS_HIGH:
+                raise RuntimeError("Parallel mode requires a BME688")
+            op_mode = _BME68X_PARALLEL_MODE
+        try:
+            self._set_heatr_conf(heater_temps, heater_times, op_mode=op_mode,
+                                 shared_time=shared_time or 0)
+        except OSError:
+            return False
+        return True
+
     def _set_heatr_conf(
-        self, heater_temp: int, heater_time: int, enable: bool = True
+        self, heater_temp, heater_time, enable: bool = True,
+        op_mode: int = _BME68X_FORCED_MODE, shared_time: int = 0
     ) -> None:
-        # restrict to BME68X_FORCED_MODE
-        op_mode: int = _BME68X_FORCED_MODE
-        nb_conv: int = 0
+        # heater_temp / heater_time are either a single step or a profile
+        if isinstance(heater_temp, int):
+            heater_temp = (heater_temp,)
+            heater_time = (heater_time,)
+        # forced mode selects the step per measurement, parallel mode cycles all of them
+        nb_conv: int = len(heater_temp) if op_mode == _BME68X_PARALLEL_MODE else 0
         hctrl: int = _BME68X_ENABLE_HEATER
         run_gas: int = 0
         ctrl_gas_data_0: int = 0
         ctrl_gas_data_1: int = 0
         try:
             self._set_op_mode(_BME68X_SLEEP_MODE)
-            self._set_conf(heater_temp, heater_time, op_mode)
+            self._set_conf(heater_temp, heater_time, op_mode, shared_time)
             ctrl_gas_data_0 = self._read_byte(_BME68X_REG_CTRL_GAS_0)
             ctrl_gas_data_1 = self._read_byte(_BME68X_REG_CTRL_GAS_1)
             if enable:
@@ -442,11 +516,57 @@ class Adafruit_BME680:
             )
             self._write(_BME68X_REG_CTRL_GAS_0, [ctrl_gas_data_0])
             self._write(_BME68X_REG_CTRL_GAS_1, [ctrl_gas_data_1])
-            # HELP check this
+            self._heater_steps = len(heater_temp)
+            self._op_mode = op_mode
+            self._invalidate_reading()
         finally:
-            self._set_op_mode(_BME68X_FORCED_MODE)
-    
-    
+            self._set_op_mode(op_mode)
+
+    def start_heater_step(self, step: int) -> None:
+        """
+        Trigger a forced mode measurement with heater set-point ``step`` and return
+        without waiting for the conversion. Collect it with ``read_heater_step``.
+        """
+        if self._op_mode != _BME68X_FORCED_MODE or not 0 <= step < self._heater_steps:
+            raise RuntimeError("Invalid heater step")
+        ctrl_gas = bme_set_bits_pos_0(self._read_byte(_BME68X_REG_CTRL_GAS_1),
+                                      _BME68X_NBCONV_MSK, step)
+        self._write(_BME68X_REG_CTRL_GAS_1, [ctrl_gas])
+        self._write(_BME680_REG_CONFIG, [self._filter << 2])
+        self._write(_BME680_REG_CTRL_HUM, [self._humidity_oversample])
+        self._write(_BME680_REG_CTRL_MEAS,
+                    [(self._temp_oversample << 5) | (self._pressure_oversample << 2)
+                     | _BME68X_FORCED_MODE])
+
+    def read_heater_step(self):
+        """
+        Collect the measurement started by ``start_heater_step``
+        :return: Gas resistance in ohms (0 if the heater was not stable),
+                 or None while the conversion is still running
+        """
+        data = self._read(_BME680_REG_MEAS_STATUS, _BME68X_FIELD_LENGTH)
+        if not data[0] & _BME68X_NEW_DATA_MSK:
+            return None
+        return self._field_gas_res(data, 0)
+
+    def read_parallel_fields(self):
+        """
+        Read the three parallel mode data fields in a single transfer
+        :return: bytearray with three 17 byte fields, see ``field_gas_res``
+        """
+        return self._read(_BME680_REG_MEAS_STATUS, _BME68X_FIELD_LENGTH * _BME68X_N_FIELDS)
+
+    def _field_gas_res(self, data, off):
+        """Gas resistance of the data field at ``off`` or 0 if gas is not valid"""
+        if self._chip_variant == _BME68X_VARIANT_GAS_HIGH:
+            msb, lsb = data[off + 15], data[off + 16]
+        else:
+            msb, lsb = data[off + 13], data[off + 14]
+        if (lsb & (_BME68X_GASM_VALID_MSK | _BME68X_HEAT_STAB_MSK)) != \
+                (_BME68X_GASM_VALID_MSK | _BME68X_HEAT_STAB_MSK):
+            return 0
+        return self._calc_gas_res((msb << 2) | (lsb >> 6), lsb & 0x0F)
+
     def _set_op_mode(self, op_mode: int) -> None:
         """
         * @brief This API is used to set the operation mode of the sensor
@@ -464,7 +584,7 @@ class Adafruit_BME680:
                 tmp_pow_mode &= ~_BME68X_MODE_MSK  # Set to sleep
                 self._write(_BME680_REG_CTRL_MEAS, [tmp_pow_mode])
                 # dev->delay_us(_BME68X_PERIOD_POLL, dev->intf_ptr)  # HELP
-                delay_microseconds(_BME68X_PERIOD_POLL)
+                time.sleep_us(_BME68X_PERIOD_POLL)
         # Already in sleep
         if op_mode != _BME68X_SLEEP_MODE:
             tmp_pow_mode = (tmp_pow_mode & ~_BME68X_MODE_MSK) | (
@@ -473,17 +593,22 @@ class Adafruit_BME680:
             self._write(_BME680_REG_CTRL_MEAS, [tmp_pow_mode])
             
             
-    def _set_conf(self, heater_temp: int, heater_time: int, op_mode: int) -> None:
+    def _set_conf(self, heater_temp, heater_time, op_mode: int, shared_time: int = 0) -> None:
         """
         This internal API is used to set heater configurations
         """
 
-        if op_mode != _BME68X_FORCED_MODE:
-            raise OSError("GasHeaterException: _set_conf not forced mode")
-        rh_reg_data: int = self._calc_res_heat(heater_temp)
-        gw_reg_data: int = self._calc_gas_wait(heater_time)
-        self._write(_BME680_BME680_RES_HEAT_0, [rh_reg_data])
-        self._write(_BME680_BME680_GAS_WAIT_0, [gw_reg_data])
+        if op_mode == _BME68X_FORCED_MODE:
+            gas_wait = [self._calc_gas_wait(dur) for dur in heater_time]
+        elif op_mode == _BME68X_PARALLEL_MODE:
+            # in parallel mode the step durations are multiples of the shared duration
+            gas_wait = [min(int(dur), 0xFF) for dur in heater_time]
+            self._write(_BME68X_REG_SHD_HEATR_DUR, [self._calc_heatr_dur_shared(shared_time)])
+        else:
+            raise OSError("GasHeaterException: _set_conf invalid mode")
+        res_heat = [self._calc_res_heat(temp) for temp in heater_temp]
+        self._write(_BME680_BME680_RES_HEAT_0, res_heat)
+        self._write(_BME680_BME680_GAS_WAIT_0, gas_wait)
         
     def _calc_res_heat(self, temp: int) -> int:
         """
@@ -545,6 +670,21 @@ class Adafruit_BME680:
             factor += 1
         durval = int(dur + (factor * 64))
         return durval
+
+    def _calc_heatr_dur_shared(self, dur: int) -> int:
+        """
+        This internal API is used to calculate the shared heater duration of parallel mode
+        """
+        factor: int = 0
+
+        if dur >= 0x783:
+            return 0xFF  # Max duration
+        # Number of 0.477 ms steps
+        dur = int(dur * 1000) // 477
+        while dur > 0x3F:
+            dur = dur >> 2
+            factor += 1
+        return int(dur + (factor * 64))
     
     
 
@@ -641,4 +781,94 @@ class BME680_SPI(Adafruit_BME680):
         spi_mem_page = 0x00
         if register < 0x80:
             spi_mem_page = 0x10
-        self._write(_BME680_REG_PAGE_SELECT, [spi_mem_page])
\ No newline at end of file
+        self._write(_BME680_REG_PAGE_SELECT, [spi_mem_page])
+
+
+class HeaterProfileScheduler:
+    """Cycles a multi-step heater profile without blocking the caller.
+        ``poll()`` never waits for a conversion, so it can be called from the main loop
+        between other work. In forced mode one heater step is converted per trigger:
+        the ``poll()`` that starts a step reads ctrl_gas_1 and writes four registers,
+        the following ones read the 17 byte data field until the step is done. In
+        parallel mode (BME688) the sensor cycles all steps on its own and each
+        ``poll()`` is a single 51 byte read of the three data fields.
+        Normal property reads (``temperature``, ``gas``...) put the sensor back in
+        forced mode with step 0, call ``start()`` again afterwards.
+        :param sensor: Adafruit_BME680 instance
+        :param heater_temps: Sequence of up to 10 heater temperatures in degrees Centigrade
+        :param heater_times: Sequence of heater durations (see ``set_heater_profile``)
+        :param shared_time: Shared heater duration in ms, selects parallel mode"""
+    def __init__(self, sensor, heater_temps, heater_times, shared_time=None):
+        self._sensor = sensor
+        self._temps = heater_temps
+        self._times = heater_times
+        self._shared_time = shared_time
+        self._steps = len(heater_temps)
+        self._gas = array("f", [0.0] * self._steps)
+        self._step = 0
+        self._pending = False
+        self._seen = 0
+        self._last_meas = -1
+        self.start()
+
+    @property
+    def steps(self):
+        """Number of heater steps in the profile"""
+        return self._steps
+
+    def start(self) -> bool:
+        """(Re)load the heater profile into the sensor and restart the scan"""
+        self._step = 0
+        self._pending = False
+        self._seen = 0
+        self._last_meas = -1
+        return self._sensor.set_heater_profile(self._temps, self._times, self._shared_time)
+
+    def poll(self):
+        """Advance the scan
+        :return: array of gas resistances in ohms (one per heater step, 0 where the
+                 heater was not stable) once a full profile has been scanned, else None.
+                 The same array is reused by every scan, copy it to keep the values."""
+        if self._shared_time is None:
+            return self._poll_forced()
+        return self._poll_parallel()
+
+    def _poll_forced(self):
+        sensor = self._sensor
+        if not self._pending:
+            sensor.start_heater_step(self._step)
+            self._pending = True
+            return None
+        res = sensor.read_heater_step()
+        if res is None:
+            return None
+        self._gas[self._step] = res
+        self._pending = False
+        self._step += 1
+        if self._step < self._steps:
+            return None
+        self._step = 0
+        return self._gas
+
+    def _poll_parallel(self):
+        sensor = self._sensor
+        data = sensor.read_parallel_fields()
+        last = self._last_meas
+        for field in range(_BME68X_N_FIELDS):
+            off = field * _BME68X_FIELD_LENGTH
+            status = data[off]
+            meas = data[off + 1]
+            # fields are overwritten round robin, only take each measurement once
+            if not status & _BME68X_NEW_DATA_MSK or \
+                    (last >= 0 and not 0 < ((meas - last) & 0xFF) < 128):
+                continue
+            step = status & _BME68X_GAS_INDEX_MSK
+            if step < self._steps:
+                self._gas[step] = sensor._field_gas_res(data, off)
+                self._seen |= 1 << step
+            if self._last_meas < 0 or 0 < ((meas - self._last_meas) & 0xFF) < 128:
+                self._last_meas = meas
+        if self._seen != (1 << self._steps) - 1:
+            return None
+        self._seen = 0
+        return self._gas
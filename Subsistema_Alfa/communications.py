@@ -36,15 +36,33 @@ class Communication:
     __press_config_payload: dict
     __gas_config_topic: string
     __gas_config_payload: dict
+    __iaq_config_topic: string
+    __iaq_config_payload: dict
     
     __bme680_topic: string
     
+    __profile_config_topic: string
+    __profile_config_payload: dict
+    __profile_command_topic: string
+    __profile_status_topic: string
+    __profile_info_topic: string
+    __bme680_profile: string
+    
+    __gesture_config_topic: string
+    __gesture_config_payload: dict
+    __gesture_topic: string
+    __gestures: tuple
+    
     __rgb_config_topic: string
     __rgb_command_topic: string
     __rgb_status_topic: string
     __rgb_color_command_topic: string
     __rgb_color_status_topic:string
+    __rgb_effect_command_topic: string
+    __rgb_effect_status_topic: string
     __rgb_config_payload: dict
+    __rgb_effects: tuple
+    __rgb_effect: string
     
     __color: Color
     
@@ -81,6 +99,8 @@ class Communication:
         self.__gas_config_payload = config.gas_payload
         self.__press_config_topic = config.topics["config_press"]
         self.__press_config_payload = config.press_payload
+        self.__iaq_config_topic = config.topics["config_iaq"]
+        self.__iaq_config_payload = config.iaq_payload
         
         self.__rgb_config_topic = config.topics["config_rgb"]
         self.__rgb_config_payload = config.rgb_payload
@@ -88,8 +108,22 @@ class Communication:
         self.__rgb_status_topic= config.topics["status_rgb"]
         self.__rgb_color_command_topic = config.topics["command_rgb_color"]
         self.__rgb_color_status_topic= config.topics["status_rgb_color"]
+        self.__rgb_effect_command_topic = config.topics["command_rgb_effect"]
+        self.__rgb_effect_status_topic = config.topics["status_rgb_effect"]
+        self.__rgb_effects = config.rgb_effects
+        self.__rgb_effect = config.rgb_effects[0]
         
         self.__bme680_topic = config.topics["bme680"]
+        self.__profile_config_topic = config.topics["config_profile"]
+        self.__profile_config_payload = config.profile_payload
+        self.__profile_command_topic = config.topics["command_profile"]
+        self.__profile_status_topic = config.topics["status_profile"]
+        self.__profile_info_topic = config.topics["info_profile"]
+        self.__bme680_profile = config.bme680_profile
+        self.__gesture_config_topic = config.topics["config_gesture"]
+        self.__gesture_config_payload = config.gesture_payload
+        self.__gesture_topic = config.topics["gesture"]
+        self.__gestures = config.gestures
         self.__color = Color(255,0,0)
         self.__alarm_armed = self.DISARMED
         self.__rgb_state = self.RGB_OFF
@@ -171,9 +205,13 @@ class Communication:
             sleep(0.25)
             self.__mqtt_client.publish(self.__press_config_topic, json.dumps(self.__press_config_payload))
             sleep(0.25)
+            self.__mqtt_client.publish(self.__iaq_config_topic, json.dumps(self.__iaq_config_payload))
+            sleep(0.25)
+            self.__mqtt_client.publish(self.__profile_config_topic, json.dumps(self.__profile_config_payload))
+            sleep(0.25)
             i+=1
             
-    def send_bme680_data(self, temp, hum, gas, press) -> None:
+    def send_bme680_data(self, temp, hum, gas, press, iaq=None) -> None:
         """
         Publishes the BME680 sensor data to the MQTT broker.
 
@@ -182,15 +220,41 @@ class Communication:
             hum: The humidity value.
             gas: The gas value.
             press: The pressure value.
+            iaq: The indoor air quality index. Published as null while it is None, during the
+                burn-in, so the iaq_payload template finds the key and the sensor shows unknown.
         """
         data = {
             "temperature": temp,
             "humidity": hum,
             "gas": gas,
-            "pressure": press
+            "pressure": press,
+            "iaq": iaq
             }
         self.__mqtt_client.publish(self.__bme680_topic, json.dumps(data))
         
+    def config_gestures(self) -> None:
+        """
+        Configures one Home Assistant device trigger per gesture by publishing the configuration payloads.
+        """
+        i = 0
+        while i < 5:
+            for gesture in self.__gestures:
+                payload = dict(self.__gesture_config_payload)
+                payload["subtype"] = "swipe_" + gesture
+                payload["payload"] = gesture
+                self.__mqtt_client.publish(self.__gesture_config_topic.format(gesture), json.dumps(payload))
+                sleep(0.25)
+            i+=1
+            
+    def send_gesture(self, gesture: str) -> None:
+        """
+        Publishes a detected gesture, firing the matching Home Assistant device trigger.
+
+        Args:
+            gesture: The gesture name ("up", "down", "left" or "right").
+        """
+        self.__mqtt_client.publish(self.__gesture_topic.encode(), gesture.encode())
+        
     def config_actuators(self) -> None:
         """
         Configures the actuators by publishing the configuration payloads to the respective topics.
@@ -213,7 +277,9 @@ class Communication:
         while i < 1:
             self.__mqtt_client.subscribe(self.__rgb_command_topic)
             self.__mqtt_client.subscribe(self.__rgb_color_command_topic)
+            self.__mqtt_client.subscribe(self.__rgb_effect_command_topic)
             self.__mqtt_client.subscribe(self.__alarm_command_topic)
+            self.__mqtt_client.subscribe(self.__profile_command_topic)
             i+=1
     
     def check_new_message(self) -> None:
@@ -243,6 +309,10 @@ class Communication:
             r,g,b = data_received
             self.__color = Color(int(b),int(g),int(r))
             
+        elif topic_clear == self.__rgb_effect_command_topic:
+            if msg_clear in self.__rgb_effects:
+                self.__rgb_effect = msg_clear
+            
         elif topic_clear == self.__alarm_command_topic:
             if msg_clear == "DISARM":
                 self.__alarm_armed = self.DISARMED
@@ -251,6 +321,9 @@ class Communication:
             else:
                 self.__alarm_armed = self.TRIGGERED
                 self.__rgb_state = self.RGB_OFF
+                
+        elif topic_clear == self.__profile_command_topic:
+            self.__bme680_profile = msg_clear
    
     def alarm_status(self) -> int:
         """
@@ -292,6 +365,25 @@ class Communication:
             self.__mqtt_client.publish(self.__rgb_color_status_topic.encode(), msg_color)
             i+=1
     
+    def rgb_effect(self) -> str:
+        """
+        Returns the requested effect of the RGB LED.
+
+        Returns:
+            The effect name, the first of config.rgb_effects for a static color.
+        """
+        return self.__rgb_effect
+
+    def set_rgb_effect(self, effect: str) -> None:
+        """
+        Publishes the effect running on the RGB LED.
+
+        Args:
+            effect: The effect name.
+        """
+        self.__rgb_effect = effect
+        self.__mqtt_client.publish(self.__rgb_effect_status_topic.encode(), effect.encode())
+    
     def set_alarm_status(self, status: int) -> None:
         """
         Sets the status of the alarm.
@@ -316,6 +408,33 @@ class Communication:
             self.__mqtt_client.publish(self.__alarm_status_topic.encode(), msg)
             i+=1
             
+    def bme680_profile(self) -> str:
+        """
+        Returns the requested BME680 sampling profile.
+
+        Returns:
+            The profile name.
+        """
+        return self.__bme680_profile
+    
+    def set_bme680_profile(self, profile: str, conversion_ms: int = None, current_ua: int = None) -> None:
+        """
+        Publishes the applied BME680 sampling profile and its cost.
+
+        Args:
+            profile: The applied profile name.
+            conversion_ms: The measured conversion time in milliseconds.
+            current_ua: The estimated average supply current in microamps.
+        """
+        self.__bme680_profile = profile
+        self.__mqtt_client.publish(self.__profile_status_topic.encode(), profile.encode())
+        if conversion_ms is not None:
+            info = {
+                "conversion_ms": conversion_ms,
+                "current_ua": current_ua
+                }
+            self.__mqtt_client.publish(self.__profile_info_topic.encode(), json.dumps(info))
+            
     def disconnect_mqtt(self) -> None:
         """
         Disconnects from the MQTT broker.
@@ -8,10 +8,21 @@ Attributes:
     topics (dict): The MQTT topics for different sensors and devices.
     alarm_payload (dict): The configuration payload for the alarm control panel.
     rgb_payload (dict): The configuration payload for the RGB light.
+    rgb_effects (tuple): The effects offered by the RGB light, "none" being a static color.
     temp_payload (dict): The configuration payload for the temperature sensor.
     hum_payload (dict): The configuration payload for the humidity sensor.
     gas_payload (dict): The configuration payload for the gas resistance sensor.
     press_payload (dict): The configuration payload for the pressure sensor.
+    iaq_payload (dict): The configuration payload for the indoor air quality index sensor.
+    iaq (dict): The indoor air quality estimator settings.
+    bme680_profiles (dict): The named BME680 sampling profiles.
+    bme680_profile (str): The BME680 sampling profile applied at boot.
+    profile_payload (dict): The configuration payload for the BME680 sampling profile selector.
+    gesture_payload (dict): The configuration payload shared by the gesture device triggers.
+    gestures (tuple): The gestures published as device triggers.
+    proximity (dict): The proximity filter and alarm detection settings.
+    buzzer (dict): The buzzer tone patterns and the pattern played for each alarm state.
+    history_chart (dict): The TFT history chart sample period and, per series, its color and initial scale.
 """
 
 wifi_ssid = 'IoT'
@@ -31,15 +42,24 @@ topics ={
     "config_hum": "homeassistant/sensor/picoHum/config",
     "config_gas": "homeassistant/sensor/picoGas/config",
     "config_press": "homeassistant/sensor/picoPress/config",
+    "config_iaq": "homeassistant/sensor/picoIAQ/config",
+    "config_profile": "homeassistant/select/picoProfile/config",
+    "config_gesture": "homeassistant/device_automation/picoGesture/{}/config",
     "config_rgb": "homeassistant/light/picoRGB/config",
     "config_alarm": "homeassistant/alarm_control_panel/picoAlarm/config",
     "status_rgb": "rgb/pico/status/light",
     "command_rgb": "rgb/pico/command/light",
     "status_rgb_color": "rgb/pico/status/color",
     "command_rgb_color": "rgb/pico/command/color",
+    "status_rgb_effect": "rgb/pico/status/effect",
+    "command_rgb_effect": "rgb/pico/command/effect",
     "status_alarm": "rgb_buzzer/pico/status/alarm",
     "command_alarm": "rgb_buzzer/pico/command/alarm",
-    "bme680": "bme680/pico/status/sensor"
+    "bme680": "bme680/pico/status/sensor",
+    "status_profile": "bme680/pico/status/profile",
+    "command_profile": "bme680/pico/command/profile",
+    "info_profile": "bme680/pico/status/profile_info",
+    "gesture": "apds9960/pico/gesture"
 }
 
 alarm_payload ={
@@ -65,6 +85,8 @@ alarm_payload ={
        ]}
 }
 
+rgb_effects = ("none", "fade", "breathe", "chase", "rainbow", "strobe")
+
 rgb_payload ={
     "device_class":"light",
     "name": "Backyard Light",
@@ -73,6 +95,9 @@ rgb_payload ={
     "rgb_state_topic":topics["status_rgb_color"],
     "rgb_command_topic":topics["command_rgb_color"],
     "rgb_value_template": "{{ value_json.rgb | join(',') }}",
+    "effect_state_topic":topics["status_rgb_effect"],
+    "effect_command_topic":topics["command_rgb_effect"],
+    "effect_list": list(rgb_effects),
     "payload_on": "ON",
     "payload_off": "OFF",
     "state_on": "ON",
@@ -137,3 +162,113 @@ press_payload ={
        ]}
 }
 
+iaq_payload ={
+    "device_class":"aqi",
+    "name": "Backyard Air Quality",
+    "state_topic":topics["bme680"],
+    "value_template":"{{ value_json.iaq}}",
+    "unique_id":"iaq01by",
+    "device":{
+       "identifiers":[
+           "backyard01by"
+       ]}
+}
+
+iaq ={
+    "baseline_file": "iaq_baseline.json",
+    "save_every": 300,
+    "burn_in": 50,
+    "hum_baseline": 40
+}
+
+bme680_profiles ={
+    "ultra-low-power": {
+        "temperature_oversample": 1,
+        "pressure_oversample": 1,
+        "humidity_oversample": 1,
+        "filter_size": 0,
+        "heater_temp": 320,
+        "heater_time": 100,
+        "refresh_rate": 1
+    },
+    "balanced": {
+        "temperature_oversample": 8,
+        "pressure_oversample": 4,
+        "humidity_oversample": 2,
+        "filter_size": 3,
+        "heater_temp": 320,
+        "heater_time": 150,
+        "refresh_rate": 10
+    },
+    "high-accuracy": {
+        "temperature_oversample": 16,
+        "pressure_oversample": 16,
+        "humidity_oversample": 16,
+        "filter_size": 15,
+        "heater_temp": 320,
+        "heater_time": 150,
+        "refresh_rate": 5
+    }
+}
+
+bme680_profile = "balanced"
+
+profile_payload ={
+    "name": "Backyard Sampling Profile",
+    "state_topic":topics["status_profile"],
+    "command_topic":topics["command_profile"],
+    "json_attributes_topic":topics["info_profile"],
+    "options": list(bme680_profiles),
+    "unique_id":"profile01by",
+    "device":{
+       "identifiers":[
+           "backyard01by"
+       ]}
+}
+
+gestures = ("up", "down", "left", "right")
+
+gesture_payload ={
+    "automation_type":"trigger",
+    "topic":topics["gesture"],
+    "type":"action",
+    "device":{
+       "identifiers":[
+           "backyard01by"
+       ]}
+}
+
+proximity ={
+    "window": 5,
+    "mode": "median",
+    "on_threshold": 150,
+    "off_threshold": 100,
+    "dwell_ms": 200,
+    "sample_rate": 20
+}
+
+buzzer ={
+    "tick_ms": 10,
+    "patterns": {
+        "siren": {"sweep": (600, 1400, 1000), "loop": True},
+        "beep": {"notes": ((800, 250), (0, 250)), "loop": True},
+        "arm_chime": {"notes": ((1047, 120), (0, 40), (1319, 120), (0, 40), (1568, 240))},
+        "disarm_chime": {"notes": ((1568, 120), (0, 40), (1319, 120), (0, 40), (1047, 240))},
+        "melody": {"notes": ((1319, 150), (1175, 150), (1047, 150), (1175, 150), (1319, 300), (0, 100), (1319, 300))}
+    },
+    "alarm_patterns": {
+        "armed": "arm_chime",
+        "disarmed": "disarm_chime",
+        "triggered": "siren"
+    }
+}
+
+history_chart ={
+    "period_ms": 10000,
+    "series": (
+        (0xF800, 10, 35),    # temperature, C
+        (0x07FF, 20, 90),    # humidity, %
+        (0xFFE0, 980, 1040), # pressure, hPa
+        (0x07E0, 0, 300)     # gas, kOhm
+    )
+}
@@ -30,10 +30,11 @@
 * Author(s): Damien P. George, Limor Fried & Scott Shawcroft, Robert J Babb
 """
 import time
-from machine import SPI, Pin
+from machine import SPI, Pin, mem32
 
 START_HEADER_SIZE = 4
 LED_START = 0b11100000  # Three "1" bits, followed by 5 brightness bits
+LED_FULL = LED_START | 0b00011111  # Start frame of a pixel at full brightness
 
 # Pixel color order constants
 RGB = (0, 1, 2)
@@ -43,6 +44,49 @@ GBR = (1, 2, 0)
 BRG = (2, 0, 1)
 BGR = (2, 1, 0)
 
+try:
+    import micropython
+
+    @micropython.viper
+    def _scale_viper(src, dst, lut, start: int, end: int):
+        s = ptr8(src)
+        d = ptr8(dst)
+        t = ptr8(lut)
+        i = start
+        while i < end:
+            d[i] = s[i]
+            d[i + 1] = t[s[i + 1]]
+            d[i + 2] = t[s[i + 2]]
+            d[i + 3] = t[s[i + 3]]
+            i += 4
+
+    @micropython.viper
+    def _fill_viper(buf, start: int, end: int):
+        b = ptr8(buf)
+        i = start + 4
+        while i < end:
+            b[i] = b[start]
+            b[i + 1] = b[start + 1]
+            b[i + 2] = b[start + 2]
+            b[i + 3] = b[start + 3]
+            i += 4
+except (ImportError, AttributeError):
+    _scale_viper = None
+    _fill_viper = None
+
+try:
+    import rp2
+    _DMA = rp2.DMA
+except (ImportError, AttributeError):
+    _DMA = None
+
+# RP2040 SSPDR data register address, SSPSR status register address and TX DREQ of each SPI bus
+_RP2_SPI_DR = (0x4003C008, 0x40040008)
+_RP2_SPI_SR = (0x4003C00C, 0x4004000C)
+# SSPSR BSY: set while a frame is shifted out or the TX FIFO is not empty
+_RP2_SPI_SR_BSY = 0x10
+_RP2_SPI_TX_DREQ = (16, 18)
+
 
 class DotStar:
     """
@@ -53,10 +97,15 @@ class DotStar:
     :param int n: The number of dotstars in the chain
     :param float brightness: Brightness of the pixels between 0.0 and 1.0
     :param bool auto_write: True if the dotstars should immediately change when
-        set. If False, `show` must be called explicitly.
+        set. If False, `show` must be called explicitly. Changes made between
+        `begin` and `commit` are always sent as a single frame.
     :param tuple pixel_order: Set the pixel order on the strip - different
          strips implement this differently. If you send red, and it looks blue
          or green on the strip, modify this! It should be one of the values above
+    :param float gamma: Gamma correction applied to every color byte on `show`,
+        e.g. 2.2. None (the default) sends the colors unchanged.
+    :param bool use_viper: Scale and fill the frame with the viper emitter when
+        the port has it. False forces the plain Python loops.
 
 
     Example for ESP32:
@@ -75,7 +124,8 @@ class DotStar:
     """
 
     def __init__(self, clock, data, n, *, brightness=1.0, auto_write=True,
-                 pixel_order=BGR, baudrate=1000000, spi_bus=1, apa102_cmp=False, spip=None):
+                 pixel_order=BGR, baudrate=1000000, spi_bus=1, apa102_cmp=False, spip=None,
+                 gamma=None, use_viper=True):
 
         self._spi = None
         try:
@@ -98,6 +148,8 @@ class DotStar:
         if n % 16 != 0:
             self.end_header_size += 1
         self._buf = bytearray(n * 4 + START_HEADER_SIZE + self.end_header_size)
+        # View of the frame made once, fill() copies through it without allocating one per call
+        self._view = memoryview(self._buf)
         self.end_header_index = len(self._buf) - self.end_header_size
         self.pixel_order = pixel_order
         # Four empty bytes to start.
@@ -109,7 +161,27 @@ class DotStar:
         # 0xff bytes at the end.
         for i in range(self.end_header_index, len(self._buf)):
             self._buf[i] = 0xff
+        # Second output buffer for brightness and gamma, reused on every frame.
+        # The header and end bytes never change, so they are copied only once.
+        self._out = bytearray(self._buf)
+        # Brightness and gamma folded into one 256-entry table, rebuilt only
+        # when either of them changes.
+        self._lut = bytearray(256)
+        self._scaled = False
+        self._gamma = gamma
+        self._scale = _scale_viper if use_viper else None
+        self._fill = _fill_viper if use_viper else None
         self._brightness = 1.0
+        self._batch_depth = 0
+        self._batch_auto_write = auto_write
+        # SPI traffic counters, handy to check how many frames an update costs
+        # and how long the last one kept show() busy.
+        self.frames_sent = 0
+        self.frames_skipped = 0
+        self.bytes_sent = 0
+        self.frame_us = 0
+        # Set whenever the frame changes, so show() can skip identical frames.
+        self._dirty = True
         # Set auto_write to False temporarily so brightness setter does _not_
         # call show() while in __init__.
         self.auto_write = False
@@ -125,7 +197,7 @@ class DotStar:
         for i in range(START_HEADER_SIZE, self.end_header_index):
             if i % 4 != 0:
                 self._buf[i] = 0
-        self.show()
+        self.show(force=True)
         if self._spi:
             self._spi.deinit()
         else:
@@ -138,6 +210,25 @@ class DotStar:
     def __exit__(self, exception_type, exception_value, traceback):
         self.deinit()
 
+    def begin(self):
+        """Start a batch of changes. auto_write is suspended until the matching
+        `commit`, so several pixels can be set for the cost of one frame.
+        Batches may be nested; only the outermost `commit` shows the pixels."""
+        if self._batch_depth == 0:
+            self._batch_auto_write = self.auto_write
+            self.auto_write = False
+        self._batch_depth += 1
+
+    def commit(self):
+        """End a batch started with `begin`. The outermost commit restores
+        auto_write and shows the pixels once."""
+        if self._batch_depth == 0:
+            raise RuntimeError("commit() without begin()")
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            self.auto_write = self._batch_auto_write
+            self.show()
+
     def __repr__(self):
         return "[" + ", ".join([str(x) for x in self]) + "]"
 
@@ -163,27 +254,24 @@ class DotStar:
         if isinstance(value, int):
             rgb = (value >> 16, (value >> 8) & 0xff, value & 0xff)
 
-        if len(rgb) == 4:
-            brightness = value[3]
-            # Ignore value[3] below.
-        else:
-            brightness = 1.0
-
         # LED startframe is three "1" bits, followed by 5 brightness bits
         # then 8 bits for each of R, G, and B. The order of those 3 are configurable and
         # vary based on hardware
-        # same as math.ceil(brightness * 31) & 0b00011111
-        # Idea from https://www.codeproject.com/Tips/700780/Fast-floor-ceiling-functions
-        if type(brightness) is float:
-            if brightness > 1.0 or brightness < 0.0:
-                raise ValueError("brightness must be float between 0.0 and 1.0")
-        elif type(brightness) is int:
-            if brightness > 31 or brightness < 0:
+        if len(rgb) == 4:
+            brightness = value[3]
+            if type(brightness) is float:
+                if brightness > 1.0 or brightness < 0.0:
+                    raise ValueError("brightness must be float between 0.0 and 1.0")
+                # same as math.ceil(brightness * 31) & 0b00011111
+                # Idea from https://www.codeproject.com/Tips/700780/Fast-floor-ceiling-functions
+                brightness = 32 - int(32 - brightness * 31) & 0b00011111
+            elif brightness > 31 or brightness < 0:
                 raise ValueError("brightness must be int between 0 and 31")
-            brightness = brightness / 31  # convert to float
-
-        brightness_byte = 32 - int(32 - brightness * 31) & 0b00011111
-        self._buf[offset] = brightness_byte | LED_START
+            self._buf[offset] = brightness | LED_START
+        else:
+            # No per-pixel brightness, the common case, needs no math at all.
+            self._buf[offset] = LED_FULL
+        self._dirty = True
         self._buf[offset + 1] = rgb[self.pixel_order[0]]
         self._buf[offset + 2] = rgb[self.pixel_order[1]]
         self._buf[offset + 3] = rgb[self.pixel_order[2]]
@@ -265,18 +353,64 @@ class DotStar:
     @brightness.setter
     def brightness(self, brightness):
         self._brightness = min(max(brightness, 0.0), 1.0)
+        self._build_lut()
         if self.auto_write:
             self.show()
 
+    @property
+    def gamma(self):
+        """Gamma correction exponent, or None when disabled"""
+        return self._gamma
+
+    @gamma.setter
+    def gamma(self, gamma):
+        self._gamma = gamma
+        self._build_lut()
+        if self.auto_write:
+            self.show()
+
+    def _build_lut(self):
+        """Fold brightness and gamma into the color lookup table."""
+        brightness = self._brightness
+        gamma = self._gamma
+        lut = self._lut
+        if gamma:
+            for i in range(256):
+                lut[i] = int(255 * (i / 255) ** gamma * brightness)
+        else:
+            for i in range(256):
+                lut[i] = int(i * brightness)
+        self._scaled = brightness < 1.0 or bool(gamma)
+        self._dirty = True
+
+    def _scale_python(self, src, dst, lut, start, end):
+        for i in range(start, end, 4):
+            dst[i] = src[i]
+            dst[i + 1] = lut[src[i + 1]]
+            dst[i + 2] = lut[src[i + 2]]
+            dst[i + 3] = lut[src[i + 3]]
+
     def fill(self, color):
         """Colors all pixels the given ***color***."""
-        auto_write = self.auto_write
-        self.auto_write = False
-        for i in range(self._n):
-            self[i] = color
-        if auto_write:
+        if self._n == 0:
+            return
+        self._set_item(0, color)
+        start = START_HEADER_SIZE
+        if self._fill is not None:
+            # Copy the first pixel over the rest of the strip in place
+            self._fill(self._buf, start, self.end_header_index)
+        else:
+            # Copy the first pixel over the rest of the strip, doubling the copied
+            # run on every pass instead of encoding each pixel again.
+            buf = self._view
+            size = self.end_header_index - start
+            filled = 4
+            while filled < size:
+                run = min(filled, size - filled)
+                buf[start + filled:start + filled + run] = buf[start:start + run]
+                filled += run
+        if self.auto_write:
             self.show()
-        self.auto_write = auto_write
 
     def _ds_writebytes(self, buf):
         for b in buf:
@@ -286,36 +420,96 @@ class DotStar:
                 self.cpin.value = False
                 b = b << 1
 
-    def show(self):
+    def show(self, force=False):
         """Shows the new colors on the pixels themselves if they haven't already
         been autowritten.
 
+        Nothing is sent if no pixel, brightness or gamma changed since the last
+        frame, unless ``force`` is True.
+
         The colors may or may not be showing after this function returns because
         it may be done asynchronously."""
-        # Create a second output buffer if we need to compute brightness
+        if not (self._dirty or force):
+            self.frames_skipped += 1
+            return
+        self._dirty = False
+        # Use the second output buffer if we need to compute brightness or gamma
         buf = self._buf
-        if self.brightness < 1.0:
-            buf = bytearray(self._buf)
-            # Four empty bytes to start.
-            for i in range(START_HEADER_SIZE):
-                buf[i] = 0x00
-            for i in range(START_HEADER_SIZE, self.end_header_index):
-                buf[i] = self._buf[i] if i % 4 == 0 else int(self._buf[i] * self._brightness)
-            # Four 0xff bytes at the end.
-            for i in range(self.end_header_index, len(buf)):
-                buf[i] = 0xff
+        if self._scaled:
+            buf = self._out
+            if self._scale:
+                self._scale(self._buf, buf, self._lut, START_HEADER_SIZE, self.end_header_index)
+            else:
+                self._scale_python(self._buf, buf, self._lut, START_HEADER_SIZE, self.end_header_index)
 
+        start = time.ticks_us()
         if self._spi:
             self._spi.write(buf)
         else:
             self._ds_writebytes(buf)
             self.cpin.value = False
+        self.frame_us = time.ticks_diff(time.ticks_us(), start)
+        self.frames_sent += 1
+        self.bytes_sent += len(buf)
 
     # Added for compatibility with esp8266 apa102
     def write(self):
         self.show()
 
 
+class Rp2DmaSpiWriter:
+    """
+    Non-blocking writer for a hardware SPI bus of the RP2040.
+
+    It has the ``write``/``deinit`` methods of a machine.SPI, so it can be given
+    to `SpiDotStar` in place of the bus. ``write`` copies the frame into its own
+    buffer, starts a DMA transfer into the SPI data register and returns at once.
+    Pixels can be changed while the frame is being sent; the next ``write``
+    waits for the previous transfer to finish.
+
+    :param machine.SPI spi: The initialized hardware SPI bus.
+    :param int spi_id: The id of that bus, 0 or 1.
+    """
+
+    def __init__(self, spi, spi_id):
+        if _DMA is None:
+            raise NotImplementedError("rp2.DMA is not available")
+        self._spi = spi
+        self._dma = _DMA()
+        self._dr = _RP2_SPI_DR[spi_id]
+        self._sr = _RP2_SPI_SR[spi_id]
+        self._ctrl = self._dma.pack_ctrl(size=0, inc_write=False, treq_sel=_RP2_SPI_TX_DREQ[spi_id])
+        self._buf = None
+
+    def busy(self):
+        """True while a frame is still being sent."""
+        return self._dma.active() or bool(mem32[self._sr] & _RP2_SPI_SR_BSY)
+
+    def wait(self):
+        """Block until the current frame has been sent.
+
+        The DMA channel goes idle once it has put the last byte into the TX
+        FIFO, up to 8 bytes before they are on the wire, so the SPI busy flag
+        is waited for as well.
+        """
+        while self._dma.active():
+            pass
+        while mem32[self._sr] & _RP2_SPI_SR_BSY:
+            pass
+
+    def write(self, buf):
+        self.wait()
+        if self._buf is None or len(self._buf) != len(buf):
+            self._buf = bytearray(len(buf))
+        self._buf[:] = buf
+        self._dma.config(read=self._buf, write=self._dr, count=len(buf), ctrl=self._ctrl, trigger=True)
+
+    def deinit(self):
+        self.wait()
+        self._dma.close()
+        self._spi.deinit()
+
+
 class Apa102DotStar(DotStar):
     def __init__(self, clock, data, n, *, brightness=1.0, pixel_order=BGR, baudrate=1000000):
         super().__init__(clock, data, n,  brightness=brightness, pixel_order=pixel_order,
@@ -323,5 +517,6 @@ class Apa102DotStar(DotStar):
 
 
 class SpiDotStar(DotStar):
-    def __init__(self, spix, n, *, brightness=1.0, auto_write=True, pixel_order=BGR):
-        super().__init__(None, None, n, brightness=brightness, auto_write=auto_write, pixel_order=pixel_order, spip=spix)
+    def __init__(self, spix, n, *, brightness=1.0, auto_write=True, pixel_order=BGR, gamma=None, use_viper=True):
+        super().__init__(None, None, n, brightness=brightness, auto_write=auto_write, pixel_order=pixel_order, spip=spix,
+                         gamma=gamma, use_viper=use_viper)
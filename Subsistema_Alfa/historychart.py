@@ -0,0 +1,211 @@
+"""
+Author: Fabio Antonio Valente
+Version: 1.0
+Summary: This file contains the HistoryChart class, a strip chart of the sensor history that
+scrolls with the ST7789 vertical scrolling commands.
+"""
+
+import struct
+from array import array
+from time import ticks_ms, ticks_diff
+
+# Rows of the ST7789 frame memory, the fixed and scrolling areas must add up to it
+PANEL_ROWS = 320
+
+class HistoryChart:
+    """
+    A strip chart of several series over a band of rows of the display.
+
+    The band is the vertical scrolling area of the panel. Each sample draws a single row, one
+    lane per series, into the frame memory row that leaves the top of the band, and the start
+    address is moved one row on so that row reappears at the bottom: the chart scrolls up without
+    being redrawn. The rows above and below the band are fixed, so the value readouts stay in place.
+    The history is kept in a ring buffer to redraw the band after it was covered, or when a value
+    falls outside its scale.
+
+    The panel scrolls along its own rows, so the band is horizontal only with rotation 0.
+    """
+
+    def __init__(self, display, top: int, height: int, series: tuple, period_ms: int=0,
+                 background: int=0, grid: int=0x4208):
+        """
+        Initializes a HistoryChart object.
+
+        Args:
+            display (ST7789): The display.
+            top (int): The first row of the band.
+            height (int): The number of rows of the band, which is also the number of samples shown.
+            series (tuple): (color, low, high) of each series, low and high being the initial scale.
+            period_ms (int): The minimum time between samples, 0 to take every sample.
+            background (int): The 565 encoded background color.
+            grid (int): The 565 encoded color of the lines between the lanes.
+        """
+        self.__display = display
+        self.__top = top
+        self.__height = height
+        self.__period_ms = period_ms
+        self.__colors = [color for color, low, high in series]
+        self.__low = [low for color, low, high in series]
+        self.__high = [high for color, low, high in series]
+        # One sample more than the rows, the oldest row is drawn joined to the sample before it
+        self.__size = height + 1
+        self.__history = [array('f', (0 for _ in range(self.__size))) for _ in series]
+        self.__head = 0
+        self.__count = 0
+        self.__last_ms = None
+        # Frame memory row shown at the top of the band
+        self.__scroll = top
+        self.__stale = True
+        self.__background = background
+        self.__grid = grid
+        self.__lane = display.width // len(series)
+        self.__row = bytearray(display.width * 2)
+        self.__template = None
+        self.__swap = None
+        self.rows_drawn = 0
+        self.redraws = 0
+
+    def __pixel(self, buffer: bytearray, x: int, color: int) -> None:
+        """
+        Stores a 565 color into a row buffer, in the byte order the display expects.
+        """
+        struct.pack_into("<H" if self.__swap else ">H", buffer, x * 2, color)
+
+    def __build_template(self) -> None:
+        """
+        Builds the empty row, the background with the lines between the lanes.
+        """
+        self.__swap = self.__display.needs_swap
+        template = bytearray(len(self.__row))
+        for x in range(self.__display.width):
+            self.__pixel(template, x, self.__background)
+        for lane in range(1, len(self.__colors)):
+            self.__pixel(template, lane * self.__lane - 1, self.__grid)
+        self.__template = template
+
+    def __x(self, lane: int, value: float) -> int:
+        """
+        Returns the column of a value in its lane.
+        """
+        low = self.__low[lane]
+        span = self.__lane - 3
+        position = int((value - low) * span / (self.__high[lane] - low))
+        return lane * self.__lane + 1 + min(max(position, 0), span)
+
+    def __draw_row(self, row: int, index: int, previous: int) -> None:
+        """
+        Draws a sample into a frame memory row of the band. Each series is drawn as a span from
+        the previous sample to this one, so the traces stay connected.
+
+        Args:
+            row (int): The frame memory row.
+            index (int): The ring buffer slot of the sample, -1 for an empty row.
+            previous (int): The ring buffer slot of the previous sample, -1 if there is none.
+        """
+        if self.__swap != self.__display.needs_swap:
+            self.__build_template()
+        buffer = self.__row
+        buffer[:] = self.__template
+        if index >= 0:
+            for lane in range(len(self.__colors)):
+                x = self.__x(lane, self.__history[lane][index])
+                x0 = x
+                if previous >= 0:
+                    x0 = self.__x(lane, self.__history[lane][previous])
+                for column in range(min(x, x0), max(x, x0) + 1):
+                    self.__pixel(buffer, column, self.__colors[lane])
+        self.__display.blit_buffer(buffer, 0, row, self.__display.width, 1)
+        self.rows_drawn += 1
+
+    def __slot(self, age: int) -> int:
+        """
+        Returns the ring buffer slot of the sample taken age samples ago, -1 if there is none.
+        """
+        if age >= self.__count:
+            return -1
+        return (self.__head - 1 - age) % self.__size
+
+    def start(self) -> None:
+        """
+        Defines the scrolling area and draws the band.
+        """
+        top = self.__top
+        self.__display.vscrdef(top, self.__height, PANEL_ROWS - top - self.__height)
+        self.redraw()
+
+    def redraw(self) -> None:
+        """
+        Draws the whole band from the history, oldest sample at the top, and resets the scroll.
+        """
+        display = self.__display
+        display.begin()
+        for i in range(self.__height):
+            age = self.__height - 1 - i
+            self.__draw_row(self.__top + i, self.__slot(age), self.__slot(age + 1))
+        display.flush()
+        self.__scroll = self.__top
+        display.vscsad(self.__scroll)
+        display.end()
+        self.__stale = False
+        self.redraws += 1
+
+    def invalidate(self) -> None:
+        """
+        Marks the band as covered, so the next drawn sample redraws it whole.
+        """
+        self.__stale = True
+
+    def add(self, values: tuple, draw: bool=True) -> bool:
+        """
+        Adds a sample to the history and draws it, unless it comes before period_ms elapsed
+        since the last one.
+
+        Args:
+            values (tuple): One value per series.
+            draw (bool): Whether to draw the sample, False while the band is covered.
+
+        Returns:
+            bool: Whether the sample was taken.
+        """
+        now = ticks_ms()
+        if self.__last_ms is not None and ticks_diff(now, self.__last_ms) < self.__period_ms:
+            return False
+        self.__last_ms = now
+        rescale = False
+        for lane, value in enumerate(values):
+            self.__history[lane][self.__head] = value
+            low = self.__low[lane]
+            high = self.__high[lane]
+            if value < low or value > high:
+                # Widen the scale with some margin, so it does not change with every sample
+                margin = (max(high, value) - min(low, value)) / 10
+                self.__low[lane] = min(low, value - margin)
+                self.__high[lane] = max(high, value + margin)
+                rescale = True
+        self.__head = (self.__head + 1) % self.__size
+        self.__count = min(self.__count + 1, self.__size)
+        if not draw:
+            self.__stale = True
+        elif rescale or self.__stale:
+            self.redraw()
+        else:
+            # The row leaving the top of the band comes back at its bottom with the new sample
+            display = self.__display
+            display.begin()
+            self.__draw_row(self.__scroll, self.__slot(0), self.__slot(1))
+            display.flush()
+            self.__scroll += 1
+            if self.__scroll == self.__top + self.__height:
+                self.__scroll = self.__top
+            display.vscsad(self.__scroll)
+            display.end()
+        return True
+
+    def stats(self) -> tuple:
+        """
+        Returns the number of rows drawn and of whole redraws.
+
+        Returns:
+            tuple: (rows drawn, redraws)
+        """
+        return self.rows_drawn, self.redraws
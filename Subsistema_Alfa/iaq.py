@@ -0,0 +1,161 @@
+"""
+Author: Fabio Antonio Valente
+Version: 1.0
+Summary: This file contains the IAQEstimator class, a streaming indoor air quality index
+computed from the BME680 gas resistance and humidity.
+"""
+
+import json
+
+class IAQEstimator:
+    """
+    Streaming indoor air quality (IAQ) estimator.
+
+    The gas resistance is compared against a clean-air baseline that follows new maxima
+    quickly and decays slowly, and the humidity is scored by its distance to the ideal
+    humidity. Both scores are fused into an index from 0 (excellent) to 500 (very bad).
+    Every update uses integer arithmetic on a fixed set of attributes, so it runs in
+    constant time and memory.
+
+    Attributes:
+        __baseline (int): Clean-air gas resistance baseline in ohms, scaled by 16.
+        __samples (int): Number of samples since the last baseline load.
+        __iaq (int): Last computed index.
+    """
+
+    GAS_WEIGHT = 75
+    HUM_WEIGHT = 25
+    # Top of the BME680 gas resistance range. Scaled by 16 it still fits a small int, so
+    # update never allocates a long int whatever the sensor reports.
+    GAS_MAX_OHMS = 50000000
+
+    def __init__(self, baseline_file: str = 'iaq_baseline.json', save_every: int = 300,
+                 burn_in: int = 50, hum_baseline: int = 40, rise_shift: int = 2, decay_shift: int = 10):
+        """
+        Initializes the estimator and restores the persisted baseline if there is one.
+
+        Args:
+            baseline_file (str): File where the baseline is persisted. Defaults to 'iaq_baseline.json'.
+            save_every (int): Number of samples between baseline saves. Defaults to 300.
+            burn_in (int): Samples needed before the index is reported without a stored baseline. Defaults to 50.
+            hum_baseline (int): Ideal relative humidity in %. Defaults to 40.
+            rise_shift (int): Log2 of the baseline time constant when the gas resistance rises. Defaults to 2.
+            decay_shift (int): Log2 of the baseline time constant when the gas resistance falls. Defaults to 10.
+        """
+        self.__baseline_file = baseline_file
+        self.__save_every = save_every
+        self.__burn_in = burn_in
+        self.__hum_baseline = hum_baseline * 100
+        self.__rise_shift = rise_shift
+        self.__decay_shift = decay_shift
+        self.__baseline = 0
+        self.__samples = 0
+        self.__ready = False
+        self.__iaq = 0
+        self.load_baseline()
+
+    def update(self, gas_ohms: int, humidity: float):
+        """
+        Adds a sample and computes the index.
+
+        Args:
+            gas_ohms (int): Gas resistance in ohms, clamped to 0-GAS_MAX_OHMS.
+            humidity (float): Relative humidity in %.
+
+        Returns:
+            int: The IAQ index (0-500), or None during the burn-in period.
+        """
+        gas_ohms = int(gas_ohms)
+        if gas_ohms > self.GAS_MAX_OHMS:
+            gas_ohms = self.GAS_MAX_OHMS
+        elif gas_ohms < 0:
+            gas_ohms = 0
+        gas = gas_ohms << 4
+        baseline = self.__baseline
+        if baseline == 0:
+            baseline = gas
+        elif gas > baseline:
+            baseline += (gas - baseline) >> self.__rise_shift
+        else:
+            baseline += (gas - baseline) >> self.__decay_shift
+        self.__baseline = baseline
+
+        if gas >= baseline or baseline == 0:
+            gas_score = self.GAS_WEIGHT
+        else:
+            # gas / baseline in 1/128 steps, GAS_WEIGHT * gas would not fit a small int
+            ratio = gas // ((baseline >> 7) or 1)
+            gas_score = self.GAS_WEIGHT * min(ratio, 128) >> 7
+
+        hum = int(humidity * 100)
+        hum_baseline = self.__hum_baseline
+        if hum > hum_baseline:
+            hum_score = self.HUM_WEIGHT * (10000 - hum) // (10000 - hum_baseline)
+        else:
+            hum_score = self.HUM_WEIGHT * hum // hum_baseline
+        if hum_score < 0:
+            hum_score = 0
+
+        self.__iaq = (100 - gas_score - hum_score) * 5
+        self.__samples += 1
+        if self.__samples >= self.__burn_in:
+            self.__ready = True
+        if self.__samples % self.__save_every == 0:
+            self.save_baseline()
+        return self.__iaq if self.__ready else None
+
+    def iaq(self):
+        """
+        Returns the last computed index.
+
+        Returns:
+            int: The IAQ index (0-500), or None during the burn-in period.
+        """
+        return self.__iaq if self.__ready else None
+
+    def baseline(self) -> float:
+        """
+        Returns the clean-air gas resistance baseline.
+
+        Returns:
+            float: The baseline in kilo-ohms.
+        """
+        return (self.__baseline >> 4) / 1000
+
+    def is_ready(self) -> bool:
+        """
+        Checks if the burn-in has finished or a stored baseline was restored.
+
+        Returns:
+            True if the index is reliable, False otherwise.
+        """
+        return self.__ready
+
+    def save_baseline(self) -> None:
+        """
+        Persists the baseline so it survives reboots.
+        """
+        try:
+            with open(self.__baseline_file, 'w') as f:
+                json.dump({"baseline": self.__baseline >> 4}, f)
+        except OSError as e:
+            print('Failed to save IAQ baseline:', e)
+
+    def load_baseline(self) -> bool:
+        """
+        Restores the persisted baseline.
+
+        Returns:
+            True if a baseline was restored, False otherwise.
+        """
+        try:
+            with open(self.__baseline_file) as f:
+                baseline = int(json.load(f)["baseline"])
+        except (OSError, ValueError, KeyError):
+            return False
+        if baseline <= 0:
+            return False
+        baseline = min(baseline, self.GAS_MAX_OHMS)
+        self.__baseline = baseline << 4
+        self.__ready = True
+        return True
@@ -0,0 +1,117 @@
+"""
+Author: Fabio Antonio Valente
+Version: 1.0
+Summary: This file contains the ProximityFilter class, which turns the APDS9960 proximity level
+into a filtered detection. It does not use the machine module, so it also runs on a PC.
+"""
+
+from time import ticks_diff
+
+class ProximityFilter:
+    """
+    Filters the APDS9960 proximity level and turns it into a detection with hysteresis.
+
+    The samples go into a fixed ring buffer. The running mean keeps a running sum and
+    the running median keeps a sorted copy of the window, so no memory is allocated per
+    sample. The detection switches on when the filtered level stays at or above
+    on_threshold for dwell_ms, and off when it stays at or below off_threshold for dwell_ms.
+    Timestamps are passed in, so recorded traces can be replayed through update().
+    """
+
+    MEAN = "mean"
+    MEDIAN = "median"
+
+    def __init__(self, window: int = 5, mode: str = MEDIAN, on_threshold: int = 150,
+                 off_threshold: int = 100, dwell_ms: int = 200):
+        """
+        Initializes a ProximityFilter object.
+
+        Args:
+            window (int): The number of samples in the ring buffer. Defaults to 5.
+            mode (str): The filter, ProximityFilter.MEDIAN or ProximityFilter.MEAN. Defaults to MEDIAN.
+            on_threshold (int): The filtered level that switches the detection on. Defaults to 150.
+            off_threshold (int): The filtered level that switches the detection off. Defaults to 100.
+            dwell_ms (int): How long a threshold must be crossed before the detection changes. Defaults to 200.
+        """
+        if off_threshold > on_threshold:
+            raise ValueError("off_threshold must not be above on_threshold")
+        self.__window = window
+        self.__median = mode == self.MEDIAN
+        self.__on_threshold = on_threshold
+        self.__off_threshold = off_threshold
+        self.__dwell_ms = dwell_ms
+        self.__ring = bytearray(window)
+        self.__sorted = bytearray(window)
+        self.__index = 0
+        self.__sum = 0
+        self.__value = 0
+        self.__detected = False
+        self.__pending = False
+        self.__since = 0
+
+    def update(self, sample: int, now_ms: int) -> bool:
+        """
+        Adds a sample.
+
+        Args:
+            sample (int): The raw proximity level (0-255).
+            now_ms (int): The sample time in milliseconds (time.ticks_ms()).
+
+        Returns:
+            bool: True while an object is detected.
+        """
+        sample = 0 if sample < 0 else 255 if sample > 255 else sample
+        n = self.__window
+        ring = self.__ring
+        old = ring[self.__index]
+        ring[self.__index] = sample
+        self.__index = (self.__index + 1) % n
+        self.__sum += sample - old
+
+        # replace old by sample in the sorted window
+        srt = self.__sorted
+        i = 0
+        while srt[i] != old:
+            i += 1
+        while i < n - 1 and srt[i + 1] < sample:
+            srt[i] = srt[i + 1]
+            i += 1
+        while i > 0 and srt[i - 1] > sample:
+            srt[i] = srt[i - 1]
+            i -= 1
+        srt[i] = sample
+
+        value = srt[n // 2] if self.__median else self.__sum // n
+        self.__value = value
+
+        if self.__detected:
+            crossing = value <= self.__off_threshold
+        else:
+            crossing = value >= self.__on_threshold
+        if not crossing:
+            self.__pending = False
+        elif not self.__pending:
+            self.__pending = True
+            self.__since = now_ms
+        if self.__pending and ticks_diff(now_ms, self.__since) >= self.__dwell_ms:
+            self.__detected = not self.__detected
+            self.__pending = False
+        return self.__detected
+
+    def value(self) -> int:
+        """
+        Returns the filtered proximity level.
+
+        Returns:
+            int: The running median or mean of the window.
+        """
+        return self.__value
+
+    def detected(self) -> bool:
+        """
+        Returns the detection state.
+
+        Returns:
+            bool: True while an object is detected.
+        """
+        return self.__detected
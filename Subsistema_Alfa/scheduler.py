@@ -0,0 +1,112 @@
+"""
+Author: Fabio Antonio Valente
+Version: 1.0
+Summary: This file contains the Scheduler class, a cooperative scheduler for periodic tasks
+run from the main loop.
+"""
+
+from time import ticks_ms, ticks_add, ticks_diff
+
+class Task:
+    """
+    A periodic task of the Scheduler.
+
+    Attributes:
+        name (str): The task name used in the statistics.
+        period_ms (int): The time between runs in milliseconds.
+        runs (int): The number of runs.
+        max_late_ms (int): The worst delay between the due time and the actual run, the jitter.
+        missed (int): The number of whole periods skipped because the loop was busy.
+        active (bool): False once the task was removed.
+    """
+
+    def __init__(self, name: str, callback, period_ms: int, due: int):
+        """
+        Initializes a Task object.
+
+        Args:
+            name (str): The task name.
+            callback: A callable without arguments.
+            period_ms (int): The time between runs in milliseconds.
+            due (int): The ticks_ms value of the first run.
+        """
+        self.name = name
+        self.callback = callback
+        self.period_ms = period_ms
+        self.due = due
+        self.runs = 0
+        self.max_late_ms = 0
+        self.missed = 0
+        self.active = True
+
+class Scheduler:
+    """
+    Runs periodic tasks from the main loop, so they never interrupt the code that owns a bus.
+
+    Tasks keep their cadence: the next run is due one period after the previous due time,
+    not after the actual run. A task more than a period late runs once and skips the
+    periods it missed.
+    """
+
+    def __init__(self):
+        """
+        Initializes a Scheduler object.
+        """
+        self.__tasks = []
+
+    def add(self, name: str, callback, period_ms: int) -> Task:
+        """
+        Adds a periodic task. Its first run is due one period from now.
+
+        Args:
+            name (str): The task name.
+            callback: A callable without arguments.
+            period_ms (int): The time between runs in milliseconds.
+
+        Returns:
+            Task: The added task.
+        """
+        task = Task(name, callback, period_ms, ticks_add(ticks_ms(), period_ms))
+        self.__tasks.append(task)
+        return task
+
+    def remove(self, task: Task) -> None:
+        """
+        Removes a task. A task may remove itself, or another one, while it runs.
+
+        Args:
+            task (Task): The task returned by add.
+        """
+        task.active = False
+        # a new list, so a run_pending in progress keeps walking the old one
+        self.__tasks = [other for other in self.__tasks if other is not task]
+
+    def run_pending(self) -> None:
+        """
+        Runs every task that is due. Call it often from the main loop.
+        """
+        for task in self.__tasks:
+            if not task.active:
+                continue
+            now = ticks_ms()
+            late = ticks_diff(now, task.due)
+            if late < 0:
+                continue
+            if late > task.max_late_ms:
+                task.max_late_ms = late
+            if late >= task.period_ms:
+                task.missed += late // task.period_ms
+                task.due = ticks_add(now, task.period_ms)
+            else:
+                task.due = ticks_add(task.due, task.period_ms)
+            task.runs += 1
+            task.callback()
+
+    def stats(self) -> dict:
+        """
+        Returns the statistics of every task.
+
+        Returns:
+            dict: Task name to (runs, max_late_ms, missed).
+        """
+        return {task.name: (task.runs, task.max_late_ms, task.missed) for task in self.__tasks}
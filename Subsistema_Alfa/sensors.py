@@ -1,6 +1,8 @@
 from machine import Pin, I2C
+from time import ticks_ms, ticks_us, ticks_diff, sleep_ms
 from bme680 import BME680_I2C
 from apds9960LITE import APDS9960LITE
+from proximity import ProximityFilter
 """
 Author: Fabio Antonio Valente
 Version: 1.0
@@ -21,17 +23,220 @@ APDS9960_LED_DRIVE_50MA   = const(1)
 APDS9960_LED_DRIVE_25MA   = const(2)
 APDS9960_LED_DRIVE_12_5MA = const(3)
 
+# Gesture names reported by read_gesture, indexed by GESTURE direction
+GESTURE_NAMES = (None, "up", "down", "left", "right")
+
+# I2C transaction priorities, lower is more urgent
+I2C_PRIORITY_HIGH = const(0)
+I2C_PRIORITY_LOW = const(1)
+
+_I2C_READ_INTO = const(0)
+_I2C_READ = const(1)
+_I2C_WRITE = const(2)
+
+# BME680 typical supply currents (datasheet), in uA
+BME680_SLEEP_CURRENT_UA = const(1)
+BME680_MEAS_CURRENT_UA = const(350)
+BME680_HEATER_CURRENT_UA = const(12000)
+
+class I2CDevice:
+    """
+    A machine.I2C compatible view of one device on an I2CBusManager. Drivers use it in
+    place of the I2C object, so every transaction goes through the manager.
+
+    Attributes:
+        name (str): The device name used in the statistics.
+        priority (int): I2C_PRIORITY_HIGH or I2C_PRIORITY_LOW.
+        transactions (int): The number of completed transactions.
+        errors (int): The number of failed attempts.
+        retries (int): The number of retried attempts.
+        total_us (int): The accumulated transaction time in microseconds.
+        max_us (int): The slowest transaction in microseconds.
+    """
+
+    def __init__(self, bus, name: str, priority: int):
+        """
+        Initializes an I2CDevice object.
+
+        Args:
+            bus (I2CBusManager): The bus manager the device is attached to.
+            name (str): The device name.
+            priority (int): I2C_PRIORITY_HIGH or I2C_PRIORITY_LOW.
+        """
+        self.__bus = bus
+        self.name = name
+        self.priority = priority
+        self.transactions = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def readfrom_mem_into(self, addr: int, memaddr: int, buf) -> None:
+        self.__bus.transfer(self, _I2C_READ_INTO, addr, memaddr, buf)
+
+    def readfrom_mem(self, addr: int, memaddr: int, nbytes: int) -> bytes:
+        return self.__bus.transfer(self, _I2C_READ, addr, memaddr, nbytes)
+
+    def writeto_mem(self, addr: int, memaddr: int, buf) -> None:
+        self.__bus.transfer(self, _I2C_WRITE, addr, memaddr, buf)
+
+    def stats(self) -> tuple:
+        """
+        Returns the device statistics.
+
+        Returns:
+            A tuple with the transactions, errors, retries, mean and max latency in microseconds.
+        """
+        mean_us = self.total_us // self.transactions if self.transactions else 0
+        return self.transactions, self.errors, self.retries, mean_us, self.max_us
+
+class I2CBusManager:
+    """
+    Owns the I2C bus shared by the sensors.
+
+    Every transaction is retried with exponential backoff on OSError and timed per device.
+    Jobs wait in a queue per priority and only run from the main loop: from service(), and
+    before the next transaction of any lower priority device, so a slow BME680 conversion poll
+    never delays a queued proximity read by more than one transaction. A job therefore never
+    runs in the middle of an operation of its own driver, whose buffers it shares, and the
+    retry backoff never sleeps in a timer callback.
+    """
+
+    QUEUE_SIZE = 8
+
+    def __init__(self, id_i2c: int, sclPin: int, sdaPin: int, freq: int = 400000,
+                 retries: int = 2, backoff_ms: int = 1):
+        """
+        Initializes an I2CBusManager object.
+
+        Args:
+            id_i2c (int): The ID of the I2C bus.
+            sclPin (int): The pin number for the SCL line.
+            sdaPin (int): The pin number for the SDA line.
+            freq (int): The bus frequency in Hz. Defaults to 400000.
+            retries (int): Retries after a failed transaction. Defaults to 2.
+            backoff_ms (int): Wait before the first retry, doubled on every retry. Defaults to 1.
+        """
+        self.__i2c = I2C(id_i2c, scl=Pin(sclPin), sda=Pin(sdaPin), freq=freq)
+        self.__retries = retries
+        self.__backoff_ms = backoff_ms
+        self.__devices = []
+        self.__queues = ([], [])
+        self.__busy = False
+
+    def device(self, name: str, priority: int = I2C_PRIORITY_LOW) -> I2CDevice:
+        """
+        Attaches a device to the bus.
+
+        Args:
+            name (str): The device name.
+            priority (int): I2C_PRIORITY_HIGH or I2C_PRIORITY_LOW. Defaults to I2C_PRIORITY_LOW.
+
+        Returns:
+            I2CDevice: The machine.I2C compatible object to give to the driver.
+        """
+        device = I2CDevice(self, name, priority)
+        self.__devices.append(device)
+        return device
+
+    def submit(self, device: I2CDevice, job) -> bool:
+        """
+        Queues a job that uses the bus. It does not run it, so it can be called from a timer
+        callback; the job runs later from the main loop, see service().
+
+        Args:
+            device (I2CDevice): The device the job talks to, which sets its priority.
+            job: A callable without arguments.
+
+        Returns:
+            False if the queue of that priority is full and the job was dropped, True otherwise.
+        """
+        queue = self.__queues[device.priority]
+        if len(queue) >= self.QUEUE_SIZE:
+            device.errors += 1
+            return False
+        queue.append(job)
+        return True
+
+    def service(self, priority: int = I2C_PRIORITY_LOW) -> None:
+        """
+        Runs the queued jobs with the given priority or more urgent, most urgent first.
+        Call it from the main loop, between driver operations, never from a timer callback.
+
+        Args:
+            priority (int): The least urgent priority to run. Defaults to I2C_PRIORITY_LOW (all).
+        """
+        if self.__busy:
+            return
+        self.__busy = True
+        try:
+            for level in range(priority + 1):
+                queue = self.__queues[level]
+                while queue:
+                    job = queue.pop(0)
+                    try:
+                        job()
+                    except OSError:
+                        pass
+        finally:
+            self.__busy = False
+
+    def transfer(self, device: I2CDevice, op: int, addr: int, memaddr: int, buf):
+        """
+        Runs one transaction for a device, after any queued job that is more urgent. Those
+        jobs belong to other drivers than the one running this transaction, so they cannot
+        land between two steps of its operation.
+        """
+        if device.priority > I2C_PRIORITY_HIGH:
+            self.service(device.priority - 1)
+        attempt = 0
+        backoff = self.__backoff_ms
+        while True:
+            start = ticks_us()
+            try:
+                if op == _I2C_READ_INTO:
+                    result = self.__i2c.readfrom_mem_into(addr, memaddr, buf)
+                elif op == _I2C_READ:
+                    result = self.__i2c.readfrom_mem(addr, memaddr, buf)
+                else:
+                    result = self.__i2c.writeto_mem(addr, memaddr, buf)
+            except OSError:
+                device.errors += 1
+                if attempt >= self.__retries:
+                    raise
+                attempt += 1
+                device.retries += 1
+                sleep_ms(backoff)
+                backoff *= 2
+                continue
+            elapsed = ticks_diff(ticks_us(), start)
+            device.transactions += 1
+            device.total_us += elapsed
+            if elapsed > device.max_us:
+                device.max_us = elapsed
+            return result
+
+    def stats(self) -> dict:
+        """
+        Returns the statistics of every device.
+
+        Returns:
+            dict: Device name to (transactions, errors, retries, mean_us, max_us).
+        """
+        return {device.name: device.stats() for device in self.__devices}
+
 class Sensors:
     """
     A class that represents a collection of sensors.
 
     Attributes:
-        __i2c (I2C): The I2C bus object used for communication with the sensors.
+        __bus (I2CBusManager): The manager of the I2C bus shared by the sensors.
         __apds9960 (APDS9960LITE): The APDS9960 proximity sensor object.
         __bme (BME680_I2C): The BME680 environmental sensor object.
     """
 
-    def __init__(self, sdaPin: int = 0, sclPin: int = 1, id_i2c: int = 0):
+    def __init__(self, sdaPin: int = 0, sclPin: int = 1, id_i2c: int = 0, freq: int = 400000):
         """
         Initializes a Sensors object.
 
@@ -39,8 +244,12 @@ class Sensors:
             sdaPin (int): The pin number for the SDA line of the I2C bus. Defaults to 0.
             sclPin (int): The pin number for the SCL line of the I2C bus. Defaults to 1.
             id_i2c (int): The ID of the I2C bus. Defaults to 0.
+            freq (int): The I2C bus frequency in Hz. Defaults to 400000.
         """
-        self.__i2c = I2C(id_i2c, scl=Pin(sclPin), sda=Pin(sdaPin))
+        self.__bus = I2CBusManager(id_i2c, sclPin, sdaPin, freq)
+        self.__prox_filter = None
+        self.__prox_task = None
+        self.__scheduler = None
 
     def initialize_apds9960(self, ledCurrent: int = APDS9960_LED_DRIVE_100MA, proxGain: int = APDS9960_PGAIN_8X) -> None:
         """
@@ -50,17 +259,156 @@ class Sensors:
             ledCurrent (int): The LED drive current. Defaults to APDS9960_LED_DRIVE_100MA.
             proxGain (int): The proximity gain. Defaults to APDS9960_PGAIN_8X.
         """
-        self.__apds9960 = APDS9960LITE(self.__i2c)
-        self.__apds9960.prox.eLEDCurrent = ledCurrent
-        self.__apds9960.prox.eProximityGain = proxGain
-        self.__apds9960.prox.enableSensor()
+        self.__apds9960_dev = self.__bus.device("apds9960", I2C_PRIORITY_HIGH)
+        self.__apds9960 = APDS9960LITE(self.__apds9960_dev)
+        self.__apds9960.configure(proximity=True, proxGain=proxGain, ledCurrent=ledCurrent)
+
+    def initialize_proximity_filter(self, scheduler, window: int = 5, mode: str = ProximityFilter.MEDIAN,
+                                    on_threshold: int = 150, off_threshold: int = 100,
+                                    dwell_ms: int = 200, sample_rate: int = 20) -> None:
+        """
+        Starts sampling the APDS9960 proximity level into a ProximityFilter at a fixed rate.
+        initialize_apds9960 must be called first.
+
+        The samples are taken by a task of the main loop scheduler, never from a timer
+        callback, so they cannot land in the middle of the gesture or proximity reads of the
+        main loop, which use the same driver buffers. No sample is taken while the main loop
+        waits for a BME680 conversion; the filter works on the sample times, so the dwell
+        is still measured correctly.
+
+        Args:
+            scheduler (Scheduler): The main loop scheduler that runs the sampling task.
+            window (int): The number of samples in the ring buffer. Defaults to 5.
+            mode (str): ProximityFilter.MEDIAN or ProximityFilter.MEAN. Defaults to MEDIAN.
+            on_threshold (int): The filtered level that switches the detection on. Defaults to 150.
+            off_threshold (int): The filtered level that switches the detection off. Defaults to 100.
+            dwell_ms (int): How long a threshold must be crossed before the detection changes. Defaults to 200.
+            sample_rate (int): Samples per second. Defaults to 20.
+        """
+        self.stop_proximity_sampling()
+        self.__prox_filter = ProximityFilter(window, mode, on_threshold, off_threshold, dwell_ms)
+        self.__scheduler = scheduler
+        self.__prox_task = scheduler.add("proximity", self._read_proximity_sample, 1000 // sample_rate)
+
+    def _read_proximity_sample(self) -> None:
+        """
+        Scheduler task that feeds one proximity sample into the filter.
+        """
+        self.__prox_filter.update(self.__apds9960.prox.proximityLevel, ticks_ms())
+
+    def stop_proximity_sampling(self) -> None:
+        """
+        Stops the proximity sampling task.
+        """
+        if self.__prox_task is not None:
+            self.__scheduler.remove(self.__prox_task)
+            self.__prox_task = None
+
+    def read_proximity_filtered(self) -> int:
+        """
+        Reads the filtered proximity level.
+
+        Returns:
+            int: The filtered proximity level.
+        """
+        return self.__prox_filter.value()
+
+    def proximity_detected(self) -> bool:
+        """
+        Checks if an object is detected by the filtered proximity stream.
+
+        Returns:
+            True while an object is detected, False otherwise.
+        """
+        return self.__prox_filter.detected()
+
+    def initialize_gesture(self, entry: int = 150, exit: int = 30) -> None:
+        """
+        Enables the APDS9960 gesture engine. initialize_apds9960 must be called first.
+
+        While the gesture engine runs the proximity engine is paused and the proximity level
+        stays at its last value. The entry level must therefore be at or above the on_threshold
+        of the proximity filter: with a lower one, someone standing in front of the sensor keeps
+        it in gesture mode before the level reaches the alarm threshold, and the alarm never fires.
+
+        Args:
+            entry (int): The proximity level that starts a gesture, at least the proximity
+                filter on_threshold. Defaults to 150, the default on_threshold.
+            exit (int): The level below which a gesture ends. Defaults to 30.
+        """
+        self.__apds9960.gesture.setThresholds(entry=entry, exit=exit)
+        self.__apds9960.configure(gesture=True)
+
+    def read_gesture(self):
+        """
+        Reads the APDS9960 gesture engine.
+
+        Returns:
+            str: The swipe that just ended ("up", "down", "left" or "right"), or None.
+        """
+        return GESTURE_NAMES[self.__apds9960.gesture.readGesture()]
 
-    def initialize_bme680(self) -> None:
+    def initialize_bme680(self, profile: dict = None) -> None:
         """
         Initializes the BME680 environmental sensor.
+
+        Args:
+            profile (dict): The sampling profile to apply, see set_bme680_profile. Defaults to None (driver defaults).
         """
-        self.__bme = BME680_I2C(self.__i2c)
+        self.__bme = BME680_I2C(self.__bus.device("bme680", I2C_PRIORITY_LOW))
         self.__bme.sea_level_pressure = 1013.25
+        self.__bme_profile = None
+        if profile is not None:
+            self.set_bme680_profile(profile)
+
+    def set_bme680_profile(self, profile: dict) -> None:
+        """
+        Applies a BME680 sampling profile.
+
+        Args:
+            profile (dict): The oversampling of each channel ("temperature_oversample",
+                "pressure_oversample", "humidity_oversample"), the IIR "filter_size", the gas
+                heater "heater_temp" (C) and "heater_time" (ms) and the "refresh_rate" (readings per second).
+        """
+        self.__bme.temperature_oversample = profile["temperature_oversample"]
+        self.__bme.pressure_oversample = profile["pressure_oversample"]
+        self.__bme.humidity_oversample = profile["humidity_oversample"]
+        self.__bme.filter_size = profile["filter_size"]
+        self.__bme.refresh_rate = profile["refresh_rate"]
+        self.__bme.set_gas_heater(profile["heater_temp"], profile["heater_time"])
+        self.__bme_profile = profile
+
+    def bme680_profile_report(self) -> tuple:
+        """
+        Reports the cost of the current BME680 sampling profile.
+
+        Returns:
+            A tuple with the measured conversion time in milliseconds and the estimated
+            average supply current in microamps when sampling at the profile refresh rate.
+        """
+        conversion_ms = self.__bme.conversion_time
+        if self.__bme_profile is None or conversion_ms == 0:
+            return conversion_ms, None
+        heater_ms = min(self.__bme_profile["heater_time"], conversion_ms)
+        period_ms = max(1000 // self.__bme.refresh_rate, conversion_ms)
+        charge = heater_ms * BME680_HEATER_CURRENT_UA + (conversion_ms - heater_ms) * BME680_MEAS_CURRENT_UA
+        current_ua = charge // period_ms + BME680_SLEEP_CURRENT_UA
+        return conversion_ms, current_ua
+
+    def service_bus(self) -> None:
+        """
+        Runs the queued I2C jobs. Call it from the main loop, between sensor reads.
+        """
+        self.__bus.service()
+
+    def bus_stats(self) -> dict:
+        """
+        Returns the I2C statistics of every sensor.
+
+        Returns:
+            dict: Device name to (transactions, errors, retries, mean_us, max_us).
+        """
+        return self.__bus.stats()
 
     def read_apds9960_sensor(self) -> int:
         """
@@ -50,7 +50,7 @@ This driver supports:
 
 """
 
-from math import sin, cos
+from math import sin, cos, ceil
 
 #
 # This allows sphinx to build the docs
@@ -80,6 +80,17 @@ except ImportError:
 
 import struct
 
+try:
+    import framebuf
+except ImportError:
+    framebuf = None
+
+# bitmaps are expanded with NumPy when it is available, on a host build
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 # ST7789 commands
 _ST7789_SWRESET = b"\x01"
 _ST7789_SLPIN = b"\x10"
@@ -137,6 +148,19 @@ _ENCODE_POS_16 = const("<HH")
 # must be at least 256 for 16 bit wide fonts
 _BUFFER_SIZE = const(256)
 
+# size of the line buffer text() renders whole strings into, strings taller
+# than it fits are sent in bands of rows. flush() uses it the same way.
+_TEXT_BUFFER_SIZE = const(8192)
+
+# dirty rectangles kept apart by flush() before they are merged into one
+_MAX_DIRTY_RECTS = const(8)
+
+# bitmaps whose palette lookup tables are kept, a 1 bpp table takes 4 KB
+_MAX_BITMAP_TABLES = const(4)
+
+# default RAM budget of the glyph cache in bytes, 0 disables it
+_GLYPH_CACHE_SIZE = const(32768)
+
 _BIT7 = const(0x80)
 _BIT6 = const(0x40)
 _BIT5 = const(0x20)
@@ -256,6 +280,13 @@ class ST7789:
 
           - ((width, height, xstart, ystart, madctl, needs_swap), ...)
 
+        glyph_cache_size (int): RAM budget in bytes of the cache of rendered
+          bitmap font glyphs, 0 to disable it. Default 32768.
+
+        framebuffer (bool): draw into an off-screen RGB565 frame buffer
+          instead of the panel. Drawn areas are tracked as dirty rectangles
+          and sent by `flush()`. Default False.
+
     """
 
     def __init__(
@@ -271,6 +302,8 @@ class ST7789:
         color_order=BGR,
         custom_init=None,
         custom_rotations=None,
+        glyph_cache_size=_GLYPH_CACHE_SIZE,
+        framebuffer=False,
     ):
         """
         Initialize display.
@@ -299,6 +332,39 @@ class ST7789:
         self._rotation = rotation % 4
         self.color_order = color_order
         self.init_cmds = custom_init or _ST7789_INIT_CMDS
+        # (font, char, fg, bg) -> [color565 glyph buffer, last use]
+        self._glyph_cache = {}
+        self._glyph_cache_size = glyph_cache_size
+        self._glyph_cache_used = 0
+        self._glyph_cache_tick = 0
+        self._glyph_cache_swap = False
+        self.glyph_cache_hits = 0
+        self.glyph_cache_misses = 0
+        self._text_buffer = None
+        # [bitmap module, needs_swap, byte lookup table, palette], oldest first
+        self._bitmap_tables = []
+        # true-type font module -> {character: (width, first bitmap bit)}
+        self._font_indexes = {}
+        # CASET and RASET arguments packed in place, and the window last sent
+        # so unchanged addresses are not sent again
+        self._window = bytearray(8)
+        self._caset = memoryview(self._window)[0:4]
+        self._raset = memoryview(self._window)[4:8]
+        self._window_cols = -1
+        self._window_rows = -1
+        self._transaction = 0
+        # frame buffer mode: the buffer, its framebuf view when the module is
+        # available, the window being written as [x0, y0, x1, y1, x, y] and
+        # the dirty rectangles as [x0, y0, x1, y1]
+        self._fb = None
+        self._fb_view = None
+        self._fb_window = None
+        self._fb_flushing = False
+        self._dirty = []
+        if framebuffer:
+            # rotation entries are (madctl, width, height, ...)
+            size = max(r[1] * r[2] for r in self.rotations)
+            self._fb = bytearray(size * 2)
         self.hard_reset()
         # yes, twice, once is not always enough
         self.init(self.init_cmds)
@@ -321,13 +387,18 @@ class ST7789:
         """
         Initialize display.
         """
+        self._forget_window()
         for command, data, delay in commands:
             self._write(command, data)
             sleep_ms(delay)
 
     def _write(self, command=None, data=None):
         """SPI write to the device: commands and data."""
-        if self.cs:
+        if command is None and self._fb is not None and not self._fb_flushing:
+            if self._fb_window is not None:
+                self._fb_write(data)
+            return
+        if self.cs and not self._transaction:
             self.cs.off()
         if command is not None:
             self.dc.off()
@@ -335,9 +406,36 @@ class ST7789:
         if data is not None:
             self.dc.on()
             self.spi.write(data)
-            if self.cs:
+            if self.cs and not self._transaction:
                 self.cs.on()
 
+    def begin(self):
+        """
+        Start a transaction: CS stays asserted until the matching `end()`, so
+        the window setup and the pixel data that follow are sent without
+        toggling it. Transactions may be nested.
+        """
+        if self._transaction == 0 and self.cs:
+            self.cs.off()
+        self._transaction += 1
+
+    def end(self):
+        """
+        End a transaction started with `begin()`, releasing CS after the
+        outermost one.
+        """
+        self._transaction -= 1
+        if self._transaction == 0 and self.cs:
+            self.cs.on()
+
+    def _forget_window(self):
+        """
+        Force the next window to be sent in full, after anything that may
+        have reset the column and row addresses.
+        """
+        self._window_cols = -1
+        self._window_rows = -1
+
     def hard_reset(self):
         """
         Hard reset display.
@@ -355,12 +453,14 @@ class ST7789:
         sleep_ms(120)
         if self.cs:
             self.cs.on()
+        self._forget_window()
 
     def soft_reset(self):
         """
         Soft reset display.
         """
         self._write(_ST7789_SWRESET)
+        self._forget_window()
         sleep_ms(150)
 
     def sleep_mode(self, value):
@@ -412,6 +512,15 @@ class ST7789:
             self.ystart,
             self.needs_swap,
         ) = self.rotations[rotation]
+        self.clear_glyph_cache()
+        self._forget_window()
+        if self._fb is not None:
+            if framebuf is not None:
+                self._fb_view = framebuf.FrameBuffer(
+                    self._fb, self.width, self.height, framebuf.RGB565
+                )
+            self._dirty = []
+            self._mark_dirty(0, 0, self.width - 1, self.height - 1)
 
         if self.color_order == BGR:
             madctl |= _ST7789_MADCTL_BGR
@@ -430,16 +539,150 @@ class ST7789:
             x1 (int): column end address
             y1 (int): row end address
         """
+        if self._fb is not None and not self._fb_flushing:
+            if x0 <= x1 and y0 <= y1 and x1 >= 0 and y1 >= 0:
+                self._fb_window = [x0, y0, x1, y1, x0, y0]
+                self._mark_dirty(x0, y0, x1, y1)
+            else:
+                self._fb_window = None
+            return
         if x0 <= x1 <= self.width and y0 <= y1 <= self.height:
-            self._write(
-                _ST7789_CASET,
-                struct.pack(_ENCODE_POS, x0 + self.xstart, x1 + self.xstart),
-            )
-            self._write(
-                _ST7789_RASET,
-                struct.pack(_ENCODE_POS, y0 + self.ystart, y1 + self.ystart),
-            )
-            self._write(_ST7789_RAMWR)
+            # CS is left asserted for the pixel data, as RAMWR expects
+            if self.cs and not self._transaction:
+                self.cs.off()
+            spi = self.spi
+            dc = self.dc
+            x0 += self.xstart
+            x1 += self.xstart
+            y0 += self.ystart
+            y1 += self.ystart
+            cols = x0 << 16 | x1
+            if cols != self._window_cols:
+                struct.pack_into(_ENCODE_POS, self._caset, 0, x0, x1)
+                dc.off()
+                spi.write(_ST7789_CASET)
+                dc.on()
+                spi.write(self._caset)
+                self._window_cols = cols
+            rows = y0 << 16 | y1
+            if rows != self._window_rows:
+                struct.pack_into(_ENCODE_POS, self._raset, 0, y0, y1)
+                dc.off()
+                spi.write(_ST7789_RASET)
+                dc.on()
+                spi.write(self._raset)
+                self._window_rows = rows
+            dc.off()
+            spi.write(_ST7789_RAMWR)
+
+    def _fb_write(self, data):
+        """
+        Write pixel data into the frame buffer window, wrapping at its right
+        edge like the panel RAM does. Pixels outside the screen are dropped.
+        """
+        window = self._fb_window
+        x0, y0, x1, y1, x, y = window
+        width = self.width
+        height = self.height
+        fb = memoryview(self._fb)
+        src = memoryview(data)
+        pos = 0
+        size = len(data)
+        while pos < size and y <= y1:
+            take = min((x1 - x + 1) * 2, size - pos)
+            if 0 <= y < height:
+                start = max(x, 0)
+                stop = min(x + take // 2, width)
+                if start < stop:
+                    offset = (y * width + start) * 2
+                    skip = (start - x) * 2
+                    fb[offset : offset + (stop - start) * 2] = src[
+                        pos + skip : pos + skip + (stop - start) * 2
+                    ]
+            pos += take
+            x += take // 2
+            if x > x1:
+                x = x0
+                y += 1
+        window[4] = x
+        window[5] = y
+
+    def _mark_dirty(self, x0, y0, x1, y1):
+        """
+        Add a rectangle to the areas flush() has to send, merging it with the
+        rectangles it overlaps or touches.
+        """
+        x0 = max(x0, 0)
+        y0 = max(y0, 0)
+        x1 = min(x1, self.width - 1)
+        y1 = min(y1, self.height - 1)
+        if x0 > x1 or y0 > y1:
+            return
+        dirty = self._dirty
+        merged = True
+        while merged:
+            merged = False
+            for rect in dirty:
+                if x0 <= rect[2] + 1 and rect[0] <= x1 + 1 and y0 <= rect[3] + 1 and rect[1] <= y1 + 1:
+                    x0 = min(x0, rect[0])
+                    y0 = min(y0, rect[1])
+                    x1 = max(x1, rect[2])
+                    y1 = max(y1, rect[3])
+                    dirty.remove(rect)
+                    merged = True
+                    break
+        dirty.append([x0, y0, x1, y1])
+        if len(dirty) > _MAX_DIRTY_RECTS:
+            x0 = min(rect[0] for rect in dirty)
+            y0 = min(rect[1] for rect in dirty)
+            x1 = max(rect[2] for rect in dirty)
+            y1 = max(rect[3] for rect in dirty)
+            self._dirty = [[x0, y0, x1, y1]]
+
+    def flush(self):
+        """
+        Send the dirty areas of the frame buffer to the panel, one window per
+        dirty rectangle. Does nothing when the frame buffer mode is off.
+
+        Returns:
+            int: number of pixels sent
+        """
+        if self._fb is None or not self._dirty:
+            return 0
+        if self._text_buffer is None:
+            self._text_buffer = bytearray(_TEXT_BUFFER_SIZE)
+        buffer = self._text_buffer
+        fb = memoryview(self._fb)
+        stride = self.width * 2
+        sent = 0
+        self._fb_flushing = True
+        self.begin()
+        try:
+            for x0, y0, x1, y1 in self._dirty:
+                row_bytes = (x1 - x0 + 1) * 2
+                self._set_window(x0, y0, x1, y1)
+                if row_bytes == stride:
+                    # full rows are contiguous in the frame buffer
+                    start = y0 * stride
+                    end = (y1 + 1) * stride
+                    for offset in range(start, end, _TEXT_BUFFER_SIZE):
+                        self._write(None, fb[offset : min(offset + _TEXT_BUFFER_SIZE, end)])
+                else:
+                    band = max(_TEXT_BUFFER_SIZE // row_bytes, 1)
+                    for first in range(y0, y1 + 1, band):
+                        rows = min(band, y1 + 1 - first)
+                        for row in range(rows):
+                            offset = (first + row) * stride + x0 * 2
+                            buffer[row * row_bytes : (row + 1) * row_bytes] = fb[
+                                offset : offset + row_bytes
+                            ]
+                        self._write(None, memoryview(buffer)[: rows * row_bytes])
+                sent += (x1 - x0 + 1) * (y1 - y0 + 1)
+        finally:
+            self.end()
+            self._fb_flushing = False
+        self._dirty = []
+        return sent
 
     def vline(self, x, y, length, color):
         """
@@ -474,6 +717,7 @@ class ST7789:
             Y (int): y coordinate
             color (int): 565 encoded color
         """
+        self.begin()
         self._set_window(x, y, x, y)
         self._write(
             None,
@@ -481,6 +725,7 @@ class ST7789:
                 _ENCODE_PIXEL_SWAPPED if self.needs_swap else _ENCODE_PIXEL, color
             ),
         )
+        self.end()
 
     def blit_buffer(self, buffer, x, y, width, height):
         """
@@ -493,8 +738,10 @@ class ST7789:
             width (int): Width
             height (int): Height
         """
+        self.begin()
         self._set_window(x, y, x + width - 1, y + height - 1)
         self._write(None, buffer)
+        self.end()
 
     def rect(self, x, y, w, h, color):
         """
@@ -523,6 +770,15 @@ class ST7789:
             height (int): Height in pixels
             color (int): 565 encoded color
         """
+        if self._fb_view is not None and not self._fb_flushing:
+            # the frame buffer holds the bytes sent to the panel, swap them
+            # back to the native order framebuf uses
+            if not self.needs_swap:
+                color = ((color << 8) & 0xFF00) | (color >> 8)
+            self._fb_view.fill_rect(x, y, width, height, color)
+            self._mark_dirty(x, y, x + width - 1, y + height - 1)
+            return
+        self.begin()
         self._set_window(x, y, x + width - 1, y + height - 1)
         chunks, rest = divmod(width * height, _BUFFER_SIZE)
         pixel = struct.pack(
@@ -535,6 +791,7 @@ class ST7789:
                 self._write(None, data)
         if rest:
             self._write(None, pixel * rest)
+        self.end()
 
     def fill(self, color):
         """
@@ -556,6 +813,12 @@ class ST7789:
             y1 (int): End point y coordinate
             color (int): 565 encoded color
         """
+        if x0 == x1:
+            self.vline(x0, min(y0, y1), abs(y1 - y0) + 1, color)
+            return
+        if y0 == y1:
+            self.hline(min(x0, x1), y0, abs(x1 - x0) + 1, color)
+            return
         steep = abs(y1 - y0) > abs(x1 - x0)
         if steep:
             x0, y0 = y0, x0
@@ -567,16 +830,23 @@ class ST7789:
         dy = abs(y1 - y0)
         err = dx // 2
         ystep = 1 if y0 < y1 else -1
+        # the pixels of each Bresenham step that share a minor coordinate form
+        # a run, drawn as one span instead of pixel by pixel
+        self.begin()
+        start = x0
         while x0 <= x1:
-            if steep:
-                self.pixel(y0, x0, color)
-            else:
-                self.pixel(x0, y0, color)
             err -= dy
+            if err < 0 or x0 == x1:
+                if steep:
+                    self.fill_rect(y0, start, 1, x0 - start + 1, color)
+                else:
+                    self.fill_rect(start, y0, x0 - start + 1, 1, color)
+                start = x0 + 1
             if err < 0:
                 y0 += ystep
                 err += dx
             x0 += 1
+        self.end()
 
     def vscrdef(self, tfa, vsa, bfa):
         """
@@ -678,85 +948,199 @@ class ST7789:
 
         return buffer
 
-    def _text8(self, font, text, x0, y0, fg_color=WHITE, bg_color=BLACK):
+    def clear_glyph_cache(self):
         """
-        Internal method to write characters with width of 8 and
-        heights of 8 or 16.
+        Drop every cached glyph.
+        """
+        self._glyph_cache = {}
+        self._glyph_cache_used = 0
+        self._glyph_cache_swap = self.needs_swap
 
-        Args:
-            font (module): font module to use
-            text (str): text to write
-            x0 (int): column to start drawing at
-            y0 (int): row to start drawing at
-            color (int): 565 encoded color to use for characters
-            background (int): 565 encoded color to use for background
+    def glyph_cache_stats(self):
         """
+        Return the glyph cache statistics.
 
-        for char in text:
-            ch = ord(char)
-            if (
-                font.FIRST <= ch < font.LAST
-                and x0 + font.WIDTH <= self.width
-                and y0 + font.HEIGHT <= self.height
-            ):
-                if font.HEIGHT == 8:
-                    passes = 1
-                    size = 8
-                    each = 0
-                else:
-                    passes = 2
-                    size = 16
-                    each = 8
+        Returns:
+            tuple: (hits, misses, cached glyphs, bytes used)
+        """
+        return (
+            self.glyph_cache_hits,
+            self.glyph_cache_misses,
+            len(self._glyph_cache),
+            self._glyph_cache_used,
+        )
 
-                for line in range(passes):
-                    idx = (ch - font.FIRST) * size + (each * line)
-                    buffer = self._pack8(font.FONT, idx, fg_color, bg_color)
-                    self.blit_buffer(buffer, x0, y0 + 8 * line, 8, 8)
+    def _glyph(self, font, ch, fg_color, bg_color):
+        """
+        Return a glyph of a bitmap font as a color565 buffer, from the cache
+        when possible. The least recently used glyphs are evicted to keep the
+        cache within its RAM budget.
+
+        Args:
+            font (module): font module or binary font to use
+            ch (int): character code
+            fg_color (int): 565 encoded color of the character, byte swapped
+            bg_color (int): 565 encoded color of the background, byte swapped
+
+        Returns:
+            bytearray: font.WIDTH x font.HEIGHT pixels, row by row, or None
+            when a binary font does not have the character
+        """
+        if self.needs_swap != self._glyph_cache_swap:
+            self.clear_glyph_cache()
+        key = (font, ch, fg_color, bg_color)
+        self._glyph_cache_tick += 1
+        entry = self._glyph_cache.get(key)
+        if entry is not None:
+            self.glyph_cache_hits += 1
+            entry[1] = self._glyph_cache_tick
+            return entry[0]
+
+        self.glyph_cache_misses += 1
+        buffer = self._render_glyph(font, ch, fg_color, bg_color)
+        if buffer is None:
+            return None
+        size = len(buffer)
+        if size <= self._glyph_cache_size:
+            cache = self._glyph_cache
+            while self._glyph_cache_used + size > self._glyph_cache_size:
+                oldest = None
+                for cached_key, cached in cache.items():
+                    if oldest is None or cached[1] < cache[oldest][1]:
+                        oldest = cached_key
+                self._glyph_cache_used -= len(cache.pop(oldest)[0])
+            cache[key] = [buffer, self._glyph_cache_tick]
+            self._glyph_cache_used += size
+        return buffer
 
-                x0 += 8
+    def _render_glyph(self, font, ch, fg_color, bg_color):
+        """
+        Render a glyph of a bitmap font into a new color565 buffer, one 8 row
+        strip at a time. Binary fonts are asked for the glyph bitmap, font
+        modules are indexed directly.
+        """
+        if font.WIDTH == 8:
+            pack = self._pack8
+            strip = 128
+            size = font.HEIGHT
+            each = 8
+        else:
+            pack = self._pack16
+            strip = 256
+            size = font.HEIGHT * 2
+            each = 16
+        if hasattr(font, "glyph"):
+            glyph = font.glyph(ch)
+            if glyph is None:
+                return None
+            first = 0
+        else:
+            glyph = font.FONT
+            first = (ch - font.FIRST) * size
+        passes = font.HEIGHT // 8
+        buffer = bytearray(strip * passes)
+        for line in range(passes):
+            idx = first + (each * line)
+            buffer[line * strip : (line + 1) * strip] = pack(
+                glyph, idx, fg_color, bg_color
+            )
+        return buffer
 
-    def _text16(self, font, text, x0, y0, fg_color=WHITE, bg_color=BLACK):
+    @micropython.viper
+    @staticmethod
+    def _copy_rows(dst, dst_stride: int, dst_off: int, src, src_stride: int, first: int, rows: int):
         """
-        Internal method to draw characters with width of 16 and heights of 16
-        or 32.
+        Copy rows first to first + rows of a glyph buffer into a line buffer.
+        """
+        d = ptr8(dst)
+        s = ptr8(src)
+        src_i = first * src_stride
+        dst_i = dst_off
+        for _ in range(rows):
+            for i in range(src_stride):
+                d[dst_i + i] = s[src_i + i]
+            src_i += src_stride
+            dst_i += dst_stride
+
+    def _blit_glyphs(self, glyphs, x0, y0, width, height):
+        """
+        Send a run of glyph buffers side by side through a single window. The
+        run is assembled row by row in the line buffer and sent in as few bands
+        of rows as the buffer allows.
 
         Args:
-            font (module): font module to use
+            glyphs (list): color565 glyph buffers
+            x0 (int): column of the first glyph
+            y0 (int): row of the glyphs
+            width (int): glyph width in pixels
+            height (int): glyph height in pixels
+        """
+        count = len(glyphs)
+        if not count:
+            return
+        glyph_stride = width * 2
+        row_bytes = count * glyph_stride
+        if row_bytes > _TEXT_BUFFER_SIZE:
+            for glyph in glyphs:
+                self.blit_buffer(glyph, x0, y0, width, height)
+                x0 += width
+            return
+        if self._text_buffer is None:
+            self._text_buffer = bytearray(_TEXT_BUFFER_SIZE)
+        buffer = self._text_buffer
+        band = min(height, _TEXT_BUFFER_SIZE // row_bytes)
+        self.begin()
+        self._set_window(x0, y0, x0 + count * width - 1, y0 + height - 1)
+        for first in range(0, height, band):
+            rows = min(band, height - first)
+            for i in range(count):
+                self._copy_rows(buffer, row_bytes, i * glyph_stride, glyphs[i], glyph_stride, first, rows)
+            self._write(None, memoryview(buffer)[: rows * row_bytes])
+        self.end()
+
+    def _text_blit(self, font, text, x0, y0, fg_color, bg_color):
+        """
+        Internal method to draw a string with a bitmap font. Each run of
+        drawable characters is sent through one window.
+
+        Args:
+            font (module): font module or binary font to use
             text (str): text to write
             x0 (int): column to start drawing at
             y0 (int): row to start drawing at
-            color (int): 565 encoded color to use for characters
-            background (int): 565 encoded color to use for background
+            fg_color (int): 565 encoded color of the characters, byte swapped
+            bg_color (int): 565 encoded color of the background, byte swapped
         """
-
+        width = font.WIDTH
+        height = font.HEIGHT
+        if y0 + height > self.height:
+            return
+        glyphs = []
+        run_x = x0
         for char in text:
             ch = ord(char)
-            if (
-                font.FIRST <= ch < font.LAST
-                and x0 + font.WIDTH <= self.width
-                and y0 + font.HEIGHT <= self.height
-            ):
-                each = 16
-                if font.HEIGHT == 16:
-                    passes = 2
-                    size = 32
-                else:
-                    passes = 4
-                    size = 64
-
-                for line in range(passes):
-                    idx = (ch - font.FIRST) * size + (each * line)
-                    buffer = self._pack16(font.FONT, idx, fg_color, bg_color)
-                    self.blit_buffer(buffer, x0, y0 + 8 * line, 16, 8)
-            x0 += 16
+            glyph = None
+            if font.FIRST <= ch < font.LAST and x0 + width <= self.width:
+                glyph = self._glyph(font, ch, fg_color, bg_color)
+            if glyph is not None:
+                glyphs.append(glyph)
+                x0 += width
+            else:
+                self._blit_glyphs(glyphs, run_x, y0, width, height)
+                glyphs = []
+                # 16 bit wide fonts leave a gap for characters they cannot draw
+                if width == 16:
+                    x0 += width
+                run_x = x0
+        self._blit_glyphs(glyphs, run_x, y0, width, height)
 
     def text(self, font, text, x0, y0, color=WHITE, background=BLACK):
         """
         Draw text on display in specified font and colors. 8 and 16 bit wide
-        fonts are supported.
+        fonts are supported, as font modules or binfont.BinaryFont files.
 
         Args:
-            font (module): font module to use.
+            font (module): font module or binary font to use.
             text (str): text to write
             x0 (int): column to start drawing at
             y0 (int): row to start drawing at
@@ -770,14 +1154,133 @@ class ST7789:
             else ((background << 8) & 0xFF00) | (background >> 8)
         )
 
-        if font.WIDTH == 8:
-            self._text8(font, text, x0, y0, fg_color, bg_color)
+        self._text_blit(font, text, x0, y0, fg_color, bg_color)
+
+    def _bitmap_palette(self, bitmap):
+        """
+        Internal method returning the lookup tables of a bitmap module for the
+        current byte order, building them on first use.
+
+        The palette holds the two bytes sent for each color index. For 1, 2, 4
+        and 8 bpp bitmaps the byte table holds the pixels of every possible
+        bitmap byte, 16 // bpp bytes per entry, otherwise it is None.
+
+        Args:
+            bitmap (bitmap_module): The module containing the bitmap
+
+        Returns:
+            tuple: (byte lookup table, palette)
+        """
+        needs_swap = self.needs_swap
+        tables = self._bitmap_tables
+        for entry in tables:
+            if entry[0] is bitmap and entry[1] == needs_swap:
+                return entry[2], entry[3]
+
+        bpp = bitmap.BPP
+        colors = bitmap.PALETTE
+        palette = bytearray(2 << bpp)
+        encode = _ENCODE_PIXEL_SWAPPED if needs_swap else _ENCODE_PIXEL
+        for color_index in range(min(len(colors), 1 << bpp)):
+            struct.pack_into(encode, palette, color_index * 2, colors[color_index])
+
+        lookup = None
+        if bpp == 8:
+            lookup = palette
+        elif numpy is None and bpp in (1, 2, 4):
+            per_byte = 8 // bpp
+            mask = (1 << bpp) - 1
+            lookup = bytearray(512 * per_byte)
+            i = 0
+            for value in range(256):
+                for shift in range(8 - bpp, -1, -bpp):
+                    color_index = ((value >> shift) & mask) * 2
+                    lookup[i] = palette[color_index]
+                    lookup[i + 1] = palette[color_index + 1]
+                    i += 2
+
+        tables.append([bitmap, needs_swap, lookup, palette])
+        if len(tables) > _MAX_BITMAP_TABLES:
+            tables.pop(0)
+        return lookup, palette
+
+    @micropython.viper
+    @staticmethod
+    def _expand_bytes(dst, src, src_off: int, count: int, lookup, stride: int):
+        """
+        Expand count bitmap bytes into color565 pixels, stride bytes of pixels
+        per bitmap byte.
+        """
+        d = ptr8(dst)
+        s = ptr8(src)
+        table = ptr8(lookup)
+        dst_i = 0
+        for i in range(count):
+            table_i = s[src_off + i] * stride
+            for j in range(stride):
+                d[dst_i + j] = table[table_i + j]
+            dst_i += stride
+
+    @micropython.viper
+    @staticmethod
+    def _expand_bits(dst, src, bit: int, count: int, bpp: int, palette):
+        """
+        Expand count pixels of bpp bits each, starting at any bit of the
+        bitmap, into color565 pixels.
+        """
+        d = ptr8(dst)
+        s = ptr8(src)
+        p = ptr8(palette)
+        dst_i = 0
+        for _ in range(count):
+            color_index = 0
+            for _ in range(bpp):
+                color_index = (color_index << 1) | ((s[bit >> 3] >> (7 - (bit & 7))) & 1)
+                bit += 1
+            d[dst_i] = p[color_index * 2]
+            d[dst_i + 1] = p[color_index * 2 + 1]
+            dst_i += 2
+
+    @staticmethod
+    def _expand_numpy(dst, src, bit, count, bpp, palette):
+        """
+        NumPy version of `_expand_bits` for host builds.
+        """
+        first = bit >> 3
+        last = (bit + count * bpp + 7) >> 3
+        bits = numpy.unpackbits(numpy.frombuffer(src, numpy.uint8, last - first, first))
+        bits = bits[bit & 7 : (bit & 7) + count * bpp].reshape(count, bpp)
+        color_index = bits.dot(1 << numpy.arange(bpp - 1, -1, -1))
+        colors = numpy.frombuffer(palette, numpy.uint8).reshape(-1, 2)
+        dst[: count * 2] = colors[color_index].tobytes()
+
+    def _expand_bitmap(self, bitmap, bit, count, buffer):
+        """
+        Internal method to expand count pixels of a bitmap starting at the
+        given bit into color565 pixels at the start of buffer. Runs starting
+        and ending on a byte boundary go through the byte lookup table.
+
+        Args:
+            bitmap (bitmap_module): The module containing the bitmap
+            bit (int): first bit of the pixels in bitmap.BITMAP
+            count (int): number of pixels
+            buffer (bytearray): destination, at least count * 2 bytes
+        """
+        bpp = bitmap.BPP
+        lookup, palette = self._bitmap_palette(bitmap)
+        if numpy is not None:
+            self._expand_numpy(buffer, bitmap.BITMAP, bit, count, bpp, palette)
+        elif lookup is not None and not bit & 7 and not (count * bpp) & 7:
+            self._expand_bytes(
+                buffer, bitmap.BITMAP, bit >> 3, (count * bpp) >> 3, lookup, 16 // bpp
+            )
         else:
-            self._text16(font, text, x0, y0, fg_color, bg_color)
+            self._expand_bits(buffer, bitmap.BITMAP, bit, count, bpp, palette)
 
     def bitmap(self, bitmap, x, y, index=0):
         """
-        Draw a bitmap on display at the specified column and row
+        Draw a bitmap on display at the specified column and row. The bitmap
+        is expanded and sent in bands of rows through the line buffer.
 
         Args:
             bitmap (bitmap_module): The module containing the bitmap to draw
@@ -793,32 +1296,24 @@ class ST7789:
         if self.width <= to_col or self.height <= to_row:
             return
 
-        bitmap_size = height * width
-        buffer_len = bitmap_size * 2
         bpp = bitmap.BPP
-        bs_bit = bpp * bitmap_size * index  # if index > 0 else 0
-        palette = bitmap.PALETTE
-        needs_swap = self.needs_swap
-        buffer = bytearray(buffer_len)
-
-        for i in range(0, buffer_len, 2):
-            color_index = 0
-            for _ in range(bpp):
-                color_index = (color_index << 1) | (
-                    (bitmap.BITMAP[bs_bit >> 3] >> (7 - (bs_bit & 7))) & 1
-                )
-                bs_bit += 1
-
-            color = palette[color_index]
-            if needs_swap:
-                buffer[i] = color & 0xFF
-                buffer[i + 1] = color >> 8
-            else:
-                buffer[i] = color >> 8
-                buffer[i + 1] = color & 0xFF
-
+        bit = bpp * height * width * index
+        if self._text_buffer is None:
+            self._text_buffer = bytearray(_TEXT_BUFFER_SIZE)
+        buffer = self._text_buffer
+        band = max(_TEXT_BUFFER_SIZE // (width * 2), 1)
+        if band > 8:
+            # whole bytes of the bitmap per band keep the byte lookup usable
+            band &= ~7
+
+        self.begin()
         self._set_window(x, y, to_col, to_row)
-        self._write(None, buffer)
+        for first in range(0, height, band):
+            count = min(band, height - first) * width
+            self._expand_bitmap(bitmap, bit, count, buffer)
+            self._write(None, memoryview(buffer)[: count * 2])
+            bit += count * bpp
+        self.end()
 
     def pbitmap(self, bitmap, x, y, index=0):
         """
@@ -834,35 +1329,21 @@ class ST7789:
         """
         width = bitmap.WIDTH
         height = bitmap.HEIGHT
-        bitmap_size = height * width
+        to_col = x + width - 1
+        if self.width <= to_col:
+            return
+
         bpp = bitmap.BPP
-        bs_bit = bpp * bitmap_size * index  # if index > 0 else 0
-        palette = bitmap.PALETTE
-        needs_swap = self.needs_swap
-        buffer = bytearray(bitmap.WIDTH * 2)
-
-        for row in range(height):
-            for col in range(width):
-                color_index = 0
-                for _ in range(bpp):
-                    color_index <<= 1
-                    color_index |= (
-                        bitmap.BITMAP[bs_bit // 8] & 1 << (7 - (bs_bit % 8))
-                    ) > 0
-                    bs_bit += 1
-                color = palette[color_index]
-                if needs_swap:
-                    buffer[col * 2] = color & 0xFF
-                    buffer[col * 2 + 1] = color >> 8 & 0xFF
-                else:
-                    buffer[col * 2] = color >> 8 & 0xFF
-                    buffer[col * 2 + 1] = color & 0xFF
+        bit = bpp * height * width * index
+        buffer = bytearray(width * 2)
 
-            to_col = x + width - 1
-            to_row = y + row
-            if self.width > to_col and self.height > to_row:
-                self._set_window(x, y + row, to_col, to_row)
-                self._write(None, buffer)
+        self.begin()
+        for row in range(min(height, self.height - y)):
+            self._expand_bitmap(bitmap, bit, width, buffer)
+            self._set_window(x, y + row, to_col, y + row)
+            self._write(None, buffer)
+            bit += width * bpp
+        self.end()
 
     def write(self, font, string, x, y, fg=WHITE, bg=BLACK):
         """
@@ -885,40 +1366,33 @@ class ST7789:
         bg_hi = bg >> 8
         bg_lo = bg & 0xFF
 
+        glyphs = self._font_index(font)
+        self.begin()
         for character in string:
-            try:
-                char_index = font.MAP.index(character)
-                offset = char_index * font.OFFSET_WIDTH
-                bs_bit = font.OFFSETS[offset]
-                if font.OFFSET_WIDTH > 1:
-                    bs_bit = (bs_bit << 8) + font.OFFSETS[offset + 1]
-
-                if font.OFFSET_WIDTH > 2:
-                    bs_bit = (bs_bit << 8) + font.OFFSETS[offset + 2]
-
-                char_width = font.WIDTHS[char_index]
-                buffer_needed = char_width * font.HEIGHT * 2
-
-                for i in range(0, buffer_needed, 2):
-                    if font.BITMAPS[bs_bit // 8] & 1 << (7 - (bs_bit % 8)) > 0:
-                        buffer[i] = fg_hi
-                        buffer[i + 1] = fg_lo
-                    else:
-                        buffer[i] = bg_hi
-                        buffer[i + 1] = bg_lo
-
-                    bs_bit += 1
+            glyph = glyphs.get(character)
+            if glyph is None:
+                continue
+            char_width, bs_bit = glyph
+            buffer_needed = char_width * font.HEIGHT * 2
+
+            for i in range(0, buffer_needed, 2):
+                if font.BITMAPS[bs_bit // 8] & 1 << (7 - (bs_bit % 8)) > 0:
+                    buffer[i] = fg_hi
+                    buffer[i + 1] = fg_lo
+                else:
+                    buffer[i] = bg_hi
+                    buffer[i + 1] = bg_lo
 
-                to_col = x + char_width - 1
-                to_row = y + font.HEIGHT - 1
-                if self.width > to_col and self.height > to_row:
-                    self._set_window(x, y, to_col, to_row)
-                    self._write(None, buffer[:buffer_needed])
+                bs_bit += 1
 
-                x += char_width
+            to_col = x + char_width - 1
+            to_row = y + font.HEIGHT - 1
+            if self.width > to_col and self.height > to_row:
+                self._set_window(x, y, to_col, to_row)
+                self._write(None, buffer[:buffer_needed])
 
-            except ValueError:
-                pass
+            x += char_width
+        self.end()
 
     def write_width(self, font, string):
         """
@@ -933,16 +1407,45 @@ class ST7789:
             int: The width of the string in pixels
 
         """
+        glyphs = self._font_index(font)
         width = 0
         for character in string:
-            try:
-                char_index = font.MAP.index(character)
-                width += font.WIDTHS[char_index]
-            except ValueError:
-                pass
+            glyph = glyphs.get(character)
+            if glyph is not None:
+                width += glyph[0]
 
         return width
 
+    def _font_index(self, font):
+        """
+        Internal method returning the glyph index of a converted true-type
+        font, decoding the width and bitmap offset of every character in
+        font.MAP the first time the font is used.
+
+        Args:
+            font (font): The module containing the converted true-type font
+
+        Returns:
+            dict: character -> (width in pixels, first bit in font.BITMAPS)
+        """
+        glyphs = self._font_indexes.get(font)
+        if glyphs is None:
+            glyphs = {}
+            offsets = font.OFFSETS
+            offset_width = font.OFFSET_WIDTH
+            widths = font.WIDTHS
+            offset = 0
+            for char_index, character in enumerate(font.MAP):
+                bs_bit = 0
+                for i in range(offset, offset + offset_width):
+                    bs_bit = (bs_bit << 8) + offsets[i]
+                offset += offset_width
+                # MAP.index() found the first of repeated characters
+                if character not in glyphs:
+                    glyphs[character] = (widths[char_index], bs_bit)
+            self._font_indexes[font] = glyphs
+        return glyphs
+
     @micropython.native
     def polygon(self, points, x, y, color, angle=0, center_x=0, center_y=0):
         """
@@ -963,10 +1466,93 @@ class ST7789:
         if len(points) < 3:
             raise ValueError("Polygon must have at least 3 points.")
 
+        rotated = self._polygon_points(points, x, y, angle, center_x, center_y)
+        self.begin()
+        for i in range(1, len(rotated)):
+            self.line(
+                rotated[i - 1][0],
+                rotated[i - 1][1],
+                rotated[i][0],
+                rotated[i][1],
+                color,
+            )
+        self.end()
+
+    @micropython.native
+    def fill_polygon(self, points, x, y, color, angle=0, center_x=0, center_y=0):
+        """
+        Draw a filled polygon on the display.
+
+        The polygon is closed from the last point back to the first and filled
+        with the even-odd rule, one span per crossing pair on each row. Pixels
+        are filled when their center is inside the polygon, so the right and
+        bottom edges are left for `polygon()` to draw when an outline is wanted.
+
+        Args:
+            points (list): List of points to fill.
+            x (int): X-coordinate of the polygon's position.
+            y (int): Y-coordinate of the polygon's position.
+            color (int): 565 encoded color.
+            angle (float): Rotation angle in radians (default: 0).
+            center_x (int): X-coordinate of the rotation center (default: 0).
+            center_y (int): Y-coordinate of the rotation center (default: 0).
+
+        Raises:
+            ValueError: If the polygon has less than 3 points.
+        """
+        if len(points) < 3:
+            raise ValueError("Polygon must have at least 3 points.")
+
+        rotated = self._polygon_points(points, x, y, angle, center_x, center_y)
+        edges = []
+        for i in range(len(rotated)):
+            xa, ya = rotated[i - 1]
+            xb, yb = rotated[i]
+            if ya != yb:
+                if ya > yb:
+                    xa, ya, xb, yb = xb, yb, xa, ya
+                edges.append((ya, yb, xa, (xb - xa) / (yb - ya)))
+        if not edges:
+            return
+        top = max(min(edge[0] for edge in edges), 0)
+        bottom = min(max(edge[1] for edge in edges), self.height)
+        crossings = []
+        self.begin()
+        for row in range(top, bottom):
+            center = row + 0.5
+            crossings.clear()
+            for y_top, y_bottom, x_top, slope in edges:
+                if y_top <= center < y_bottom:
+                    crossings.append(x_top + (center - y_top) * slope)
+            crossings.sort()
+            for i in range(0, len(crossings) - 1, 2):
+                # first and last pixel whose center lies between the crossings
+                start = max(ceil(crossings[i] - 0.5), 0)
+                end = min(ceil(crossings[i + 1] - 0.5), self.width)
+                if start < end:
+                    self.fill_rect(start, row, end - start, 1, color)
+        self.end()
+
+    @staticmethod
+    def _polygon_points(points, x, y, angle, center_x, center_y):
+        """
+        Internal method to translate and rotate the points of a polygon.
+
+        Args:
+            points (list): List of points.
+            x (int): X-coordinate of the polygon's position.
+            y (int): Y-coordinate of the polygon's position.
+            angle (float): Rotation angle in radians.
+            center_x (int): X-coordinate of the rotation center.
+            center_y (int): Y-coordinate of the rotation center.
+
+        Returns:
+            list: (x, y) screen coordinates of the points
+        """
         if angle:
             cos_a = cos(angle)
             sin_a = sin(angle)
-            rotated = [
+            return [
                 (
                     x
                     + center_x
@@ -981,14 +1567,4 @@ class ST7789:
                 )
                 for point in points
             ]
-        else:
-            rotated = [(x + int((point[0])), y + int((point[1]))) for point in points]
-
-        for i in range(1, len(rotated)):
-            self.line(
-                rotated[i - 1][0],
-                rotated[i - 1][1],
-                rotated[i][0],
-                rotated[i][1],
-                color,
-            )
+        return [(x + int((point[0])), y + int((point[1]))) for point in points]
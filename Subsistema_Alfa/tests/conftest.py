@@ -0,0 +1,28 @@
+"""
+Installs the host stand-ins for the MicroPython modules, so the firmware modules can be imported
+and tested with pytest on a PC. Time is a fake clock that only moves when the code sleeps or a
+test advances it.
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from host import FakeClock, I2C, install
+
+CLOCK = FakeClock()
+install(CLOCK)
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    The fake clock reset to zero, with time.sleep moving it instead of waiting.
+    """
+    CLOCK.us = 0
+    monkeypatch.setattr(time, "sleep", lambda seconds: CLOCK.advance_ms(seconds * 1000))
+    I2C.devices = {}
+    return CLOCK
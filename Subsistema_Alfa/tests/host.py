@@ -0,0 +1,191 @@
+"""
+Host stand-ins for the MicroPython modules, so the firmware modules can be imported on a PC by
+the tests and the benchmarks. install() puts them in place before the first firmware import.
+"""
+
+import binascii
+import builtins
+import sys
+import time
+import types
+
+class FakeClock:
+    """
+    The microsecond counter behind the ticks_* functions.
+    """
+
+    def __init__(self):
+        self.us = 0
+
+    def advance_ms(self, ms) -> None:
+        self.us += int(ms * 1000)
+
+class Pin:
+    IN = 0
+    OUT = 1
+    PULL_UP = 2
+
+    def __init__(self, pin=None, mode=None, *args, **kwargs):
+        self.pin = pin
+        self._value = 0
+
+    def __call__(self, *args):
+        return self.value(*args)
+
+    def value(self, *args):
+        if args:
+            self._value = args[0]
+        return self._value
+
+    def on(self):
+        self._value = 1
+
+    def off(self):
+        self._value = 0
+
+    def mode(self, *args):
+        pass
+
+    def irq(self, *args, **kwargs):
+        pass
+
+class I2C:
+    """
+    An I2C bus that forwards register reads and writes to the device models in I2C.devices,
+    keyed by address. A model has read(register, length) and write(register, data).
+    """
+
+    devices = {}
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def readfrom_mem_into(self, addr, memaddr, buf):
+        buf[:] = self.devices[addr].read(memaddr, len(buf))
+
+    def readfrom_mem(self, addr, memaddr, nbytes):
+        return bytes(self.devices[addr].read(memaddr, nbytes))
+
+    def writeto_mem(self, addr, memaddr, buf):
+        self.devices[addr].write(memaddr, bytes(buf))
+
+    def scan(self):
+        return list(self.devices)
+
+class Timer:
+    PERIODIC = 1
+    ONE_SHOT = 0
+
+    def __init__(self, *args, **kwargs):
+        self.init(*args, **kwargs)
+
+    def init(self, *args, **kwargs):
+        self.period = kwargs.get("period")
+        self.callback = kwargs.get("callback")
+
+    def deinit(self):
+        self.callback = None
+
+class SPI:
+    """
+    An SPI bus that counts what is written to it.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.written = 0
+        self.writes = 0
+
+    def init(self, *args, **kwargs):
+        pass
+
+    def write(self, data):
+        self.written += len(data)
+        self.writes += 1
+
+    def deinit(self):
+        pass
+
+class PWM:
+    def __init__(self, *args, **kwargs):
+        self._freq = 0
+        self._duty = 0
+
+    def freq(self, *args):
+        if args:
+            self._freq = args[0]
+        return self._freq
+
+    def duty_u16(self, *args):
+        if args:
+            self._duty = args[0]
+        return self._duty
+
+    def deinit(self):
+        pass
+
+class _Pointer:
+    """
+    The ptr8/ptr16/ptr32 casts of the viper emitter, so viper functions run unchanged.
+    """
+
+    def __init__(self, buffer, typecode):
+        self.__view = memoryview(buffer).cast("B").cast(typecode)
+        self.__mask = (1 << (8 * self.__view.itemsize)) - 1
+
+    def __getitem__(self, index):
+        return self.__view[index]
+
+    def __setitem__(self, index, value):
+        self.__view[index] = value & self.__mask
+
+def install(clock=None) -> None:
+    """
+    Installs the stand-ins.
+
+    Args:
+        clock (FakeClock): The clock behind the ticks_* functions, which then only moves when
+            the code sleeps or its owner advances it. None follows the host clock.
+    """
+    if clock is None:
+        time.ticks_ms = lambda: time.perf_counter_ns() // 1000000
+        time.ticks_us = lambda: time.perf_counter_ns() // 1000
+        time.sleep_ms = lambda ms: time.sleep(ms / 1000)
+        time.sleep_us = lambda us: time.sleep(us / 1000000)
+    else:
+        time.ticks_ms = lambda: clock.us // 1000
+        time.ticks_us = lambda: clock.us
+        time.sleep_ms = clock.advance_ms
+        time.sleep_us = lambda us: clock.advance_ms(us / 1000)
+    time.ticks_diff = lambda new, old: new - old
+    time.ticks_add = lambda ticks, delta: ticks + delta
+
+    # const() is a builtin on MicroPython, some modules use it without importing it, and so
+    # are the viper types
+    builtins.const = lambda value: value
+    builtins.uint = int
+    builtins.ptr8 = lambda buffer: _Pointer(buffer, "B")
+    builtins.ptr16 = lambda buffer: _Pointer(buffer, "H")
+    builtins.ptr32 = lambda buffer: _Pointer(buffer, "I")
+
+    micropython = types.ModuleType("micropython")
+    micropython.const = lambda value: value
+    micropython.native = lambda func: func
+    micropython.viper = lambda func: func
+    sys.modules.setdefault("micropython", micropython)
+    # the code emitter decorators work without importing micropython
+    builtins.micropython = sys.modules["micropython"]
+
+    ubinascii = types.ModuleType("ubinascii")
+    ubinascii.hexlify = binascii.hexlify
+    sys.modules.setdefault("ubinascii", ubinascii)
+
+    machine = types.ModuleType("machine")
+    machine.Pin = Pin
+    machine.I2C = I2C
+    machine.Timer = Timer
+    machine.SPI = SPI
+    machine.SoftSPI = SPI
+    machine.PWM = PWM
+    # SSPSR of both SPI buses reads idle
+    machine.mem32 = {0x4003C00C: 0, 0x4004000C: 0}
+    sys.modules.setdefault("machine", machine)
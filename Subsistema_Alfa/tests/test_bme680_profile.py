@@ -0,0 +1,67 @@
+"""
+Switching the BME680 sampling profile must be measured with a conversion that uses the new settings.
+"""
+
+import config
+from conftest import CLOCK, I2C
+from sensors import Sensors
+
+BME680_ADDRESS = 0x76
+
+# Oversampling codes of ctrl_meas/ctrl_hum to the number of samples taken
+SAMPLES = (0, 1, 2, 4, 8, 16)
+
+class FakeBME680:
+    """
+    The BME680 registers the driver touches. A forced conversion takes the time the datasheet
+    gives for the programmed oversampling plus the heater wait of step 0.
+    """
+
+    def __init__(self):
+        self.registers = bytearray(256)
+        self.registers[0xD0] = 0x61  # chip id
+        for register in range(0x8A, 0xA1):
+            self.registers[register] = 0x40  # calibration, any plausible value
+        for register in range(0xE1, 0xF0):
+            self.registers[register] = 0x40
+        self.ready_us = None
+        self.conversions = 0
+
+    def conversion_ms(self) -> float:
+        ctrl_meas = self.registers[0x74]
+        cycles = SAMPLES[ctrl_meas >> 5] + SAMPLES[(ctrl_meas >> 2) & 7] + SAMPLES[self.registers[0x72] & 7]
+        gas_wait = self.registers[0x64]
+        heater_ms = (gas_wait & 0x3F) * (4 ** (gas_wait >> 6))
+        return cycles * 1.963 + 4.5 + heater_ms
+
+    def write(self, register, data):
+        for i, value in enumerate(data):
+            self.registers[register + i] = value
+        if register == 0x74 and data[0] & 0x03 == 0x01:
+            self.conversions += 1
+            self.ready_us = CLOCK.us + int(self.conversion_ms() * 1000)
+
+    def read(self, register, length):
+        if register == 0x1D:
+            done = self.ready_us is not None and CLOCK.us >= self.ready_us
+            self.registers[0x1D] = 0x80 if done else 0x00
+        return self.registers[register:register + length]
+
+def test_report_follows_profile_switch(clock):
+    bme = FakeBME680()
+    I2C.devices[BME680_ADDRESS] = bme
+    sensors = Sensors()
+    sensors.initialize_bme680(config.bme680_profiles["ultra-low-power"])
+    assert sensors.read_bme680_sensor() is not None
+    low_ms, low_ua = sensors.bme680_profile_report()
+
+    # Switch well within the refresh period of the previous reading, as Main does
+    clock.advance_ms(10)
+    sensors.set_bme680_profile(config.bme680_profiles["high-accuracy"])
+    assert sensors.read_bme680_sensor() is not None
+    high_ms, high_ua = sensors.bme680_profile_report()
+
+    assert high_ms > low_ms
+    assert high_ua != low_ua
+    # measured by polling every 5 ms on a millisecond clock
+    assert 0 <= high_ms - bme.conversion_ms() <= 10
@@ -0,0 +1,154 @@
+"""
+The heater profile scan of a BME688, in forced mode and in parallel mode.
+"""
+
+from bme680 import BME680_I2C, HeaterProfileScheduler
+from conftest import CLOCK, I2C
+
+BME688_ADDRESS = 0x76
+FIELD_LENGTH = 17
+TEMPS = (200, 250, 300)
+FORCED_TIMES = (20, 30, 40)
+PARALLEL_TIMES = (2, 3, 4)
+CONVERSION_MS = 20
+GAS_RANGE = 4
+
+def gas_adc(step):
+    # a different gas reading for every heater step
+    return 512 + 100 * step
+
+class FakeBME688:
+    """
+    The BME688 registers the driver touches. A forced conversion takes CONVERSION_MS and fills
+    data field 0 with the heater step programmed in ctrl_gas_1. In parallel mode the fields are
+    written by the test.
+    """
+
+    def __init__(self):
+        self.registers = bytearray(256)
+        self.registers[0xD0] = 0x61  # chip id
+        self.registers[0xF0] = 0x01  # variant, gas high
+        for register in range(0x8A, 0xA1):
+            self.registers[register] = 0x40  # calibration, any plausible value
+        for register in range(0xE1, 0xF0):
+            self.registers[register] = 0x40
+        self.ready_us = None
+        self.triggered = []
+        self.unstable = set()
+        self.reads = 0
+        self.writes = 0
+
+    def field(self, index, meas, step, new_data=True, stable=True):
+        """
+        Fills a data field as the sensor does at the end of a conversion.
+        """
+        off = 0x1D + index * FIELD_LENGTH
+        adc = gas_adc(step)
+        self.registers[off] = (0x80 if new_data else 0x00) | step
+        self.registers[off + 1] = meas
+        self.registers[off + 15] = adc >> 2
+        self.registers[off + 16] = ((adc & 0x03) << 6) | (0x30 if stable else 0x20) | GAS_RANGE
+
+    def write(self, register, data):
+        self.writes += 1
+        for i, value in enumerate(data):
+            self.registers[register + i] = value
+        if register == 0x74 and data[0] & 0x03 == 0x01:
+            self.triggered.append(self.registers[0x71] & 0x0F)
+            self.registers[0x1D] = 0x00
+            self.ready_us = CLOCK.us + CONVERSION_MS * 1000
+
+    def read(self, register, length):
+        self.reads += 1
+        if register == 0x1D and self.ready_us is not None and CLOCK.us >= self.ready_us:
+            step = self.triggered[-1]
+            self.field(0, len(self.triggered) & 0xFF, step, stable=step not in self.unstable)
+            self.registers[0x74] &= ~0x03  # back to sleep
+            self.ready_us = None
+        return self.registers[register:register + length]
+
+def open_sensor():
+    bme = FakeBME688()
+    I2C.devices[BME688_ADDRESS] = bme
+    return bme, BME680_I2C(I2C(), BME688_ADDRESS)
+
+def expected(sensor, steps):
+    return [sensor._calc_gas_res(gas_adc(step), GAS_RANGE) for step in steps]
+
+def test_forced_mode_scans_every_step(clock):
+    bme, sensor = open_sensor()
+    bme.unstable.add(1)
+    scan = HeaterProfileScheduler(sensor, TEMPS, FORCED_TIMES)
+    bme.triggered.clear()
+
+    polls = 0
+    result = None
+    while result is None:
+        bme.reads = bme.writes = 0
+        result = scan.poll()
+        polls += 1
+        if bme.writes:
+            # starting a step: ctrl_gas_1 read, then ctrl_gas_1, config, ctrl_hum, ctrl_meas
+            assert (bme.reads, bme.writes) == (1, 4)
+        else:
+            # collecting it: the data field only
+            assert bme.reads == 1
+        clock.advance_ms(5)
+        assert polls < 100
+
+    assert bme.triggered == [0, 1, 2]
+    gas = expected(sensor, (0, 1, 2))
+    gas[1] = 0  # the heater was not stable
+    assert list(result) == gas
+
+    # the next scan starts again at step 0
+    assert scan.poll() is None
+    assert bme.triggered == [0, 1, 2, 0]
+
+def test_parallel_mode_takes_each_field_once(clock):
+    bme, sensor = open_sensor()
+    scan = HeaterProfileScheduler(sensor, TEMPS, PARALLEL_TIMES, shared_time=100)
+    assert bme.registers[0x71] & 0x0F == len(TEMPS)  # nb_conv, the sensor cycles all steps
+
+    bme.field(0, 10, 0)
+    bme.field(1, 11, 1)
+    bme.field(2, 12, 2, new_data=False)
+    bme.reads = 0
+    assert scan.poll() is None
+    assert bme.reads == 1
+
+    bme.field(2, 12, 2)
+    assert list(scan.poll()) == expected(sensor, (0, 1, 2))
+
+    # nothing new, the fields already taken are not counted for the next scan
+    assert scan.poll() is None
+    bme.field(0, 13, 0)
+    assert scan.poll() is None
+    bme.field(1, 14, 1)
+    assert scan.poll() is None
+    bme.field(2, 15, 2)
+    assert scan.poll() is not None
+
+def test_parallel_mode_measurement_index_wraps(clock):
+    bme, sensor = open_sensor()
+    scan = HeaterProfileScheduler(sensor, TEMPS, PARALLEL_TIMES, shared_time=100)
+
+    bme.field(0, 254, 0)
+    bme.field(1, 255, 1)
+    bme.field(2, 0, 2)
+    assert scan.poll() is not None
+
+    # field 0 is overwritten after the wrap, 255 and 0 in the other fields are older than 1
+    bme.field(0, 1, 0)
+    assert scan.poll() is None
+    bme.field(1, 2, 1)
+    assert scan.poll() is None
+    bme.field(2, 3, 2)
+    assert list(scan.poll()) == expected(sensor, (0, 1, 2))
+
+    # restarting the scan forgets the last measurement index
+    assert scan.start()
+    bme.field(0, 200, 0)
+    bme.field(1, 201, 1)
+    bme.field(2, 202, 2)
+    assert scan.poll() is not None
@@ -0,0 +1,67 @@
+"""
+Jobs submitted to the I2C bus manager must wait for the main loop, so a timer callback never
+runs a driver operation in the middle of another one.
+"""
+
+from conftest import I2C
+from sensors import I2CBusManager, I2C_PRIORITY_HIGH, I2C_PRIORITY_LOW
+
+APDS9960_ADDRESS = 0x39
+BME680_ADDRESS = 0x76
+
+class Registers:
+    """
+    A device whose registers read back their address, logging every access.
+    """
+
+    def __init__(self, name, log):
+        self.name = name
+        self.log = log
+
+    def read(self, register, length):
+        self.log.append((self.name, register))
+        return bytes(register for _ in range(length))
+
+    def write(self, register, data):
+        self.log.append((self.name, register))
+
+def make_bus(log):
+    I2C.devices[APDS9960_ADDRESS] = Registers("apds9960", log)
+    I2C.devices[BME680_ADDRESS] = Registers("bme680", log)
+    bus = I2CBusManager(0, 1, 0)
+    return bus, bus.device("apds9960", I2C_PRIORITY_HIGH), bus.device("bme680", I2C_PRIORITY_LOW)
+
+def test_submit_only_queues(clock):
+    log = []
+    bus, apds, bme = make_bus(log)
+    buf = bytearray(1)
+
+    # A driver operation of two steps with the sampling timer firing between them
+    apds.readfrom_mem_into(APDS9960_ADDRESS, 0x93, buf)
+    assert bus.submit(apds, lambda: apds.readfrom_mem_into(APDS9960_ADDRESS, 0x9C, bytearray(1)))
+    value = buf[0]
+    apds.writeto_mem(APDS9960_ADDRESS, 0x80, buf)
+    assert value == 0x93
+    assert log == [("apds9960", 0x93), ("apds9960", 0x80)]
+
+    bus.service()
+    assert log[-1] == ("apds9960", 0x9C)
+
+def test_queued_job_runs_before_less_urgent_transfer(clock):
+    log = []
+    bus, apds, bme = make_bus(log)
+    buf = bytearray(1)
+    bus.submit(apds, lambda: apds.readfrom_mem_into(APDS9960_ADDRESS, 0x9C, bytearray(1)))
+    bme.readfrom_mem_into(BME680_ADDRESS, 0x1D, buf)
+    assert log == [("apds9960", 0x9C), ("bme680", 0x1D)]
+    assert buf[0] == 0x1D
+
+def test_job_does_not_run_inside_its_own_device_transfers(clock):
+    log = []
+    bus, apds, bme = make_bus(log)
+    bus.submit(bme, lambda: bme.readfrom_mem_into(BME680_ADDRESS, 0x1D, bytearray(1)))
+    apds.readfrom_mem_into(APDS9960_ADDRESS, 0x93, bytearray(1))
+    bme.readfrom_mem_into(BME680_ADDRESS, 0x22, bytearray(1))
+    assert log == [("apds9960", 0x93), ("bme680", 0x22)]
+    bus.service()
+    assert log[-1] == ("bme680", 0x1D)
@@ -0,0 +1,22 @@
+"""
+The IAQ estimator must keep its fixed-point values within MicroPython small ints.
+"""
+
+from iaq import IAQEstimator
+
+# MicroPython small ints on the RP2040 are 31 bit signed
+SMALL_INT_MAX = (1 << 30) - 1
+
+def test_high_gas_resistance_stays_small(tmp_path):
+    estimator = IAQEstimator(str(tmp_path / "baseline.json"), burn_in=1)
+    for gas_ohms in (10 ** 12, 50000, 2 ** 40, 120000, 10 ** 9):
+        index = estimator.update(gas_ohms, 45.0)
+        assert 0 <= index <= 500
+        assert estimator._IAQEstimator__baseline <= SMALL_INT_MAX
+        assert IAQEstimator.GAS_WEIGHT * estimator._IAQEstimator__baseline >> 7 <= SMALL_INT_MAX
+
+def test_index_follows_gas_ratio(tmp_path):
+    estimator = IAQEstimator(str(tmp_path / "baseline.json"), burn_in=1, hum_baseline=40)
+    assert estimator.update(200000, 40.0) == 0
+    # half the baseline resistance costs half the gas score
+    assert estimator.update(100000, 40.0) == (100 - IAQEstimator.GAS_WEIGHT * 64 // 128 - 25) * 5
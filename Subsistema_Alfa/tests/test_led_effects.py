@@ -0,0 +1,63 @@
+"""
+The LED effects must be rendered by the main loop scheduler, the single owner of the strip.
+"""
+
+import config
+from actuators import Actuators, Color, LedEffects
+from scheduler import Scheduler
+
+BLUE = Color(255, 0, 0)
+
+def make_actuators():
+    scheduler = Scheduler()
+    actuators = Actuators()
+    actuators.initialize_rgbleds(scheduler)
+    spi = actuators._Actuators__spi
+    return scheduler, actuators, spi
+
+def test_frames_only_come_from_the_scheduler(clock):
+    scheduler, actuators, spi = make_actuators()
+    actuators.start_rgb_effect(LedEffects.BREATHE, BLUE)
+    assert actuators.rgb_effect() == LedEffects.BREATHE
+    sent = spi.writes
+    # time passing alone renders nothing, there is no timer behind the effect
+    clock.advance_ms(1000)
+    assert spi.writes == sent
+    assert actuators.rgb_effect_stats()[0] == 0
+
+    for _ in range(10):
+        scheduler.run_pending()
+        clock.advance_ms(40)
+    frames, frame_us, max_frame_us = actuators.rgb_effect_stats()
+    assert frames == 10
+    assert spi.writes > sent
+    assert 0 <= frame_us <= max_frame_us
+
+def test_stop_removes_the_task(clock):
+    scheduler, actuators, spi = make_actuators()
+    actuators.start_rgb_effect(LedEffects.RAINBOW, BLUE)
+    assert "rgb_effect" in scheduler.stats()
+    actuators.stop_rgb_effect()
+    assert "rgb_effect" not in scheduler.stats()
+    sent = spi.writes
+    clock.advance_ms(1000)
+    scheduler.run_pending()
+    assert spi.writes == sent
+
+def test_fade_ends_on_its_last_color(clock):
+    scheduler, actuators, spi = make_actuators()
+    actuators.start_rgb_effect(LedEffects.FADE, BLUE)
+    for _ in range(LedEffects.STEPS + 5):
+        clock.advance_ms(40)
+        scheduler.run_pending()
+    assert actuators.rgb_effect_stats()[0] == LedEffects.STEPS
+    assert "rgb_effect" not in scheduler.stats()
+
+def test_alarm_stops_the_effect_task(clock):
+    scheduler, actuators, spi = make_actuators()
+    actuators.initialize_buzzer(config.buzzer["patterns"], config.buzzer["tick_ms"])
+    actuators.start_rgb_effect(LedEffects.CHASE, BLUE)
+    actuators.activate_alarm()
+    assert "rgb_effect" not in scheduler.stats()
+    actuators.start_rgb_effect(LedEffects.CHASE, BLUE)
+    assert actuators.rgb_effect() == LedEffects.NONE
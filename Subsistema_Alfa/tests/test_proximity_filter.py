@@ -0,0 +1,138 @@
+"""
+The proximity filter replayed over a recorded trace, with the settings of config.proximity.
+"""
+
+import config
+from proximity import ProximityFilter
+from conftest import I2C
+from scheduler import Scheduler
+from sensors import Sensors
+
+SETTINGS = config.proximity
+PERIOD_MS = 1000 // SETTINGS["sample_rate"]
+
+# Raw proximity levels of someone walking up to the sensor, standing in front of it, stepping
+# back a little and walking away, one sample per sampling period. Includes single sample spikes
+# from the IR of passing cars and a short approach that does not last the dwell time.
+TRACE = (
+    12, 14, 13, 255, 12, 15, 13, 14, 250, 13,   # idle, spikes
+    40, 90, 170, 190, 185, 60, 30, 20, 15, 14,   # brief approach, shorter than the dwell
+    30, 80, 140, 175, 200, 210, 215, 212, 214, 211,   # walks up
+    213, 210, 208, 212, 215, 214, 209, 211, 213, 210,   # stands
+    140, 130, 120, 115, 110, 125, 118, 112, 130, 121,   # steps back, inside the hysteresis band
+    90, 95, 255, 92, 88, 70, 40, 20, 15, 14,   # walks away
+    13, 12, 14, 13, 12, 15, 13, 14, 12, 13    # idle
+)
+
+def replay(trace, **overrides):
+    """
+    Feeds a trace through a ProximityFilter built from config.proximity.
+
+    Returns:
+        list: (time in ms, filtered level, detection) of each sample.
+    """
+    settings = dict(SETTINGS, **overrides)
+    prox = ProximityFilter(settings["window"], settings["mode"], settings["on_threshold"],
+                           settings["off_threshold"], settings["dwell_ms"])
+    result = []
+    for i, level in enumerate(trace):
+        now = i * PERIOD_MS
+        detected = prox.update(level, now)
+        result.append((now, prox.value(), detected))
+    return result
+
+def transitions(result):
+    """
+    Returns the (time, detection) of each change of the detection.
+    """
+    changes = []
+    previous = False
+    for now, value, detected in result:
+        if detected != previous:
+            changes.append((now, detected))
+            previous = detected
+    return changes
+
+def test_config_values():
+    # the assertions below are written for these settings
+    assert (SETTINGS["on_threshold"], SETTINGS["off_threshold"]) == (150, 100)
+    assert SETTINGS["dwell_ms"] == 200
+    assert SETTINGS["sample_rate"] == 20
+
+def test_spikes_and_short_approach_do_not_trigger():
+    result = replay(TRACE[:20])
+    assert not any(detected for _, _, detected in result)
+
+def test_hysteresis_and_dwell():
+    result = replay(TRACE)
+    changes = transitions(result)
+    assert [detected for _, detected in changes] == [True, False]
+    on_ms, off_ms = changes[0][0], changes[1][0]
+
+    # on: the filtered level reached on_threshold dwell_ms before the detection
+    first_on = next(now for now, value, _ in result if now >= 20 * PERIOD_MS and value >= 150)
+    assert on_ms - first_on == SETTINGS["dwell_ms"]
+    assert all(value >= 150 for now, value, _ in result if first_on <= now <= on_ms)
+
+    # the steps back stay between the thresholds, the detection holds
+    assert all(detected for now, value, detected in result if on_ms <= now < off_ms)
+    assert any(100 < value < 150 for now, value, _ in result if on_ms <= now < off_ms)
+
+    # off: the filtered level fell to off_threshold dwell_ms before the detection cleared
+    first_off = next(now for now, value, _ in result if now > on_ms and value <= 100)
+    assert off_ms - first_off == SETTINGS["dwell_ms"]
+
+def test_dwell_is_needed():
+    # the same trace with a dwell longer than the visit never triggers
+    result = replay(TRACE, dwell_ms=len(TRACE) * PERIOD_MS)
+    assert not any(detected for _, _, detected in result)
+
+def test_mean_mode_uses_the_same_thresholds():
+    changes = transitions(replay(TRACE, mode=ProximityFilter.MEAN))
+    assert [detected for _, detected in changes] == [True, False]
+
+class FakeAPDS9960:
+    """
+    The APDS9960 registers, with PDATA playing back a trace one value per read.
+    """
+
+    def __init__(self, trace):
+        self.registers = bytearray(256)
+        self.registers[0x92] = 0xAB  # device id
+        self.trace = list(trace)
+
+    def write(self, register, data):
+        for i, value in enumerate(data):
+            self.registers[register + i] = value
+
+    def read(self, register, length):
+        if register == 0x9C and self.trace:
+            self.registers[0x9C] = self.trace.pop(0)
+        return self.registers[register:register + length]
+
+def test_sampling_task(clock):
+    I2C.devices[0x39] = FakeAPDS9960(TRACE)
+    scheduler = Scheduler()
+    sensors = Sensors()
+    sensors.initialize_apds9960()
+    sensors.initialize_proximity_filter(scheduler, **SETTINGS)
+    assert sensors._Sensors__prox_task.period_ms == PERIOD_MS == 50
+    # the dwell is a whole number of samples at this rate
+    assert SETTINGS["dwell_ms"] % PERIOD_MS == 0
+
+    # the main loop runs the scheduler every 10 ms, samples are taken at the sampling rate only
+    expected = replay(TRACE)
+    seen = []
+    for _ in range(len(TRACE) * PERIOD_MS // 10):
+        clock.advance_ms(10)
+        scheduler.run_pending()
+        runs = scheduler.stats()["proximity"][0]
+        if runs > len(seen):
+            seen.append(sensors.proximity_detected())
+    assert len(seen) == len(TRACE)
+    assert seen == [detected for _, _, detected in expected]
+
+    sensors.stop_proximity_sampling()
+    clock.advance_ms(1000)
+    scheduler.run_pending()
+    assert "proximity" not in scheduler.stats()